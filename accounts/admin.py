@@ -8,6 +8,8 @@ from accounts.models import (
     Permission,
     Module,
     BlacklistedToken,
+    RefreshTokenRecord,
+    InviteJob,
 )
 from import_export.admin import ImportExportModelAdmin
 from import_export import resources
@@ -120,9 +122,29 @@ class ModuleAdmin(ImportExportModelAdmin, SimpleHistoryAdmin):
 admin.site.register(Module, ModuleAdmin)
 
 
-class BlacklistedTokenAdmin(ImportExportModelAdmin, SimpleHistoryAdmin):
-    list_display = ["id", "token"]
-    readonly_fields = ("token",)
+class BlacklistedTokenAdmin(ImportExportModelAdmin):
+    list_display = ["id", "jti", "expires_at", "created_at"]
+    search_fields = ["jti"]
+    readonly_fields = ("jti", "expires_at", "created_at")
 
 
 admin.site.register(BlacklistedToken, BlacklistedTokenAdmin)
+
+
+class RefreshTokenRecordAdmin(ImportExportModelAdmin):
+    list_display = ["id", "jti", "user", "expires_at", "revoked_at"]
+    search_fields = ["jti"]
+    readonly_fields = ("jti", "user", "expires_at", "expires_day", "revoked_at")
+
+
+admin.site.register(RefreshTokenRecord, RefreshTokenRecordAdmin)
+
+
+class InviteJobAdmin(admin.ModelAdmin):
+    list_display = ["id", "created_by", "status", "total", "processed", "created_at"]
+    list_filter = ["status"]
+    readonly_fields = ("id", "created_by", "total", "processed", "created", "skipped")
+    exclude = ("payload",)
+
+
+admin.site.register(InviteJob, InviteJobAdmin)
@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 from django.apps import AppConfig
+from django.core import checks
 
 
 class AccountsConfig(AppConfig):
@@ -8,3 +9,8 @@ class AccountsConfig(AppConfig):
 
     def ready(self):
         from accounts import signals  # noqa
+        from utils.cache import check_shared_cache
+        from utils.schema import check_schema
+
+        checks.register(check_schema, "api_schema", deploy=True)
+        checks.register(check_shared_cache, "caches", deploy=True)
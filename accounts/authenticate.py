@@ -1,10 +1,13 @@
 # -*- coding: utf-8 -*-
 from rest_framework_simplejwt import authentication as jwt_authentication
 from django.conf import settings
-from cryptography.fernet import Fernet
-import ast
-from accounts.models import BlacklistedToken
+from cryptography.fernet import InvalidToken as InvalidCookie
+from accounts.revocation import revocation_cache
+from accounts.principals import get_user_principal
+from accounts.token_codec import token_codec
 from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
 
 
 class CustomAuthentication(jwt_authentication.JWTAuthentication):
@@ -17,9 +20,24 @@ class CustomAuthentication(jwt_authentication.JWTAuthentication):
         else:
             return None
 
+    def get_user(self, validated_token):
+        """Return a cached ``UserPrincipal`` instead of loading the full user row."""
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken("Token contained no recognizable user identification")
+
+        user = get_user_principal(user_id)
+        if user is None:
+            raise AuthenticationFailed("User not found", code="user_not_found")
+        if not user.is_active:
+            raise AuthenticationFailed("User is inactive", code="user_inactive")
+
+        return user
+
     def authenticate(self, request):
         header = self.get_header(request)
-        hashed_key = Fernet(settings.HASHED_ACCESS_TOKEN_KEY)
 
         if header is None:
             raw_token = request.COOKIES.get(settings.SIMPLE_JWT["AUTH_COOKIE"]) or None
@@ -30,13 +48,22 @@ class CustomAuthentication(jwt_authentication.JWTAuthentication):
             return None
 
         try:
-            hashed_token = hashed_key.decrypt(ast.literal_eval(raw_token))
-        except Exception:
+            validated_token = token_codec.verify(raw_token, self.get_validated_token)
+        except (InvalidCookie, UnicodeDecodeError):
             raise AuthenticationFailed("Invalid token")
 
-        token = hashed_token.decode()
-        if BlacklistedToken.objects.filter(token=token).exists():
+        if settings.TOKEN_SESSION_VERSIONING:
+            user = self.get_user(validated_token)
+            if (
+                validated_token.get(settings.SESSION_VERSION_CLAIM)
+                != user.session_version
+            ):
+                raise AuthenticationFailed("Session has been revoked")
+            return user, validated_token
+
+        if revocation_cache.is_revoked(
+            validated_token[settings.SIMPLE_JWT["JTI_CLAIM"]]
+        ):
             raise AuthenticationFailed("Token is blacklisted")
-        validated_token = self.get_validated_token(token)
 
         return self.get_user(validated_token), validated_token
@@ -0,0 +1,212 @@
+# -*- coding: utf-8 -*-
+import logging
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import IntegrityError, connections, transaction
+from django.db.models import F
+from django.utils import timezone
+from utils.history import bulk_create_tracked
+from accounts.models import CustomUser, InviteJob, Role
+from utils.email import invite_email
+from utils.enums import Enums
+
+logger = logging.getLogger("django")
+
+
+def clean_invite_row(row):
+    """Return ``(email, first_name, last_name)`` for a submitted row or raise ``ValidationError``."""
+
+    email = str(row.get("email") or "").strip().lower()
+    validate_email(email)
+    names = []
+    for field in ("first_name", "last_name"):
+        value = str(row.get(field) or "").strip()
+        if len(value) > 64:
+            raise ValidationError(f"{field} must be at most 64 characters")
+        names.append(value)
+    return email, *names
+
+
+def provision_users(rows, role_ids, offset=0):
+    """Create inactive users for ``rows`` with bulk inserts and queue their invite emails.
+
+    Invitees have no password until they accept the invite with the emailed
+    token, see ``accept_invite``.
+    Returns ``(created, skipped, errors)``, where ``skipped`` counts emails that
+    already have an account, including ones created while the batch runs, and
+    ``errors`` lists invalid rows by 1-based row number.
+    """
+
+    errors = []
+    cleaned = {}
+    for number, row in enumerate(rows, start=offset + 1):
+        try:
+            email, first_name, last_name = clean_invite_row(row)
+        except (ValidationError, AttributeError) as error:
+            message = getattr(error, "messages", [str(error)])
+            errors.append({"row": number, "error": "; ".join(message)})
+            continue
+        cleaned.setdefault(email, (first_name, last_name))
+
+    existing = set(
+        CustomUser.objects.filter(email__in=cleaned).values_list("email", flat=True)
+    )
+    users = [
+        CustomUser(
+            email=email,
+            first_name=first_name,
+            last_name=last_name,
+            password=make_password(None),
+            is_active=False,
+        )
+        for email, (first_name, last_name) in cleaned.items()
+        if email not in existing
+    ]
+    while True:
+        try:
+            with transaction.atomic():
+                users = bulk_create_tracked(users, CustomUser)
+            break
+        except IntegrityError:
+            # Another request created some of these emails since the check above.
+            taken = set(
+                CustomUser.objects.filter(
+                    email__in=[user.email for user in users]
+                ).values_list("email", flat=True)
+            )
+            if not taken:
+                raise
+            users = [user for user in users if user.email not in taken]
+
+    through = CustomUser.role.through
+    through.objects.bulk_create(
+        [
+            through(customuser_id=user.pk, role_id=role_id)
+            for user in users
+            for role_id in role_ids
+        ],
+        ignore_conflicts=True,
+    )
+    for user in users:
+        invite_email(
+            user.first_name, user.email, user.token, event=Enums.INVITE_EMAIL.value
+        )
+
+    skipped = len(rows) - len(users) - len(errors)
+    return len(users), skipped, errors
+
+
+def accept_invite(email, token, password):
+    """Give an invited user their first password and activate them.
+
+    ``token`` is the one sent in the invite email; it is rotated so the
+    invite cannot be accepted twice. Returns the user, or ``None`` when no
+    invited user without a password matches ``email`` and ``token``.
+    """
+
+    user = (
+        CustomUser.objects.select_for_update()
+        .filter(email=email.strip().lower(), token=token)
+        .first()
+    )
+    if user is None or user.has_usable_password():
+        return None
+    user.set_password(password)
+    user.is_active = True
+    user.token = uuid.uuid4()
+    user.save()
+    return user
+
+
+def fail_stale_invite_jobs(older_than=None):
+    """Mark pending or running jobs untouched for ``older_than`` as failed.
+
+    A job whose worker died, or whose process exited before the on-commit
+    start ran, otherwise stays pending or running forever. ``older_than``
+    defaults to ``INVITE_JOB_STALE_AFTER`` seconds. Returns the number of jobs
+    failed.
+    """
+
+    if older_than is None:
+        older_than = timedelta(seconds=settings.INVITE_JOB_STALE_AFTER)
+    return InviteJob.objects.filter(
+        status__in=[Enums.JOB_PENDING.value, Enums.JOB_RUNNING.value],
+        updated_at__lt=timezone.now() - older_than,
+    ).update(status=Enums.JOB_FAILED.value, payload=[], updated_at=timezone.now())
+
+
+class InviteJobRunner:
+    """Processes ``InviteJob`` rows in the background, ``INVITE_BATCH_SIZE`` rows per transaction.
+
+    Jobs start once the transaction that created them commits. Counters on the
+    job are updated after every batch so clients can poll progress. With
+    ``INVITE_JOB_WORKERS = 0`` jobs run inline in the on-commit callback.
+    """
+
+    def __init__(self):
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def submit(self, job_id):
+        transaction.on_commit(lambda: self.start(job_id))
+
+    def start(self, job_id):
+        if settings.INVITE_JOB_WORKERS == 0:
+            self.run(job_id)
+            return
+
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=settings.INVITE_JOB_WORKERS,
+                    thread_name_prefix="invite-job",
+                )
+        self._executor.submit(self.run_in_thread, job_id)
+
+    def run_in_thread(self, job_id):
+        try:
+            self.run(job_id)
+        finally:
+            connections.close_all()
+
+    def run(self, job_id):
+        job = InviteJob.objects.get(pk=job_id)
+        jobs = InviteJob.objects.filter(pk=job_id)
+        jobs.update(status=Enums.JOB_RUNNING.value, updated_at=timezone.now())
+        role_ids = list(
+            Role.objects.filter(id__in=job.roles).values_list("id", flat=True)
+        )
+        errors = []
+        batch_size = settings.INVITE_BATCH_SIZE
+        try:
+            for offset in range(0, len(job.payload), batch_size):
+                end = offset + batch_size
+                rows = job.payload[offset:end]
+                with transaction.atomic():
+                    created, skipped, batch_errors = provision_users(
+                        rows, role_ids, offset=offset
+                    )
+                    errors.extend(batch_errors)
+                    jobs.update(
+                        processed=F("processed") + len(rows),
+                        created=F("created") + created,
+                        skipped=F("skipped") + skipped,
+                        errors=errors,
+                        updated_at=timezone.now(),
+                    )
+        except Exception as error:
+            logger.error(f"Invite job {job_id} failed: {error}")
+            errors.append({"row": None, "error": str(error)})
+            jobs.update(status=Enums.JOB_FAILED.value, errors=errors, payload=[])
+            return
+
+        jobs.update(status=Enums.JOB_COMPLETED.value, payload=[])
+
+
+invite_job_runner = InviteJobRunner()
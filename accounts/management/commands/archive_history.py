@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+import time
+from datetime import timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+from utils.history import historical_models
+from utils.history_archive import archive_history
+
+
+class Command(BaseCommand):
+    help = (
+        "Move cold historical rows into compressed segment files. Run it from cron, "
+        "or keep it running with --every."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--model",
+            action="append",
+            help="Tracked model to archive; repeat for several (defaults to all).",
+        )
+        parser.add_argument(
+            "--older-than-days",
+            type=int,
+            default=None,
+            help="Archive rows older than this (defaults to HISTORY_ARCHIVE_AFTER_DAYS).",
+        )
+        parser.add_argument(
+            "--segment-rows",
+            type=int,
+            default=None,
+            help="Rows per segment (defaults to HISTORY_ARCHIVE_SEGMENT_ROWS).",
+        )
+        parser.add_argument(
+            "--every",
+            type=int,
+            default=None,
+            help="Repeat every this many seconds instead of running once.",
+        )
+
+    def handle(self, *args, **options):
+        models = historical_models()
+        names = [name.lower() for name in options["model"] or sorted(models)]
+        unknown = [name for name in names if name not in models]
+        if unknown:
+            raise CommandError(f"Unknown model(s): {', '.join(unknown)}")
+        older_than = options["older_than_days"]
+        if older_than is not None:
+            older_than = timedelta(days=older_than)
+
+        while True:
+            for name in names:
+                archived = archive_history(
+                    models[name],
+                    older_than=older_than,
+                    segment_rows=options["segment_rows"],
+                )
+                if archived:
+                    self.stdout.write(f"Archived {archived} {name} history rows")
+            if options["every"] is None:
+                return
+            close_old_connections()
+            time.sleep(options["every"])
@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from accounts.invites import fail_stale_invite_jobs
+
+
+class Command(BaseCommand):
+    help = (
+        "Mark invite jobs left pending or running by a dead worker as failed. "
+        "Run it from cron or at deploy."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--older-than-seconds",
+            type=int,
+            default=None,
+            help="Fail jobs not updated for this long (defaults to INVITE_JOB_STALE_AFTER).",
+        )
+
+    def handle(self, *args, **options):
+        older_than = options["older_than_seconds"]
+        if older_than is not None:
+            older_than = timedelta(seconds=older_than)
+        failed = fail_stale_invite_jobs(older_than=older_than)
+        self.stdout.write(f"Failed {failed} stale invite jobs")
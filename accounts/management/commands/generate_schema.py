@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from utils.schema import PrecomputedSchema, generate_schema
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate the OpenAPI schema and its gzip/Brotli variants into API_SCHEMA_FILE. "
+        "Run it once per deploy."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Fail if the written schema is missing or stale instead of writing it.",
+        )
+
+    def handle(self, *args, **options):
+        path = settings.API_SCHEMA_FILE
+        body = generate_schema()
+        if options["check"]:
+            schema = PrecomputedSchema.load(path)
+            if schema is None:
+                raise CommandError(f"No API schema at {path}")
+            if not schema.is_current(body):
+                raise CommandError(f"The API schema at {path} is stale")
+            self.stdout.write(f"{path} is up to date")
+            return
+
+        schema = PrecomputedSchema(body)
+        schema.write(path)
+        variants = ", ".join(
+            f"{encoding} {len(variant)}"
+            for encoding, variant in schema.variants.items()
+        )
+        self.stdout.write(f"Wrote {path}: {len(body)} bytes ({variants})")
@@ -0,0 +1,19 @@
+# -*- coding: utf-8 -*-
+from django.core.management.base import BaseCommand
+from accounts.refresh_tokens import prune_refresh_tokens
+
+
+class Command(BaseCommand):
+    help = "Delete refresh token records whose expiry day has passed. Run it from cron."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=None,
+            help="Rows deleted per query (defaults to TOKEN_BLACKLIST_PRUNE_BATCH_SIZE).",
+        )
+
+    def handle(self, *args, **options):
+        deleted = prune_refresh_tokens(batch_size=options["batch_size"])
+        self.stdout.write(f"Pruned {deleted} expired refresh tokens")
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+import hashlib
+from datetime import datetime, timezone
+
+import jwt
+from django.db import migrations, models
+from django.utils import timezone as django_timezone
+
+
+def backfill_jti(apps, schema_editor):
+    """Derive ``jti``/``expires_at`` from the JWT strings stored so far.
+
+    Tokens that cannot be decoded keep a digest of the raw string as their
+    ``jti`` and are marked expired, so the next prune removes them.
+    """
+
+    BlacklistedToken = apps.get_model("accounts", "BlacklistedToken")
+    seen = set()
+    for row in BlacklistedToken.objects.order_by("id").iterator(chunk_size=2000):
+        try:
+            payload = jwt.decode(row.token, options={"verify_signature": False})
+            jti = payload["jti"]
+            expires_at = datetime.fromtimestamp(payload["exp"], tz=timezone.utc)
+        except Exception:
+            jti = hashlib.sha256(row.token.encode()).hexdigest()
+            expires_at = django_timezone.now()
+
+        if jti in seen:
+            row.delete()
+            continue
+        seen.add(jti)
+        row.jti = jti
+        row.expires_at = expires_at
+        row.created_at = row.created_at or django_timezone.now()
+        row.save(update_fields=["jti", "expires_at", "created_at"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0002_historicalrolepermission_rolepermission"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="blacklistedtoken",
+            name="jti",
+            field=models.CharField(max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name="blacklistedtoken",
+            name="expires_at",
+            field=models.DateTimeField(null=True),
+        ),
+        migrations.RunPython(backfill_jti, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name="blacklistedtoken",
+            name="token",
+        ),
+        migrations.RemoveField(
+            model_name="blacklistedtoken",
+            name="updated_at",
+        ),
+        migrations.RemoveField(
+            model_name="blacklistedtoken",
+            name="is_active",
+        ),
+        migrations.AlterField(
+            model_name="blacklistedtoken",
+            name="jti",
+            field=models.CharField(max_length=64, unique=True),
+        ),
+        migrations.AlterField(
+            model_name="blacklistedtoken",
+            name="expires_at",
+            field=models.DateTimeField(db_index=True),
+        ),
+        migrations.AlterField(
+            model_name="blacklistedtoken",
+            name="created_at",
+            field=models.DateTimeField(auto_now_add=True),
+        ),
+        migrations.DeleteModel(
+            name="HistoricalBlacklistedToken",
+        ),
+    ]
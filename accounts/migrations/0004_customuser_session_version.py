@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 5.1.3 on 2026-10-17 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0003_blacklistedtoken_jti"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="customuser",
+            name="session_version",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="historicalcustomuser",
+            name="session_version",
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+# Generated by Django 5.1.3 on 2026-10-17 12:02
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def copy_rotated_refresh_tokens(apps, schema_editor):
+    """Carry over refresh tokens the token_blacklist app has already revoked."""
+
+    BlacklistedToken = apps.get_model("token_blacklist", "BlacklistedToken")
+    RefreshTokenRecord = apps.get_model("accounts", "RefreshTokenRecord")
+    rows = (
+        BlacklistedToken.objects.filter(token__expires_at__gt=timezone.now())
+        .values_list(
+            "token__jti", "token__user_id", "token__expires_at", "blacklisted_at"
+        )
+        .iterator(chunk_size=2000)
+    )
+    batch = []
+    for jti, user_id, expires_at, blacklisted_at in rows:
+        batch.append(
+            RefreshTokenRecord(
+                jti=jti[:64],
+                user_id=user_id,
+                expires_at=expires_at,
+                expires_day=expires_at.date(),
+                revoked_at=blacklisted_at,
+            )
+        )
+        if len(batch) >= 2000:
+            RefreshTokenRecord.objects.bulk_create(batch, ignore_conflicts=True)
+            batch = []
+    RefreshTokenRecord.objects.bulk_create(batch, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0004_customuser_session_version"),
+        ("token_blacklist", "0012_alter_outstandingtoken_user"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RefreshTokenRecord",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("jti", models.CharField(max_length=64, unique=True)),
+                ("expires_at", models.DateTimeField()),
+                ("expires_day", models.DateField(db_index=True)),
+                ("revoked_at", models.DateTimeField(blank=True, null=True)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="refresh_tokens",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ("-id",),
+            },
+        ),
+        migrations.RunPython(copy_rotated_refresh_tokens, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.1.3 on 2026-10-17 12:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0005_refreshtokenrecord"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="emailotp",
+            index=models.Index(
+                fields=["email", "stage", "is_valid"],
+                name="accounts_em_email_4119e9_idx",
+            ),
+        ),
+    ]
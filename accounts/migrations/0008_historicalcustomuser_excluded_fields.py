@@ -0,0 +1,25 @@
+# Generated by Django 5.1.3 on 2026-10-17 12:28
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0007_invitejob"),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name="historicalcustomuser",
+            name="last_login",
+        ),
+        migrations.RemoveField(
+            model_name="historicalcustomuser",
+            name="password",
+        ),
+        migrations.RemoveField(
+            model_name="historicalcustomuser",
+            name="token",
+        ),
+    ]
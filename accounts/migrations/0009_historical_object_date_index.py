@@ -0,0 +1,49 @@
+# Generated by Django 5.1.3 on 2026-10-17 12:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0008_historicalcustomuser_excluded_fields"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="historicalcustomuser",
+            index=models.Index(
+                fields=["id", "history_date"], name="accounts_hi_id_3bd89d_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="historicalemailotp",
+            index=models.Index(
+                fields=["id", "history_date"], name="accounts_hi_id_8cc00f_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="historicalmodule",
+            index=models.Index(
+                fields=["id", "history_date"], name="accounts_hi_id_389968_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="historicalpermission",
+            index=models.Index(
+                fields=["id", "history_date"], name="accounts_hi_id_0a641f_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="historicalrole",
+            index=models.Index(
+                fields=["id", "history_date"], name="accounts_hi_id_824a59_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="historicalrolepermission",
+            index=models.Index(
+                fields=["id", "history_date"], name="accounts_hi_id_1662d5_idx"
+            ),
+        ),
+    ]
@@ -4,8 +4,8 @@ from django.contrib.auth.models import AbstractUser
 from django.contrib.auth.base_user import BaseUserManager
 from utils.enums import Enums
 from utils.models import BaseModel
+from utils.history import TrackedHistoricalRecords, remember_loaded_values
 import uuid
-from simple_history.models import HistoricalRecords
 
 
 class Module(BaseModel):
@@ -87,6 +87,16 @@ class UserManager(BaseUserManager):
         extra_fields.setdefault("is_superuser", False)
         return self._create_user(email, password, **extra_fields)
 
+    def get_by_natural_key(self, username):
+        """Fetch the user for authentication, flagging the 2FA role in the same query."""
+
+        two_factor_role = self.model.role.through.objects.filter(
+            customuser_id=models.OuterRef("pk"), role__name="2fa"
+        )
+        return self.annotate(has_2fa_role=models.Exists(two_factor_role)).get(
+            **{self.model.USERNAME_FIELD: username}
+        )
+
     def create_superuser(self, email, password, **extra_fields):
         """Create and save a SuperUser with the given email and password."""
         extra_fields.setdefault("is_staff", True)
@@ -112,11 +122,14 @@ class CustomUser(AbstractUser):
     )
     role = models.ManyToManyField(Role, related_name="users", blank=True)
     token = models.UUIDField(default=uuid.uuid4, unique=True)
+    session_version = models.PositiveIntegerField(default=0)
 
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = []
     objects = UserManager()
-    history = HistoricalRecords()
+    history = TrackedHistoricalRecords()
+    # Rotated on every login or password change; not worth a history row.
+    history_excluded_fields = ("token", "password", "last_login")
 
     class Meta:
         ordering = ("-id",)
@@ -124,6 +137,12 @@ class CustomUser(AbstractUser):
     def __str__(self):
         return f"{self.email} - {self.id}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        remember_loaded_values(instance, field_names, values)
+        return instance
+
     def save(self, *args, **kwargs):
         self.email = self.email.lower()
         return super().save(*args, **kwargs)
@@ -141,9 +160,12 @@ class EmailOtp(BaseModel):
     stage = models.PositiveSmallIntegerField(
         choices=OTP_STAGES, default=Enums.SIGN_UP.value
     )
+    # The rows are already an audit trail of issued OTPs.
+    track_history = False
 
     class Meta:
         ordering = ["-id"]
+        indexes = [models.Index(fields=["email", "stage", "is_valid"])]
 
     def save(self, *args, **kwargs):
         self.email = self.email.lower()
@@ -153,11 +175,82 @@ class EmailOtp(BaseModel):
         return self.otp
 
 
-class BlacklistedToken(BaseModel):
-    token = models.CharField(max_length=1000)
+class BlacklistedToken(models.Model):
+    """Revoked access token, stored by ``jti`` until the token itself expires.
+
+    Not a ``BaseModel``: rows are pruned once ``expires_at`` has passed, so
+    they carry no history table and no update/soft-delete columns.
+    """
+
+    jti = models.CharField(max_length=64, unique=True)
+    expires_at = models.DateTimeField(db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         ordering = ("-id",)
 
     def __str__(self):
-        return str(self.id)
+        return self.jti
+
+
+class RefreshTokenRecord(models.Model):
+    """Issued refresh token, tracked by ``jti`` until its expiry day has passed.
+
+    ``expires_day`` is the partition key: cleanup removes whole past days with
+    an indexed range delete instead of scanning ``expires_at``.
+    """
+
+    jti = models.CharField(max_length=64, unique=True)
+    user = models.ForeignKey(
+        CustomUser,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name="refresh_tokens",
+    )
+    expires_at = models.DateTimeField()
+    expires_day = models.DateField(db_index=True)
+    revoked_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ("-id",)
+
+    def __str__(self):
+        return self.jti
+
+
+class InviteJob(models.Model):
+    """Progress of a bulk user invitation, processed in the background.
+
+    ``payload`` holds the submitted rows until the job finishes.
+    """
+
+    JOB_STATUSES = (
+        (Enums.JOB_PENDING.value, "Pending"),
+        (Enums.JOB_RUNNING.value, "Running"),
+        (Enums.JOB_COMPLETED.value, "Completed"),
+        (Enums.JOB_FAILED.value, "Failed"),
+    )
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    created_by = models.ForeignKey(
+        CustomUser, on_delete=models.SET_NULL, null=True, related_name="invite_jobs"
+    )
+    status = models.PositiveSmallIntegerField(
+        choices=JOB_STATUSES, default=Enums.JOB_PENDING.value
+    )
+    roles = models.JSONField(default=list)
+    payload = models.JSONField(default=list)
+    total = models.PositiveIntegerField(default=0)
+    processed = models.PositiveIntegerField(default=0)
+    created = models.PositiveIntegerField(default=0)
+    skipped = models.PositiveIntegerField(default=0)
+    errors = models.JSONField(default=list)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    def __str__(self):
+        return f"{self.id} - {self.processed}/{self.total}"
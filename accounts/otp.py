@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+from datetime import timedelta
+from secrets import compare_digest
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from accounts.models import EmailOtp
+from utils.error import APIError, Error
+from utils.util import generate_otp
+
+OTP_KEY = "accounts:otp:{}:{}"
+USED_OTP_KEY = "accounts:otp-used:{}:{}:{}"
+
+
+class OtpStore:
+    """Active OTPs held in the cache, keyed by ``(email, stage)``.
+
+    Each key lives for ``RESEND_OTP_TIME`` seconds, so verifying is a single
+    cache lookup. A successful verify first adds a "used" marker for the OTP,
+    and only the caller whose add creates it wins, then deletes the key.
+    ``EmailOtp`` rows are kept as an audit trail and written after commit.
+    They are only read when the cache has no entry and no marker, for example
+    an OTP issued by another process on a per-process cache, so the audit row
+    of an OTP used from the cache cannot be used again before it is marked.
+    """
+
+    def key(self, email, stage):
+        return OTP_KEY.format(stage, email.lower())
+
+    def used_key(self, email, stage, otp):
+        return USED_OTP_KEY.format(stage, email.lower(), otp)
+
+    def issue(self, email, stage, otp=None):
+        otp = otp or generate_otp()
+        email = email.lower()
+        cache.set(self.key(email, stage), otp, timeout=int(settings.RESEND_OTP_TIME))
+        cache.delete(self.used_key(email, stage, otp))
+        transaction.on_commit(
+            lambda: EmailOtp.objects.create(email=email, otp=otp, stage=stage)
+        )
+        return otp
+
+    def verify(self, email, stage, otp):
+        """Consume ``otp`` for ``(email, stage)`` or raise ``APIError``."""
+
+        email = email.lower()
+        key = self.key(email, stage)
+        used_key = self.used_key(email, stage, otp)
+        cached = cache.get(key)
+        if cached is None:
+            if cache.get(used_key) is not None:
+                raise APIError(
+                    Error.DEFAULT_ERROR, extra=["The information provided is incorrect"]
+                )
+            return self.verify_audit_row(email, stage, otp)
+
+        if not compare_digest(cached.encode(), otp.encode()) or not cache.add(
+            used_key, True, timeout=int(settings.RESEND_OTP_TIME)
+        ):
+            raise APIError(
+                Error.DEFAULT_ERROR, extra=["The information provided is incorrect"]
+            )
+        cache.delete(key)
+        transaction.on_commit(
+            lambda: EmailOtp.objects.filter(
+                email=email, stage=stage, otp=otp, is_valid=False
+            ).update(is_valid=True)
+        )
+
+    def verify_audit_row(self, email, stage, otp):
+        otp_obj = (
+            EmailOtp.objects.filter(otp=otp, email=email, is_valid=False, stage=stage)
+            .order_by("created_at")
+            .first()
+        )
+        if not otp_obj:
+            raise APIError(
+                Error.DEFAULT_ERROR, extra=["The information provided is incorrect"]
+            )
+
+        expiration_period = timedelta(seconds=int(settings.RESEND_OTP_TIME))
+        if otp_obj.created_at < (timezone.now() - expiration_period):
+            raise APIError(Error.DEFAULT_ERROR, extra=["OTP has been Expired"])
+
+        if not EmailOtp.objects.filter(pk=otp_obj.pk, is_valid=False).update(
+            is_valid=True
+        ):
+            raise APIError(
+                Error.DEFAULT_ERROR, extra=["The information provided is incorrect"]
+            )
+
+
+otp_store = OtpStore()
@@ -1,7 +1,29 @@
 # -*- coding: utf-8 -*-
 from rest_framework import permissions
+from accounts.rbac import has_module_permission
 
 
 class IsOwner(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
         return obj == request.user
+
+
+class HasModulePermission(permissions.BasePermission):
+    """Allow the request only if one of the user's roles grants ``permission`` on ``module``.
+
+    Used as an instance, e.g.
+    ``permission_classes = [IsAuthenticated, HasModulePermission("events", "create")]``.
+    """
+
+    def __init__(self, module, permission):
+        self.module = module
+        self.permission = permission
+
+    def __call__(self):
+        return self
+
+    def has_permission(self, request, view):
+        user = request.user
+        if not user or not user.is_authenticated:
+            return False
+        return has_module_permission(user, self.module, self.permission)
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+from dataclasses import dataclass
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from accounts.models import CustomUser
+from utils.cache import is_shared
+
+USER_PRINCIPAL_KEY = "accounts:principal:{}"
+
+
+@dataclass(frozen=True, eq=False)
+class UserPrincipal:
+    """Slim, read-only stand-in for ``CustomUser`` on JWT-authenticated requests.
+
+    Holds only what authentication and role checks need, so it can be cached
+    and returned without loading the full user row.
+    """
+
+    id: int
+    email: str
+    is_active: bool
+    token: str
+    session_version: int
+    role_ids: frozenset
+
+    is_authenticated = True
+    is_anonymous = False
+
+    @property
+    def pk(self):
+        return self.id
+
+    def __eq__(self, other):
+        if isinstance(other, (UserPrincipal, CustomUser)):
+            return self.pk == other.pk
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self.pk)
+
+    def __str__(self):
+        return f"{self.email} - {self.id}"
+
+    def get_user(self):
+        """Load the full ``CustomUser`` row for code paths that need to write it."""
+
+        return CustomUser.objects.get(pk=self.id)
+
+
+def get_user_principal(user_id):
+    """Return the cached principal for ``user_id``, or ``None`` if the user is gone."""
+
+    key = USER_PRINCIPAL_KEY.format(user_id)
+    principal = cache.get(key)
+    if principal is not None:
+        return principal
+
+    row = (
+        CustomUser.objects.filter(pk=user_id)
+        .values("id", "email", "is_active", "token", "session_version")
+        .first()
+    )
+    if row is None:
+        return None
+
+    role_ids = CustomUser.role.through.objects.filter(
+        customuser_id=user_id
+    ).values_list("role_id", flat=True)
+    principal = UserPrincipal(
+        id=row["id"],
+        email=row["email"],
+        is_active=row["is_active"],
+        token=str(row["token"]),
+        session_version=row["session_version"],
+        role_ids=frozenset(role_ids),
+    )
+    # Invalidations made on other workers never reach a process-local cache,
+    # so there only a short TTL bounds how long the row can be stale.
+    timeout = (
+        settings.AUTH_USER_CACHE_TTL
+        if is_shared()
+        else settings.AUTH_USER_LOCAL_CACHE_TTL
+    )
+    cache.set(key, principal, timeout=timeout)
+    return principal
+
+
+def invalidate_user_principals(user_ids):
+    """Drop the cached principals of ``user_ids`` now and again once the current transaction commits.
+
+    Until the commit other requests still read the old row, and may cache it
+    again; the second drop removes whatever they cached in the meantime.
+    """
+
+    keys = [USER_PRINCIPAL_KEY.format(user_id) for user_id in user_ids]
+    cache.delete_many(keys)
+    transaction.on_commit(lambda: cache.delete_many(keys))
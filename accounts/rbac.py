@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+import hashlib
+import time
+from dataclasses import dataclass
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from accounts.models import CustomUser, Permission, Role
+
+ROLE_VERSION_KEY = "accounts:role_version:{}"
+PERMISSION_INDEX_KEY = "accounts:permission_index"
+USER_PERMISSIONS_KEY = "accounts:permissions:{}:{}"
+
+
+@dataclass(frozen=True)
+class PermissionIndex:
+    """Dense bit positions ``0..n-1`` of every permission, assigned in id order.
+
+    ``bits`` maps ``(module name, permission name)`` and ``positions`` maps
+    permission ids to a position. Positions shift when a permission is
+    removed, so every rebuild gets a new ``generation`` and masks are cached
+    per generation.
+    """
+
+    generation: int
+    bits: dict
+    positions: dict
+
+
+def permission_index():
+    """Return the cached ``PermissionIndex``, rebuilding it if it was dropped."""
+
+    index = cache.get(PERMISSION_INDEX_KEY)
+    if index is None:
+        bits, positions = {}, {}
+        rows = Permission.objects.order_by("id").values_list(
+            "module__name", "name", "id"
+        )
+        for position, (module, name, permission_id) in enumerate(rows):
+            bits[(module, name)] = positions[permission_id] = position
+        index = PermissionIndex(time.time_ns(), bits, positions)
+        cache.set(PERMISSION_INDEX_KEY, index, timeout=settings.PERMISSION_CACHE_TTL)
+    return index
+
+
+def invalidate_permission_index():
+    """Drop the name lookup now and again once the current transaction commits.
+
+    Until the commit other requests still read the old rows, and may cache
+    them again; the second drop removes whatever they cached in the meantime.
+    """
+
+    cache.delete(PERMISSION_INDEX_KEY)
+    transaction.on_commit(lambda: cache.delete(PERMISSION_INDEX_KEY))
+
+
+def bump_role_versions(role_ids):
+    """Make every cached permission set that includes these roles stale.
+
+    The versions are bumped now and again once the current transaction
+    commits, so a set compiled from the old rows before the commit is not
+    kept under the new version.
+    """
+
+    keys = [ROLE_VERSION_KEY.format(role_id) for role_id in role_ids]
+    increment_role_versions(keys)
+    transaction.on_commit(lambda: increment_role_versions(keys))
+
+
+def increment_role_versions(keys):
+    for key in keys:
+        if not cache.add(key, 1, timeout=None):
+            try:
+                cache.incr(key)
+            except ValueError:
+                cache.set(key, 1, timeout=None)
+
+
+def get_role_ids(user):
+    role_ids = getattr(user, "role_ids", None)
+    if role_ids is None:
+        role_ids = CustomUser.role.through.objects.filter(
+            customuser_id=user.pk
+        ).values_list("role_id", flat=True)
+    return sorted(role_ids)
+
+
+def compile_permission_mask(role_ids, index):
+    """OR the permissions granted by ``role_ids`` into one bitset over ``index``'s positions."""
+
+    mask = 0
+    for permission_id in Role.permissions.through.objects.filter(
+        role_id__in=role_ids
+    ).values_list("permission_id", flat=True):
+        position = index.positions.get(permission_id)
+        if position is not None:
+            mask |= 1 << position
+    return mask
+
+
+def user_permission_mask(user, index):
+    """Return the user's effective permission bitset over ``index``'s positions.
+
+    The result is cached under a key built from the index generation, the
+    user's roles and their current versions, so changing a role's permissions
+    only needs to bump that role's version.
+    """
+
+    role_ids = get_role_ids(user)
+    if not role_ids:
+        return 0
+
+    version_keys = [ROLE_VERSION_KEY.format(role_id) for role_id in role_ids]
+    versions = cache.get_many(version_keys)
+    digest = hashlib.sha1(
+        ",".join(
+            [str(index.generation)]
+            + [
+                f"{role_id}.{versions.get(key, 0)}"
+                for role_id, key in zip(role_ids, version_keys)
+            ]
+        ).encode()
+    ).hexdigest()
+    key = USER_PERMISSIONS_KEY.format(user.pk, digest)
+    mask = cache.get(key)
+    if mask is None:
+        mask = compile_permission_mask(role_ids, index)
+        cache.set(key, mask, timeout=settings.PERMISSION_CACHE_TTL)
+    return mask
+
+
+def has_module_permission(user, module, permission):
+    index = permission_index()
+    position = index.bits.get((module.lower(), permission.lower()))
+    if position is None:
+        return False
+    return bool(user_permission_mask(user, index) >> position & 1)
+
+
+def replace_through_rows(through, owner_field, target_field, assignments):
+    """Make the ``through`` rows for each owner match ``assignments`` exactly.
+
+    ``assignments`` maps owner ids to the set of target ids they should have.
+    Owners are handled ``RBAC_BULK_BATCH_SIZE`` at a time: one query reads the
+    current rows, one ``bulk_create`` adds the missing pairs and one filtered
+    delete drops the rest. Run it inside a transaction. Returns
+    ``(added, removed, changed_owner_ids)``.
+    """
+
+    batch_size = settings.RBAC_BULK_BATCH_SIZE
+    owner_ids = list(assignments)
+    added = removed = 0
+    changed = set()
+    for start in range(0, len(owner_ids), batch_size):
+        end = start + batch_size
+        batch = owner_ids[start:end]
+        existing = set()
+        stale_ids = []
+        for row_id, owner_id, target_id in through.objects.filter(
+            **{f"{owner_field}__in": batch}
+        ).values_list("id", owner_field, target_field):
+            if target_id in assignments[owner_id]:
+                existing.add((owner_id, target_id))
+            else:
+                stale_ids.append(row_id)
+                changed.add(owner_id)
+
+        new_rows = []
+        for owner_id in batch:
+            for target_id in assignments[owner_id]:
+                if (owner_id, target_id) not in existing:
+                    new_rows.append(
+                        through(**{owner_field: owner_id, target_field: target_id})
+                    )
+                    changed.add(owner_id)
+        through.objects.bulk_create(new_rows, ignore_conflicts=True)
+        if stale_ids:
+            through.objects.filter(id__in=stale_ids).delete()
+        added += len(new_rows)
+        removed += len(stale_ids)
+    return added, removed, changed
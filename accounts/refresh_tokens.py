@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+from rest_framework_simplejwt.tokens import BlacklistMixin, RefreshToken
+from rest_framework_simplejwt.utils import datetime_from_epoch
+from accounts.models import RefreshTokenRecord
+
+
+class RotatingRefreshToken(RefreshToken):
+    """Refresh token whose outstanding and rotated state lives in ``RefreshTokenRecord``.
+
+    Replaces the ``token_blacklist`` app's OutstandingToken/BlacklistedToken
+    pair, which stores the full token text and is never flushed. Every check
+    is a probe on the unique ``jti`` index.
+    """
+
+    @classmethod
+    def for_user(cls, user):
+        # Skip BlacklistMixin.for_user, which writes an OutstandingToken row.
+        token = super(BlacklistMixin, cls).for_user(user)
+        token.record(user_id=user.pk)
+        return token
+
+    def record(self, user_id=None, revoked_at=None):
+        expires_at = datetime_from_epoch(self.payload["exp"])
+        RefreshTokenRecord.objects.create(
+            jti=self.payload[api_settings.JTI_CLAIM],
+            user_id=user_id or self.payload.get(api_settings.USER_ID_CLAIM),
+            expires_at=expires_at,
+            expires_day=expires_at.date(),
+            revoked_at=revoked_at,
+        )
+
+    def check_blacklist(self):
+        if RefreshTokenRecord.objects.filter(
+            jti=self.payload[api_settings.JTI_CLAIM], revoked_at__isnull=False
+        ).exists():
+            raise TokenError(_("Token is blacklisted"))
+
+    def blacklist(self):
+        """Mark this token as used in a single conditional UPDATE.
+
+        Raises ``TokenError`` if another request rotated it first, so a refresh
+        token can only ever be exchanged once.
+        """
+
+        now = timezone.now()
+        jti = self.payload[api_settings.JTI_CLAIM]
+        if RefreshTokenRecord.objects.filter(jti=jti, revoked_at__isnull=True).update(
+            revoked_at=now
+        ):
+            return
+
+        if RefreshTokenRecord.objects.filter(jti=jti).exists():
+            raise TokenError(_("Token is blacklisted"))
+        # Issued before this store existed: track it from now on as revoked.
+        self.record(revoked_at=now)
+
+
+def prune_refresh_tokens(batch_size=None):
+    """Delete refresh token records from past expiry days, ``batch_size`` rows per query.
+
+    Also flushes expired rows left in the ``token_blacklist`` tables by tokens
+    issued before ``RotatingRefreshToken`` was in use. Returns the number of
+    rows removed.
+    """
+
+    batch_size = batch_size or settings.TOKEN_BLACKLIST_PRUNE_BATCH_SIZE
+    deleted = 0
+    for model, expired in (
+        (RefreshTokenRecord, Q(expires_day__lt=timezone.now().date())),
+        (OutstandingToken, Q(expires_at__lte=timezone.now())),
+    ):
+        queryset = model.objects.filter(expired).order_by()
+        while True:
+            ids = list(queryset.values_list("id", flat=True)[:batch_size])
+            if not ids:
+                break
+            deleted += model.objects.filter(id__in=ids).delete()[0]
+    return deleted
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+from datetime import datetime, timezone
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone as django_timezone
+from accounts.models import BlacklistedToken
+
+REVOCATION_VERSION_KEY = "accounts:revocation:version"
+
+
+class RevocationCache:
+    """Per-process mirror of the ``BlacklistedToken`` table.
+
+    Lookups are answered from an in-memory map of revoked ``jti`` to expiry,
+    so tokens that were never revoked are accepted without a database query.
+    The map is synced incrementally (only rows past the last seen id) whenever
+    the shared revocation version in the cache backend changes, and at the
+    latest every ``TOKEN_REVOCATION_REFRESH_INTERVAL`` seconds, which bounds
+    how long a token revoked on another worker can still be used here.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._revoked = {}
+        self._high_water = 0
+        self._version = None
+        self._next_refresh = 0.0
+
+    def is_revoked(self, jti):
+        self.refresh_if_stale()
+        return jti in self._revoked
+
+    def revoke(self, jti, exp):
+        expires_at = datetime.fromtimestamp(exp, tz=timezone.utc)
+        BlacklistedToken.objects.get_or_create(
+            jti=jti, defaults={"expires_at": expires_at}
+        )
+        self._revoked[jti] = exp
+        self.bump_version()
+
+    def bump_version(self):
+        cache.add(REVOCATION_VERSION_KEY, 0, timeout=None)
+        try:
+            cache.incr(REVOCATION_VERSION_KEY)
+        except ValueError:
+            cache.set(REVOCATION_VERSION_KEY, 1, timeout=None)
+
+    def refresh_if_stale(self):
+        version = cache.get(REVOCATION_VERSION_KEY)
+        if version == self._version and time.monotonic() < self._next_refresh:
+            return
+        self.refresh(version)
+
+    def refresh(self, version=None):
+        with self._lock:
+            now = django_timezone.now()
+            # Re-read a small window below the high-water mark so rows whose
+            # transactions committed out of id order are not missed.
+            start = max(self._high_water - settings.TOKEN_REVOCATION_OVERLAP, 0)
+            rows = (
+                BlacklistedToken.objects.filter(id__gt=start, expires_at__gt=now)
+                .order_by()
+                .values_list("id", "jti", "expires_at")
+                .iterator(chunk_size=2000)
+            )
+            for row_id, jti, expires_at in rows:
+                self._revoked[jti] = expires_at.timestamp()
+                if row_id > self._high_water:
+                    self._high_water = row_id
+
+            # Expired tokens fail signature validation anyway, so stop tracking them.
+            cutoff = now.timestamp()
+            self._revoked = {
+                jti: exp for jti, exp in self._revoked.items() if exp > cutoff
+            }
+
+            self._version = version
+            self._next_refresh = (
+                time.monotonic() + settings.TOKEN_REVOCATION_REFRESH_INTERVAL
+            )
+
+    def reset(self):
+        with self._lock:
+            self._revoked = {}
+            self._high_water = 0
+            self._version = None
+            self._next_refresh = 0.0
+
+
+def prune_expired_tokens(batch_size=None):
+    """Delete blacklist rows whose token has expired, ``batch_size`` rows per query.
+
+    Returns the number of rows removed.
+    """
+
+    batch_size = batch_size or settings.TOKEN_BLACKLIST_PRUNE_BATCH_SIZE
+    expired = BlacklistedToken.objects.filter(
+        expires_at__lte=django_timezone.now()
+    ).order_by()
+    deleted = 0
+    while True:
+        ids = list(expired.values_list("id", flat=True)[:batch_size])
+        if not ids:
+            return deleted
+        deleted += BlacklistedToken.objects.filter(id__in=ids).delete()[0]
+
+
+revocation_cache = RevocationCache()
@@ -1,19 +1,70 @@
 # -*- coding: utf-8 -*-
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.serializers import (
+    TokenObtainPairSerializer,
+    TokenRefreshSerializer,
+)
+from rest_framework_simplejwt.settings import api_settings
+import csv
 from rest_framework import serializers
-from accounts.models import CustomUser, Role, Permission, Module
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from accounts.models import CustomUser, InviteJob, Role, Permission, Module
 from accounts.services import AccountService
+from accounts.refresh_tokens import RotatingRefreshToken
+from utils.compiled_serializers import compiled
+from utils.history import historical_models
 from utils.serializers import CustomBaseModelSerializer, CustomBaseSerializer
 from utils.validators import custom_password_validator
 from drf_api_logger.models import APILogsModel  # This is the model created by drf-api-logger
 
 class RegularTokenObtainPairSerializer(TokenObtainPairSerializer):
+    token_class = RotatingRefreshToken
+
     @classmethod
     def get_token(cls, user):
         token = super().get_token(user)
+        token[settings.SESSION_VERSION_CLAIM] = user.session_version
         return token
 
 
+class RegularTokenRefreshSerializer(TokenRefreshSerializer):
+    token_class = RotatingRefreshToken
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs["refresh"])
+
+        data = {"access": str(refresh.access_token)}
+
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            if api_settings.BLACKLIST_AFTER_ROTATION:
+                refresh.blacklist()
+
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            refresh.record()
+
+            data["refresh"] = str(refresh)
+
+        return data
+
+
+def validate_new_password(data):
+    """Apply the password rules to ``data["password"]`` and check ``password2`` matches it."""
+
+    if data["email"] == data["password"]:
+        raise serializers.ValidationError("Password can not be same as email")
+    if not custom_password_validator(data["password"]):
+        raise serializers.ValidationError(
+            "Length must be between 8 to 15 characters, should not contain more than 3 "
+            "repeated characters consecutively, and at least contains one uppercase, lowercase and "
+            "special characters."
+        )
+    if data["password"] != data["password2"]:
+        raise serializers.ValidationError({"password": "Passwords must match."})
+    return data
+
+
 class CustomUserCreateSerializer(CustomBaseModelSerializer):
     password = serializers.CharField(write_only=True)
     password2 = serializers.CharField(write_only=True)
@@ -23,17 +74,7 @@ class CustomUserCreateSerializer(CustomBaseModelSerializer):
         fields = ["email", "password", "password2", "first_name", "last_name", "gender"]
 
     def validate(self, data):
-        if data["email"] == data["password"]:
-            raise serializers.ValidationError("Password can not be same as email")
-        if not custom_password_validator(data["password"]):
-            raise serializers.ValidationError(
-                "Length must be between 8 to 15 characters, should not contain more than 3 "
-                "repeated characters consecutively, and at least contains one uppercase, lowercase and "
-                "special characters."
-            )
-        if data["password"] != data["password2"]:
-            raise serializers.ValidationError({"password": "Passwords must match."})
-        return data
+        return validate_new_password(data)
 
     def create(self, validated_data):
         user = CustomUser(
@@ -51,7 +92,7 @@ class CustomUserCreateSerializer(CustomBaseModelSerializer):
 
 
 class CheckOTPSerializer(CustomBaseSerializer):
-    otp = serializers.CharField(required=True)
+    otp = serializers.RegexField(r"^[0-9]+$", required=True)
     email = serializers.CharField(required=True)
     token = serializers.UUIDField(required=True)
 
@@ -61,11 +102,65 @@ class ResendOTPSerializer(CustomBaseSerializer):
     token = serializers.UUIDField(required=True)
 
 
+class AcceptInviteSerializer(CustomBaseSerializer):
+    email = serializers.EmailField(required=True)
+    token = serializers.UUIDField(required=True)
+    password = serializers.CharField(write_only=True)
+    password2 = serializers.CharField(write_only=True)
+
+    def validate(self, data):
+        return validate_new_password(data)
+
+
+class BulkInviteSerializer(CustomBaseSerializer):
+    users = serializers.ListField(child=serializers.DictField(), required=False)
+    file = serializers.FileField(required=False)
+    roles = serializers.PrimaryKeyRelatedField(
+        many=True, queryset=Role.objects.all(), required=False
+    )
+
+    def validate(self, data):
+        if ("users" in data) == ("file" in data):
+            raise serializers.ValidationError(
+                "Provide either a users list or a CSV file."
+            )
+        if "file" in data:
+            try:
+                lines = data.pop("file").read().decode("utf-8-sig").splitlines()
+                data["users"] = list(csv.DictReader(lines))
+            except (UnicodeDecodeError, csv.Error):
+                raise serializers.ValidationError({"file": "Invalid CSV file."})
+        if not data["users"]:
+            raise serializers.ValidationError({"users": "No users to invite."})
+        if len(data["users"]) > settings.INVITE_MAX_ROWS:
+            raise serializers.ValidationError(
+                {"users": f"At most {settings.INVITE_MAX_ROWS} users per request."}
+            )
+        return data
+
+
+class InviteJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = InviteJob
+        fields = [
+            "id",
+            "status",
+            "total",
+            "processed",
+            "created",
+            "skipped",
+            "errors",
+            "created_at",
+            "updated_at",
+        ]
+
+
 class ProfileSerializer(CustomBaseModelSerializer):
     class Meta:
         model = CustomUser
         fields = ["email", "first_name", "last_name", "gender", "role"]
         read_only_fields = ["email"]
+        expandable_fields = {"role": "accounts.serializers.RoleSerializer"}
 
 
 class ErrorResponseSerializer(serializers.Serializer):
@@ -82,6 +177,7 @@ class ResendOTPResponseSerializer(serializers.Serializer):
     message = serializers.CharField()
 
 
+@compiled
 class ModuleSerializer(CustomBaseModelSerializer):
     class Meta:
         model = Module
@@ -89,6 +185,7 @@ class ModuleSerializer(CustomBaseModelSerializer):
         read_only_fields = ["id"]
 
 
+@compiled
 class PermissionSerializer(CustomBaseModelSerializer):
     module_name = serializers.CharField(source="module.name", read_only=True)
 
@@ -98,6 +195,7 @@ class PermissionSerializer(CustomBaseModelSerializer):
         read_only_fields = ["id"]
 
 
+@compiled
 class RoleSerializer(CustomBaseModelSerializer):
     permissions = PermissionSerializer(many=True, read_only=True)
     permissions_ids = serializers.PrimaryKeyRelatedField(
@@ -135,25 +233,174 @@ class UserRoleAssignmentSerializer(CustomBaseModelSerializer):
         return instance
 
 
+class UserRolesSerializer(CustomBaseSerializer):
+    user = serializers.IntegerField()
+    roles = serializers.ListField(child=serializers.IntegerField())
+
+
+class RolePermissionsSerializer(CustomBaseSerializer):
+    role = serializers.IntegerField()
+    permissions = serializers.ListField(child=serializers.IntegerField())
+
+
+class BulkAssignmentSerializer(CustomBaseSerializer):
+    """Validates a list of ``{owner: id, targets: [ids]}`` items into ``{owner_id: {target_ids}}``.
+
+    Ids are checked for existence with one query per model.
+    """
+
+    owner_model = None
+    target_model = None
+    owner_key = None
+    target_key = None
+
+    def validate_assignments(self, value):
+        assignments = {}
+        for item in value:
+            owner_id = item[self.owner_key]
+            if owner_id in assignments:
+                raise serializers.ValidationError(
+                    f"Duplicate {self.owner_key} {owner_id}."
+                )
+            assignments[owner_id] = set(item[self.target_key])
+
+        target_ids = set().union(*assignments.values())
+        for model, ids, key in (
+            (self.owner_model, set(assignments), self.owner_key),
+            (self.target_model, target_ids, self.target_key),
+        ):
+            missing = ids - set(
+                model.objects.filter(id__in=ids).values_list("id", flat=True)
+            )
+            if missing:
+                raise serializers.ValidationError(
+                    f"Invalid {key}: {', '.join(map(str, sorted(missing)))}."
+                )
+        return assignments
+
+
+class BulkUserRoleAssignmentSerializer(BulkAssignmentSerializer):
+    assignments = serializers.ListField(
+        child=UserRolesSerializer(),
+        allow_empty=False,
+        max_length=settings.RBAC_BULK_MAX_ITEMS,
+    )
+
+    owner_model = CustomUser
+    target_model = Role
+    owner_key = "user"
+    target_key = "roles"
+
+
+class BulkRolePermissionAssignmentSerializer(BulkAssignmentSerializer):
+    assignments = serializers.ListField(
+        child=RolePermissionsSerializer(),
+        allow_empty=False,
+        max_length=settings.RBAC_BULK_MAX_ITEMS,
+    )
+
+    owner_model = Role
+    target_model = Permission
+    owner_key = "role"
+    target_key = "permissions"
+
+
+class BulkAssignmentResponseSerializer(serializers.Serializer):
+    added = serializers.IntegerField()
+    removed = serializers.IntegerField()
+
+
 class UserRoleSerializer(CustomBaseModelSerializer):
     class Meta:
         model = Role
         fields = ["id", "name"]
 
 
+@compiled
 class UserListSerializer(CustomBaseModelSerializer):
     roles = UserRoleSerializer(many=True, read_only=True, source="role")
 
     class Meta:
         model = CustomUser
         fields = ["id", "email", "first_name", "last_name", "roles"]
+        expandable_fields = {"roles": RoleSerializer}
 
+@compiled
 class APILogSerializer(serializers.ModelSerializer):
     class Meta:
         model = APILogsModel
         fields = '__all__'
 
-class HistoryDataSerializer(CustomBaseModelSerializer):
-    class Meta:
-        model = APILogsModel
-        fields = '__all__'
\ No newline at end of file
+class HistoryModelField(serializers.CharField):
+    """Accepts a tracked model name and returns its historical model."""
+
+    def to_internal_value(self, data):
+        name = super().to_internal_value(data)
+        history_model = historical_models().get(name.lower())
+        if history_model is None:
+            raise serializers.ValidationError(f"Unknown model '{name}'.")
+        return history_model
+
+
+def tracked_pk(history_model, value):
+    """Convert ``value`` with the tracked model's pk field, as a serializer error if it does not fit."""
+
+    try:
+        return history_model.instance_type._meta.pk.to_python(value)
+    except DjangoValidationError as error:
+        raise serializers.ValidationError(error.messages)
+
+
+class HistoryQuerySerializer(serializers.Serializer):
+    model = HistoryModelField(help_text="Tracked model name, e.g. `role`.")
+    since = serializers.DateTimeField(required=False)
+    until = serializers.DateTimeField(required=False)
+    after = serializers.IntegerField(
+        required=False, min_value=0, help_text="Last `history_id` already received."
+    )
+    object_id = serializers.CharField(required=False)
+    limit = serializers.IntegerField(
+        required=False,
+        min_value=1,
+        max_value=settings.HISTORY_MAX_PAGE_SIZE,
+        default=settings.HISTORY_PAGE_SIZE,
+    )
+
+    def validate(self, data):
+        if "object_id" in data:
+            try:
+                data["object_id"] = tracked_pk(data["model"], data["object_id"])
+            except serializers.ValidationError as error:
+                raise serializers.ValidationError({"object_id": error.detail})
+        return data
+
+
+class HistoryAsOfQuerySerializer(serializers.Serializer):
+    model = HistoryModelField(help_text="Tracked model name, e.g. `role`.")
+    at = serializers.DateTimeField(help_text="Moment to reconstruct.")
+    object_ids = serializers.ListField(
+        child=serializers.CharField(),
+        required=False,
+        max_length=settings.HISTORY_MAX_PAGE_SIZE,
+        help_text="Only these objects; repeat the parameter for several.",
+    )
+    after = serializers.IntegerField(
+        required=False, help_text="Last object id already received."
+    )
+    limit = serializers.IntegerField(
+        required=False,
+        min_value=1,
+        max_value=settings.HISTORY_MAX_PAGE_SIZE,
+        default=settings.HISTORY_PAGE_SIZE,
+    )
+
+    def validate(self, data):
+        if "object_ids" in data:
+            try:
+                data["object_ids"] = [
+                    tracked_pk(data["model"], object_id)
+                    for object_id in data["object_ids"]
+                ]
+            except serializers.ValidationError as error:
+                raise serializers.ValidationError({"object_ids": error.detail})
+        return data
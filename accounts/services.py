@@ -1,13 +1,13 @@
 # -*- coding: utf-8 -*-
 from django.conf import settings
-from accounts.models import EmailOtp, CustomUser
-from utils.util import generate_otp
+from accounts.models import CustomUser, Role
+from accounts.otp import otp_store
+from accounts.rbac import bump_role_versions, replace_through_rows
+from accounts.signals import user_roles_changed
+from utils.versions import bump_versions, model_scope
 from utils.email import otp_email
 from utils.error import APIError, Error
-from datetime import timedelta
-from django.utils import timezone
 from utils.enums import Enums
-from notifications.common import create_notification
 
 
 class AccountService:
@@ -21,10 +21,8 @@ class AccountService:
             stage = Enums.SIGN_UP.value
             event_msg = Enums.SIGN_UP_OTP_EMAIL.value
 
-        otp = EmailOtp(email=user.email, otp=generate_otp(), stage=stage)
-        otp.save()
-        otp_email(user.first_name, user.email, otp.otp)
-        create_notification(user.email, Enums.EMAIL.value, event_msg)
+        otp = otp_store.issue(user.email, stage)
+        otp_email(user.first_name, user.email, otp, event=event_msg)
 
         data["message"] = "OTP has been sent to your registered account"
         data["otp_time"] = settings.RESEND_OTP_TIME
@@ -49,28 +47,7 @@ class AccountService:
             stage = Enums.LOGIN.value
         else:
             stage = Enums.SIGN_UP.value
-        expiration_period = timedelta(seconds=int(settings.RESEND_OTP_TIME))
-        otp_obj = (
-            EmailOtp.objects.filter(
-                otp=data["otp"],
-                email=data["email"].lower(),
-                is_valid=False,
-                stage=stage,
-            )
-            .order_by("created_at")
-            .first()
-        )
-
-        if not otp_obj:
-            raise APIError(
-                Error.DEFAULT_ERROR, extra=["The information provided is incorrect"]
-            )
-
-        if otp_obj.created_at < (timezone.now() - expiration_period):
-            raise APIError(Error.DEFAULT_ERROR, extra=["OTP has been Expired"])
-
-        otp_obj.is_valid = True
-        otp_obj.save()
+        otp_store.verify(data["email"], stage, data["otp"])
 
     @staticmethod
     def resend_OTP(data):
@@ -88,7 +65,28 @@ class AccountService:
         else:
             stage = Enums.SIGN_UP.value
 
-        otp = EmailOtp(email=user.email, otp=generate_otp(), stage=stage)
-        otp.save()
-        otp_email(user.first_name, user.email, otp.otp)
-        create_notification(user.email, Enums.EMAIL.value, Enums.RESEND_OTP_EMAIL.value)
+        otp = otp_store.issue(user.email, stage)
+        otp_email(user.first_name, user.email, otp, event=Enums.RESEND_OTP_EMAIL.value)
+
+    @staticmethod
+    def bulk_assign_user_roles(assignments):
+        """Replace the roles of many users at once; ``assignments`` maps user ids to role ids."""
+
+        added, removed, changed = replace_through_rows(
+            CustomUser.role.through, "customuser_id", "role_id", assignments
+        )
+        if changed:
+            user_roles_changed(list(changed))
+        return {"added": added, "removed": removed}
+
+    @staticmethod
+    def bulk_assign_role_permissions(assignments):
+        """Replace the permissions of many roles at once; ``assignments`` maps role ids to permission ids."""
+
+        added, removed, changed = replace_through_rows(
+            Role.permissions.through, "role_id", "permission_id", assignments
+        )
+        if changed:
+            bump_role_versions(changed)
+            bump_versions([model_scope(Role)])
+        return {"added": added, "removed": removed}
@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+from django.db.models import F
+from accounts.models import CustomUser
+from accounts.principals import invalidate_user_principals
+
+
+def bump_session_versions(user_ids):
+    """Invalidate every token issued so far to ``user_ids``.
+
+    Only enforced when ``TOKEN_SESSION_VERSIONING`` is on: access tokens carry
+    the user's ``session_version`` at issue time and ``CustomAuthentication``
+    rejects tokens whose version no longer matches. The cached principals are
+    dropped again when the transaction commits, so the bump takes effect
+    everywhere then, or within ``AUTH_USER_LOCAL_CACHE_TTL`` on a
+    process-local cache.
+    """
+
+    user_ids = list(user_ids)
+    if not user_ids:
+        return
+    CustomUser.objects.filter(pk__in=user_ids).update(
+        session_version=F("session_version") + 1
+    )
+    invalidate_user_principals(user_ids)
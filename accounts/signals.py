@@ -1,9 +1,15 @@
 # -*- coding: utf-8 -*-
 from django_rest_passwordreset.signals import reset_password_token_created
 from django.dispatch import receiver
+from django.db.models.signals import post_save, post_delete, pre_delete, m2m_changed
+from accounts.models import CustomUser, Module, Permission, Role
+from accounts.principals import invalidate_user_principals
+from accounts.rbac import bump_role_versions, invalidate_permission_index
+from accounts.sessions import bump_session_versions
+from django.conf import settings
 from utils.enums import Enums
-from notifications.common import create_notification
 from utils.email import reset_password_email
+from utils.versions import bump_versions, model_scope
 
 
 @receiver(reset_password_token_created)
@@ -19,9 +25,124 @@ def password_reset_token_created(
         reset_password_token.user.first_name,
         reset_password_token.user.email,
         reset_password_url,
+        event=Enums.RESET_PASSWORD_EMAIL.value,
     )
-    create_notification(
-        email=reset_password_token.user.email,
-        event_type=Enums.EMAIL.value,
-        message=Enums.RESET_PASSWORD_EMAIL.value,
-    )
+
+
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+def invalidate_user_principal(sender, instance, **kwargs):
+    """
+    Drop the cached principal whenever the user row changes.
+    """
+
+    invalidate_user_principals([instance.pk])
+
+
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+def bump_user_version(sender, instance, **kwargs):
+    """
+    Make the ETag of the user's profile stale.
+    """
+
+    bump_versions([model_scope(CustomUser, instance.pk)])
+
+
+def user_roles_changed(user_ids):
+    """
+    Role changes end existing sessions when session versioning is on; otherwise only
+    the cached principals are refreshed. Either way the users' profile ETags go stale.
+    """
+
+    bump_versions([model_scope(CustomUser, user_id) for user_id in user_ids])
+    if settings.TOKEN_SESSION_VERSIONING:
+        bump_session_versions(user_ids)
+    else:
+        invalidate_user_principals(user_ids)
+
+
+@receiver(m2m_changed, sender=CustomUser.role.through)
+def invalidate_user_principal_roles(
+    sender, instance, action, reverse, pk_set, **kwargs
+):
+    """
+    Handle role assignment changes made from either side of the relation.
+    """
+
+    if not reverse:
+        if action in ("post_add", "post_remove", "post_clear"):
+            user_roles_changed([instance.pk])
+    elif action == "pre_clear":
+        user_roles_changed(list(instance.users.values_list("id", flat=True)))
+    elif action in ("post_add", "post_remove") and pk_set:
+        user_roles_changed(pk_set)
+
+
+@receiver(pre_delete, sender=Role)
+def invalidate_role_users(sender, instance, **kwargs):
+    """
+    Handle users losing a role that is being deleted.
+    """
+
+    user_roles_changed(list(instance.users.values_list("id", flat=True)))
+
+
+@receiver(m2m_changed, sender=Role.permissions.through)
+def invalidate_role_permissions(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Recompile the permission sets of roles whose permissions change, from either side.
+    """
+
+    if not reverse:
+        if action in ("post_add", "post_remove", "post_clear"):
+            bump_role_versions([instance.pk])
+    elif action == "pre_clear":
+        bump_role_versions(list(instance.roles.values_list("id", flat=True)))
+    elif action in ("post_add", "post_remove") and pk_set:
+        bump_role_versions(pk_set)
+
+
+@receiver(pre_delete, sender=Permission)
+def invalidate_permission_roles(sender, instance, **kwargs):
+    """
+    Handle roles losing a permission that is being deleted.
+    """
+
+    bump_role_versions(list(instance.roles.values_list("id", flat=True)))
+
+
+@receiver(post_save, sender=Permission)
+@receiver(post_delete, sender=Permission)
+@receiver(post_save, sender=Module)
+@receiver(post_delete, sender=Module)
+def invalidate_permission_names(sender, **kwargs):
+    """
+    Rebuild the (module, permission) name lookup when either side is renamed or removed.
+    """
+
+    invalidate_permission_index()
+
+
+@receiver(post_save, sender=Module)
+@receiver(post_delete, sender=Module)
+@receiver(post_save, sender=Permission)
+@receiver(post_delete, sender=Permission)
+@receiver(post_save, sender=Role)
+@receiver(post_delete, sender=Role)
+def bump_model_version(sender, **kwargs):
+    """
+    Make the ETags of list responses that include the changed model stale.
+    """
+
+    bump_versions([model_scope(sender)])
+
+
+@receiver(m2m_changed, sender=Role.permissions.through)
+def bump_role_permissions_version(sender, action, **kwargs):
+    """
+    Role lists nest their permissions, so a change from either side makes them stale.
+    """
+
+    if action in ("post_add", "post_remove", "post_clear"):
+        bump_versions([model_scope(Role)])
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+import hashlib
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class SlidingWindowThrottle(SimpleRateThrottle):
+    """Sliding-window counter throttle backed by the Django cache.
+
+    Each identity has one counter per fixed window. A request is allowed while
+    ``previous * (1 - elapsed / duration) + current`` stays under the budget,
+    which approximates a true sliding window. A rejection costs one
+    ``get_many`` and no writes; an accepted request adds one ``incr``.
+
+    The budget is ``DEFAULT_THROTTLE_RATES[scope]``. Identities are the client
+    IP, as far as ``NUM_PROXIES`` lets it be trusted, or the request field
+    named by ``key_field`` when it is set. Counters must live in a cache every
+    worker shares; a process-local one multiplies each budget by the number
+    of workers.
+    """
+
+    key_field = None
+
+    def get_rate(self):
+        try:
+            return api_settings.DEFAULT_THROTTLE_RATES[self.scope]
+        except KeyError:
+            raise ImproperlyConfigured(
+                f"No default throttle rate set for '{self.scope}' scope"
+            )
+
+    def get_cache_key(self, request, view):
+        if self.key_field is None:
+            ident = self.get_ident(request)
+        else:
+            value = (
+                request.data.get(self.key_field)
+                if hasattr(request.data, "get")
+                else None
+            )
+            if not value:
+                return None
+            ident = hashlib.sha1(str(value).strip().lower().encode()).hexdigest()
+        return f"throttle:{self.scope}:{ident}"
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        key = self.get_cache_key(request, view)
+        if key is None:
+            return True
+
+        window, elapsed = divmod(self.timer(), self.duration)
+        current = f"{key}:{int(window)}"
+        previous = f"{key}:{int(window) - 1}"
+        counts = self.cache.get_many([previous, current])
+        weight = 1 - elapsed / self.duration
+        if (
+            counts.get(previous, 0) * weight + counts.get(current, 0)
+            >= self.num_requests
+        ):
+            self.remaining = self.duration - elapsed
+            return False
+
+        if not self.cache.add(current, 1, timeout=2 * self.duration):
+            try:
+                self.cache.incr(current)
+            except ValueError:
+                self.cache.set(current, 1, timeout=2 * self.duration)
+        return True
+
+    def wait(self):
+        return self.remaining
+
+
+class SignUpIPThrottle(SlidingWindowThrottle):
+    scope = "signup_ip"
+
+
+class SignUpEmailThrottle(SlidingWindowThrottle):
+    scope = "signup_email"
+    key_field = "email"
+
+
+class OtpIPThrottle(SlidingWindowThrottle):
+    scope = "otp_ip"
+
+
+class OtpEmailThrottle(SlidingWindowThrottle):
+    scope = "otp_email"
+    key_field = "email"
+
+
+class LoginIPThrottle(SlidingWindowThrottle):
+    scope = "login_ip"
+
+
+class LoginEmailThrottle(SlidingWindowThrottle):
+    scope = "login_email"
+    key_field = "email"
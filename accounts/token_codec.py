@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*-
+import threading
+import time
+from collections import OrderedDict
+from cryptography.fernet import Fernet, MultiFernet
+from django.conf import settings
+
+
+class TokenCodec:
+    """Encrypts access tokens into cookie values and verifies them back.
+
+    * The Fernet keys are built once. New cookies are encrypted with the first
+      key; any key in the list can decrypt, so a key can be rotated by putting
+      the new one first and keeping the old one until its cookies expire.
+    * Cookie values are the plain URL-safe Fernet token. Values in the older
+      ``b'...'`` repr form are still accepted and unwrapped without
+      ``ast.literal_eval``.
+    * A bounded LRU maps cookie values to the token already validated for
+      them, so repeat requests skip decryption and signature verification.
+      Entries are dropped once the token's ``exp`` has passed.
+    """
+
+    def __init__(self, keys, cache_size):
+        self._fernet = MultiFernet([Fernet(key) for key in keys])
+        self._cache_size = cache_size
+        self._verified = OrderedDict()
+        self._lock = threading.Lock()
+
+    def encode(self, token):
+        return self._fernet.encrypt(token.encode()).decode()
+
+    def decode(self, value):
+        if isinstance(value, bytes):
+            value = value.decode()
+        if value[:2] in ("b'", 'b"') and value[-1:] == value[1]:
+            value = value[2:-1]
+        return self._fernet.decrypt(value.encode()).decode()
+
+    def verify(self, value, validate):
+        """Return ``validate(decode(value))``, reusing the result for repeat values.
+
+        Decryption errors propagate as ``cryptography.fernet.InvalidToken``.
+        """
+
+        if isinstance(value, bytes):
+            value = value.decode()
+        with self._lock:
+            cached = self._verified.get(value)
+            if cached is not None:
+                if cached["exp"] > time.time():
+                    self._verified.move_to_end(value)
+                    return cached
+                del self._verified[value]
+
+        validated_token = validate(self.decode(value))
+        with self._lock:
+            self._verified[value] = validated_token
+            if len(self._verified) > self._cache_size:
+                self._verified.popitem(last=False)
+        return validated_token
+
+    def clear(self):
+        with self._lock:
+            self._verified.clear()
+
+
+token_codec = TokenCodec(
+    [settings.HASHED_ACCESS_TOKEN_KEY, *settings.HASHED_ACCESS_TOKEN_PREVIOUS_KEYS],
+    cache_size=settings.ACCESS_TOKEN_CODEC_CACHE_SIZE,
+)
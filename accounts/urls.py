@@ -4,6 +4,7 @@ from accounts.views import (
     SignUpView,
     VerifyOtpView,
     ResendOTPView,
+    AcceptInviteView,
     ProfileView,
     ModuleListCreateView,
     ModuleDetailView,
@@ -15,12 +16,18 @@ from accounts.views import (
     UserListView,
     APILogsListView,
     HistoryDataListView,
+    HistoryAsOfView,
+    BulkInviteView,
+    InviteJobDetailView,
+    BulkUserRoleAssignmentView,
+    BulkRolePermissionAssignmentView,
 )
 
 urlpatterns = [
     path("signup/", SignUpView.as_view(), name="signup"),
     path("verify-otp/", VerifyOtpView.as_view(), name="verify-otp"),
     path("resend-otp/", ResendOTPView.as_view(), name="resend-otp"),
+    path("accept-invite/", AcceptInviteView.as_view(), name="accept-invite"),
     path("profile/<int:pk>/", ProfileView.as_view(), name="user-profile"),
     path("modules/", ModuleListCreateView.as_view(), name="module-list-create"),
     path("modules/<int:pk>/", ModuleDetailView.as_view(), name="module-detail"),
@@ -41,8 +48,24 @@ urlpatterns = [
         UserRoleAssignmentView.as_view(),
         name="user-role-assign-remove",
     ),
+    path(
+        "users/roles/bulk/",
+        BulkUserRoleAssignmentView.as_view(),
+        name="user-role-bulk-assign",
+    ),
+    path(
+        "roles/permissions/bulk/",
+        BulkRolePermissionAssignmentView.as_view(),
+        name="role-permission-bulk-assign",
+    ),
     path("users-with-roles/", UserListView.as_view(), name="user-list-with-roles"),
+    path("users/invite/", BulkInviteView.as_view(), name="user-invite"),
+    path(
+        "users/invite/<uuid:pk>/",
+        InviteJobDetailView.as_view(),
+        name="user-invite-job",
+    ),
     path("drf-api-logs/", APILogsListView.as_view(), name="api-logs-list"),
-    path("history-data/", HistoryDataListView.as_view(), name="history-data-list")
-    
+    path("history-data/", HistoryDataListView.as_view(), name="history-data-list"),
+    path("history-data/as-of/", HistoryAsOfView.as_view(), name="history-as-of"),
 ]
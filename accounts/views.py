@@ -4,10 +4,9 @@ from django.conf import settings
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework_simplejwt.views import TokenObtainPairView
-from cryptography.fernet import Fernet
 from rest_framework import generics
-from accounts.models import CustomUser, BlacklistedToken, Role, Permission, Module
-from rest_framework_simplejwt.tokens import RefreshToken
+from accounts.models import CustomUser, InviteJob, Role, Permission, Module
+from rest_framework_simplejwt.exceptions import TokenError, InvalidToken
 from django_rest_passwordreset.views import (
     ResetPasswordRequestToken,
     ResetPasswordConfirm,
@@ -16,6 +15,7 @@ from accounts.serializers import (
     RegularTokenObtainPairSerializer,
     CustomUserCreateSerializer,
     CheckOTPSerializer,
+    AcceptInviteSerializer,
     ResendOTPSerializer,
     ProfileSerializer,
     ErrorResponseSerializer,
@@ -26,29 +26,79 @@ from accounts.serializers import (
     RoleSerializer,
     UserRoleAssignmentSerializer,
     UserListSerializer,
-    HistoryDataSerializer,
+    HistoryQuerySerializer,
+    HistoryAsOfQuerySerializer,
+    BulkInviteSerializer,
+    InviteJobSerializer,
+    BulkUserRoleAssignmentSerializer,
+    BulkRolePermissionAssignmentSerializer,
+    BulkAssignmentResponseSerializer,
 )
 from accounts.services import AccountService
+from accounts.revocation import revocation_cache
+from accounts.principals import invalidate_user_principals
+from accounts.sessions import bump_session_versions
+from accounts.token_codec import token_codec
+from accounts.invites import accept_invite, invite_job_runner
+from accounts.throttling import (
+    LoginEmailThrottle,
+    LoginIPThrottle,
+    OtpEmailThrottle,
+    OtpIPThrottle,
+    SignUpEmailThrottle,
+    SignUpIPThrottle,
+)
+from utils.pagination import (
+    CURSOR_PARAMETERS,
+    FIELD_PARAMETERS,
+    KeysetCursorPagination,
+)
+from utils.serializers import requested_fields
+from utils.versions import model_scope
 from utils.util import response_data_formating
 from rest_framework.views import APIView
-import ast
-import jwt
+from rest_framework.parsers import JSONParser, MultiPartParser
 from rest_framework.permissions import IsAuthenticated
 from utils.error import APIError, Error
 from django.db import transaction
 from accounts.permissions import IsOwner
 from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
-from utils.decorators import require_json_content_type
+from utils.decorators import conditional_on_versions, require_json_content_type
 from django.utils.decorators import method_decorator
 from drf_api_logger.models import APILogsModel
 from .serializers import APILogSerializer
-from django.apps import apps
-from django.http import JsonResponse
+from rest_framework.renderers import JSONRenderer
+from utils.compiled_serializers import project
+from utils.history import history_as_of, history_rows
+from utils.renderers import (
+    NDJSONRenderer,
+    StreamingListMixin,
+    list_response,
+    streaming_rows_response,
+)
+
+
+# Version counters behind each cacheable read; any change to them changes the ETag.
+MODULE_LIST_SCOPES = [model_scope(Module)]
+PERMISSION_LIST_SCOPES = [model_scope(Permission), model_scope(Module)]
+ROLE_LIST_SCOPES = [model_scope(Role), model_scope(Permission), model_scope(Module)]
+
+
+def profile_scopes(request, pk):
+    """Version counters behind a profile read; ``None`` leaves non-owners to the 403."""
+
+    if request.user.pk != pk:
+        return None
+    scopes = [model_scope(CustomUser, pk)]
+    if request.query_params.get("expand"):
+        scopes += ROLE_LIST_SCOPES
+    return scopes
 
 
 class RegularTokenObtainPairView(TokenObtainPairView):
     authentication_classes = []
+    throttle_classes = [LoginIPThrottle, LoginEmailThrottle]
     serializer_class = RegularTokenObtainPairSerializer
     queryset = CustomUser.objects.all()
 
@@ -58,8 +108,8 @@ class RegularTokenObtainPairView(TokenObtainPairView):
         """Handle user login and token generation.
 
         This method overrides the default `post` method to:
-        1. Retrieve the user by their email.
-        2. Assign a new token to the user.
+        1. Authenticate the user, loading their 2FA role flag in the same query.
+        2. Assign a new token to the user with a single UPDATE.
         3. Check if the user has the 2FA role. If so, it sends an OTP email and returns the response.
         4. Encrypt the access token and store it in a secure HTTP-only cookie.
 
@@ -72,15 +122,23 @@ class RegularTokenObtainPairView(TokenObtainPairView):
             Response: The HTTP response with a JWT token or 2FA OTP data.
 
         Raises:
-            CustomUser.DoesNotExist: If the user with the given email does not exist.
+            AuthenticationFailed: If no active user matches the given credentials.
         """
 
-        response = super().post(request, *args, **kwargs)
-        user = CustomUser.objects.get(email=request.data["email"])
-        user.token = str(uuid.uuid4())
-        user.save()
-
-        if user.role.filter(name="2fa").exists():
+        serializer = self.get_serializer(data=request.data)
+        try:
+            serializer.is_valid(raise_exception=True)
+        except TokenError as error:
+            raise InvalidToken(error.args[0])
+        response = Response(serializer.validated_data, status=status.HTTP_200_OK)
+
+        # Rotate the login token with a targeted UPDATE: no full save and no history row.
+        user = serializer.user
+        user.token = uuid.uuid4()
+        CustomUser.objects.filter(pk=user.pk).update(token=user.token)
+        invalidate_user_principals([user.pk])
+
+        if user.has_2fa_role:
             data = AccountService.sendOTPEmail(user)
             data["token"] = user.token
             return Response(
@@ -88,8 +146,7 @@ class RegularTokenObtainPairView(TokenObtainPairView):
                 status=status.HTTP_200_OK,
             )
 
-        hashed_key = Fernet(settings.HASHED_ACCESS_TOKEN_KEY)
-        access_token = hashed_key.encrypt(response.data["access"].encode())
+        access_token = token_codec.encode(response.data["access"])
 
         if response.status_code == 200:
             response.set_cookie(
@@ -107,6 +164,7 @@ class RegularTokenObtainPairView(TokenObtainPairView):
 class SignUpView(generics.CreateAPIView):
     queryset = CustomUser.objects.all()
     serializer_class = CustomUserCreateSerializer
+    throttle_classes = [SignUpIPThrottle, SignUpEmailThrottle]
 
     @swagger_auto_schema(
         request_body=CustomUserCreateSerializer,
@@ -155,6 +213,22 @@ class SignUpView(generics.CreateAPIView):
 class LogoutView(APIView):
     permission_classes = [IsAuthenticated]
 
+    def logout_response(self):
+        response = Response(
+            response_data_formating(
+                generalMessage="success",
+                data=["You have been Successfully logged out"],
+            )
+        )
+        response.set_cookie(
+            key=settings.SIMPLE_JWT["AUTH_COOKIE"],
+            expires="Thu, 01 Jan 1970 00:00:00 GMT",
+            secure=settings.SIMPLE_JWT["AUTH_COOKIE_SECURE"],
+            httponly=settings.SIMPLE_JWT["AUTH_COOKIE_HTTP_ONLY"],
+            samesite=settings.SIMPLE_JWT["AUTH_COOKIE_SAMESITE"],
+        )
+        return response
+
     @swagger_auto_schema(
         responses={
             200: openapi.Response("Successful logout"),
@@ -165,6 +239,9 @@ class LogoutView(APIView):
         """
         Handle the logout process by clearing the user's authentication cookie and blacklisting the JWT token.
 
+        With `TOKEN_SESSION_VERSIONING` enabled the user's session version is bumped instead,
+        which revokes every token issued to them without writing to the blacklist.
+
         Args:
             request (HttpRequest): The HTTP request object.
 
@@ -176,30 +253,49 @@ class LogoutView(APIView):
         """
 
         try:
-            response = Response(
-                response_data_formating(
-                    generalMessage="success",
-                    data=["You have been Successfully logged out"],
+            response = self.logout_response()
+            if settings.TOKEN_SESSION_VERSIONING:
+                bump_session_versions([request.user.pk])
+            else:
+                revocation_cache.revoke(
+                    request.auth[settings.SIMPLE_JWT["JTI_CLAIM"]], request.auth["exp"]
                 )
-            )
-            response.set_cookie(
-                key=settings.SIMPLE_JWT["AUTH_COOKIE"],
-                expires="Thu, 01 Jan 1970 00:00:00 GMT",
-                secure=settings.SIMPLE_JWT["AUTH_COOKIE_SECURE"],
-                httponly=settings.SIMPLE_JWT["AUTH_COOKIE_HTTP_ONLY"],
-                samesite=settings.SIMPLE_JWT["AUTH_COOKIE_SAMESITE"],
-            )
-
-            jwt_token = request.COOKIES.get("access")
-            hashed_key = Fernet(settings.HASHED_ACCESS_TOKEN_KEY)
-            hashed_token = hashed_key.decrypt(ast.literal_eval(jwt_token))
-            token = hashed_token.decode()
-            BlacklistedToken.objects.create(token=token)
             return response
         except Exception as error:
             raise APIError(Error.DEFAULT_ERROR, extra=[f"Invalid token {error}"])
 
 
+class LogoutAllView(LogoutView):
+    @swagger_auto_schema(
+        responses={
+            200: openapi.Response("Successful logout"),
+            400: openapi.Response("Error response", ErrorResponseSerializer),
+            401: openapi.Response("Unauthorized"),
+        }
+    )
+    def get(self, request):
+        """
+        Log the user out of every session by bumping their session version.
+
+        Args:
+            request (HttpRequest): The HTTP request object.
+
+        Returns:
+            Response: A success response confirming the logout process.
+
+        Raises:
+            APIError: If session versioning is not enabled.
+        """
+
+        if not settings.TOKEN_SESSION_VERSIONING:
+            raise APIError(
+                Error.DEFAULT_ERROR, extra=["Session versioning is not enabled"]
+            )
+
+        bump_session_versions([request.user.pk])
+        return self.logout_response()
+
+
 class VerifyOtpView(APIView):
     authentication_classes = []
 
@@ -242,10 +338,9 @@ class VerifyOtpView(APIView):
                 user.is_active = True
                 user.save()
 
-            refresh = RefreshToken.for_user(user)
+            refresh = RegularTokenObtainPairSerializer.get_token(user)
             access = str(refresh.access_token)
-            hashed_key = Fernet(settings.HASHED_ACCESS_TOKEN_KEY)
-            access_token = hashed_key.encrypt(access.encode())
+            access_token = token_codec.encode(access)
         else:
             return Response(
                 response_data_formating(
@@ -272,6 +367,7 @@ class VerifyOtpView(APIView):
 
 class ResendOTPView(APIView):
     authentication_classes = []
+    throttle_classes = [OtpIPThrottle, OtpEmailThrottle]
 
     @swagger_auto_schema(
         request_body=ResendOTPSerializer,
@@ -311,22 +407,71 @@ class ResendOTPView(APIView):
         )
 
 
+class AcceptInviteView(APIView):
+    authentication_classes = []
+    throttle_classes = [OtpIPThrottle, OtpEmailThrottle]
+
+    @swagger_auto_schema(
+        request_body=AcceptInviteSerializer,
+        responses={
+            200: openapi.Response("Successful response"),
+            400: openapi.Response("Error response", ErrorResponseSerializer),
+        },
+    )
+    @transaction.atomic
+    @method_decorator(require_json_content_type)
+    def post(self, request):
+        """
+        Set an invited user's password and activate the account.
+
+        Args:
+            request (HttpRequest): The HTTP request object containing the email, the token
+            from the invite email and the new password twice.
+
+        Returns:
+            Response: A success response; the user can then log in with the new password.
+
+        Raises:
+            APIError: If the data is invalid or no pending invite matches the email and token.
+        """
+
+        serializer = AcceptInviteSerializer(data=request.data)
+        if not serializer.is_valid():
+            raise APIError(Error.DEFAULT_ERROR, extra=[serializer.errors])
+
+        data = serializer.validated_data
+        if accept_invite(data["email"], data["token"], data["password"]) is None:
+            raise APIError(Error.DEFAULT_ERROR, extra=["Invite not valid"])
+
+        return Response(
+            data=response_data_formating(
+                generalMessage="success",
+                data={"message": "Your password has been set, you can now log in"},
+            ),
+            status=status.HTTP_200_OK,
+        )
+
+
 class ProfileView(APIView):
     permission_classes = [IsOwner]
 
-    def get_object(self, pk):
+    def get_object(self, pk, queryset=None):
+        if queryset is None:
+            queryset = CustomUser.objects.all()
         try:
-            return CustomUser.objects.get(pk=pk)
+            return queryset.get(pk=pk)
         except CustomUser.DoesNotExist:
             raise APIError(Error.DEFAULT_ERROR, extra=["User not Exist"])
 
     @swagger_auto_schema(
+        manual_parameters=FIELD_PARAMETERS,
         responses={
             200: openapi.Response("Successful response", ProfileSerializer),
             400: openapi.Response("Error response", ErrorResponseSerializer),
             403: openapi.Response("Forbidden"),
-        }
+        },
     )
+    @method_decorator(conditional_on_versions(profile_scopes))
     def get(self, request, pk):
         """
         Retrieve the profile details of a user based on their ID (pk).
@@ -336,15 +481,18 @@ class ProfileView(APIView):
             pk (int): The primary key (ID) of the user whose profile is being requested.
 
         Returns:
-            Response: A success response containing the user's profile data.
+            Response: A success response containing the user's profile data, limited to
+            `fields` and with the `expand` fields nested.
 
         Raises:
             APIError: If the user does not exist or the requesting user does not have permission.
         """
 
-        user = self.get_object(pk)
+        options = requested_fields(request, ProfileSerializer)
+        users = ProfileSerializer(**options).narrow(CustomUser.objects.all())
+        user = self.get_object(pk, users)
         self.check_object_permissions(request, user)
-        serializer = ProfileSerializer(user)
+        serializer = ProfileSerializer(user, **options)
         return Response(
             response_data_formating(generalMessage="success", data=serializer.data),
             status=status.HTTP_200_OK,
@@ -416,11 +564,7 @@ class GetTokenDetailsView(APIView):
         """
 
         try:
-            jwt_token = request.COOKIES.get("access")
-            hashed_key = Fernet(settings.HASHED_ACCESS_TOKEN_KEY)
-            hashed_token = hashed_key.decrypt(ast.literal_eval(jwt_token))
-            token = hashed_token.decode()
-            payload = jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"])
+            payload = request.auth.payload
             data = response_data_formating(generalMessage="success", data=payload)
         except Exception:
             raise APIError(Error.DEFAULT_ERROR, extra=["Invalid or expired token"])
@@ -428,20 +572,22 @@ class GetTokenDetailsView(APIView):
         return Response(data=data, status=status.HTTP_200_OK)
 
 
-class ModuleListCreateView(generics.ListCreateAPIView):
+class ModuleListCreateView(StreamingListMixin, generics.ListCreateAPIView):
     permission_classes = [IsAuthenticated]
     queryset = Module.objects.all()
     serializer_class = ModuleSerializer
 
     @swagger_auto_schema(
+        manual_parameters=FIELD_PARAMETERS,
         responses={
             200: openapi.Response("Successful response", ModuleSerializer),
             400: openapi.Response("Error response", ErrorResponseSerializer),
         },
     )
+    @method_decorator(conditional_on_versions(MODULE_LIST_SCOPES))
     def get(self, request, *args, **kwargs):
         return super().get(request, *args, **kwargs)
-    
+
     @swagger_auto_schema(
         request_body=ModuleSerializer,
         responses={
@@ -492,17 +638,19 @@ class ModuleDetailView(generics.RetrieveUpdateDestroyAPIView):
         return super().delete(request, *args, **kwargs)
 
 
-class PermissionListCreateView(generics.ListCreateAPIView):
+class PermissionListCreateView(StreamingListMixin, generics.ListCreateAPIView):
     permission_classes = [IsAuthenticated]
     queryset = Permission.objects.all()
     serializer_class = PermissionSerializer
 
     @swagger_auto_schema(
+        manual_parameters=FIELD_PARAMETERS,
         responses={
             200: openapi.Response("Successful response", PermissionSerializer),
             400: openapi.Response("Error response", ErrorResponseSerializer),
         },
     )
+    @method_decorator(conditional_on_versions(PERMISSION_LIST_SCOPES))
     def get(self, request, *args, **kwargs):
         return super().get(request, *args, **kwargs)
 
@@ -556,17 +704,19 @@ class PermissionDetailView(generics.RetrieveUpdateDestroyAPIView):
         return super().delete(request, *args, **kwargs)
 
 
-class RoleListCreateView(generics.ListCreateAPIView):
+class RoleListCreateView(StreamingListMixin, generics.ListCreateAPIView):
     permission_classes = [IsAuthenticated]
     queryset = Role.objects.all()
     serializer_class = RoleSerializer
 
     @swagger_auto_schema(
+        manual_parameters=FIELD_PARAMETERS,
         responses={
             200: openapi.Response("Successful response", RoleSerializer),
             400: openapi.Response("Error response", ErrorResponseSerializer),
         },
     )
+    @method_decorator(conditional_on_versions(ROLE_LIST_SCOPES))
     def get(self, request, *args, **kwargs):
         return super().get(request, *args, **kwargs)
 
@@ -666,8 +816,93 @@ class UserRoleAssignmentView(APIView):
         )
 
 
+class BulkUserRoleAssignmentView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        request_body=BulkUserRoleAssignmentSerializer,
+        responses={
+            200: openapi.Response(
+                "Successful response", BulkAssignmentResponseSerializer
+            ),
+            400: openapi.Response("Error response", ErrorResponseSerializer),
+        },
+    )
+    @method_decorator(require_json_content_type)
+    @transaction.atomic
+    def put(self, request):
+        """
+        Replace the roles of many users in one call.
+
+        Args:
+            request (Request): The incoming HTTP request with `assignments`, a list of
+                `{"user": id, "roles": [ids]}` items.
+
+        Returns:
+            Response: The number of role assignments added and removed.
+        """
+
+        serializer = BulkUserRoleAssignmentSerializer(data=request.data)
+        if serializer.is_valid():
+            data = AccountService.bulk_assign_user_roles(
+                serializer.validated_data["assignments"]
+            )
+            return Response(
+                response_data_formating(generalMessage="success", data=data)
+            )
+        return Response(
+            response_data_formating(
+                generalMessage="error", data=None, error=serializer.errors
+            ),
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+
+class BulkRolePermissionAssignmentView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        request_body=BulkRolePermissionAssignmentSerializer,
+        responses={
+            200: openapi.Response(
+                "Successful response", BulkAssignmentResponseSerializer
+            ),
+            400: openapi.Response("Error response", ErrorResponseSerializer),
+        },
+    )
+    @method_decorator(require_json_content_type)
+    @transaction.atomic
+    def put(self, request):
+        """
+        Replace the permissions of many roles in one call.
+
+        Args:
+            request (Request): The incoming HTTP request with `assignments`, a list of
+                `{"role": id, "permissions": [ids]}` items.
+
+        Returns:
+            Response: The number of role permissions added and removed.
+        """
+
+        serializer = BulkRolePermissionAssignmentSerializer(data=request.data)
+        if serializer.is_valid():
+            data = AccountService.bulk_assign_role_permissions(
+                serializer.validated_data["assignments"]
+            )
+            return Response(
+                response_data_formating(generalMessage="success", data=data)
+            )
+        return Response(
+            response_data_formating(
+                generalMessage="error", data=None, error=serializer.errors
+            ),
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+
 class UserListView(APIView):
     @swagger_auto_schema(
+        manual_parameters=CURSOR_PARAMETERS + FIELD_PARAMETERS,
         responses={
             200: openapi.Response("Successful response", UserListSerializer),
             401: openapi.Response("Unauthorized"),
@@ -675,7 +910,7 @@ class UserListView(APIView):
     )
     def get(self, request):
         """
-        Retrieve all users with their associated roles.
+        Retrieve users with their associated roles, newest first, one page at a time.
 
         Args:
             request (Request): The incoming HTTP request.
@@ -684,10 +919,91 @@ class UserListView(APIView):
             Response: The HTTP response containing a list of users and their roles.
         """
 
-        users = CustomUser.objects.prefetch_related("role").all()
-        serializer = UserListSerializer(users, many=True)
+        options = requested_fields(request, UserListSerializer)
+        paginator = KeysetCursorPagination()
+        users = paginator.paginate_queryset(
+            project(CustomUser.objects.all(), UserListSerializer, **options),
+            request,
+            view=self,
+        )
+        return paginator.add_links(list_response(users, UserListSerializer, **options))
+
+
+class BulkInviteView(APIView):
+    permission_classes = [IsAuthenticated]
+    parser_classes = [JSONParser, MultiPartParser]
+
+    @swagger_auto_schema(
+        request_body=BulkInviteSerializer,
+        responses={
+            202: openapi.Response("Job accepted", InviteJobSerializer),
+            400: openapi.Response("Error response", ErrorResponseSerializer),
+            401: openapi.Response("Unauthorized"),
+        },
+    )
+    @transaction.atomic
+    def post(self, request):
+        """
+        Invite many users at once from a JSON `users` list or an uploaded CSV `file`.
+
+        Each row needs an `email` and may carry `first_name` and `last_name`. Users are
+        created inactive with an unusable password, given the listed `roles` and sent an
+        invite email. The work runs in the background; poll the returned job for progress.
+
+        Args:
+            request (Request): The incoming HTTP request.
+
+        Returns:
+            Response: A 202 response with the invite job and its progress counters.
+        """
+
+        serializer = BulkInviteSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        users = serializer.validated_data["users"]
+        job = InviteJob.objects.create(
+            created_by_id=request.user.pk,
+            roles=[role.pk for role in serializer.validated_data.get("roles", [])],
+            payload=users,
+            total=len(users),
+        )
+        invite_job_runner.submit(job.pk)
+        return Response(
+            response_data_formating(
+                generalMessage="success", data=InviteJobSerializer(job).data
+            ),
+            status=status.HTTP_202_ACCEPTED,
+        )
+
+
+class InviteJobDetailView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    @swagger_auto_schema(
+        responses={
+            200: openapi.Response("Successful response", InviteJobSerializer),
+            400: openapi.Response("Error response", ErrorResponseSerializer),
+            401: openapi.Response("Unauthorized"),
+        },
+    )
+    def get(self, request, pk):
+        """
+        Retrieve the progress of an invite job started by the requesting user.
+
+        Args:
+            request (Request): The incoming HTTP request.
+            pk (UUID): The invite job id.
+
+        Returns:
+            Response: The job status and its processed, created and skipped counters.
+        """
+
+        job = InviteJob.objects.filter(pk=pk, created_by_id=request.user.pk).first()
+        if job is None:
+            raise APIError(Error.DEFAULT_ERROR, extra=["Invite job not found"])
         return Response(
-            response_data_formating(generalMessage="success", data=serializer.data)
+            response_data_formating(
+                generalMessage="success", data=InviteJobSerializer(job).data
+            )
         )
 
 
@@ -704,10 +1020,11 @@ class CustomResetPasswordConfirmViewSet(ResetPasswordConfirm):
         response = super().post(request, *args, **kwargs)
         return response
 
-class APILogsListView(generics.ListAPIView):
+
+class APILogsListView(StreamingListMixin, generics.ListAPIView):
     permission_classes = [IsAuthenticated]
     serializer_class = APILogSerializer
-    queryset = APILogsModel.objects.all().order_by('-added_on')
+    queryset = APILogsModel.objects.order_by("-id")
 
     @swagger_auto_schema(
         responses={
@@ -725,45 +1042,75 @@ class APILogsListView(generics.ListAPIView):
         Returns:
             Response: The HTTP response containing a list of api logs.
         """
-        
+
         return super().get(request, *args, **kwargs)
-    
-class HistoryDataListView(generics.ListAPIView):
-    permission_class = [IsAuthenticated]
-    serializer_class = HistoryDataSerializer
+
+
+class HistoryDataListView(APIView):
+    permission_classes = [IsAuthenticated]
+    renderer_classes = [JSONRenderer, NDJSONRenderer]
 
     @swagger_auto_schema(
-        responses = {
-            200: openapi.Response("Successfull response", HistoryDataSerializer),
-            400: openapi.Response("Successfull response", ErrorResponseSerializer)
-        }
+        query_serializer=HistoryQuerySerializer,
+        responses={
+            200: openapi.Response("Successful response, streamed"),
+            400: openapi.Response("Error response", ErrorResponseSerializer),
+            401: openapi.Response("Unauthorized"),
+        },
     )
     def get(self, request, *args, **kwargs):
         """
-        Retrieve history of each model being used in the application.
+        Stream the history of one tracked model, oldest change first.
+
+        Rows come as a JSON array, or as newline-delimited JSON when the client sends
+        `Accept: application/x-ndjson`. At most `limit` rows are returned; to fetch the
+        next page pass the last `history_id` received as `after`. `since`/`until` bound
+        `history_date` and `object_id` narrows to one object.
 
         Args:
             request (Request): The incoming HTTP request.
 
         Returns:
-            Response: The HTTP response containing a dictionary with each key having list of its records.    
-        """
-        
-        # collect all models in the app
-        # check each model has historical records setting
-        # if yes fetch its historical data in a list
-
-        all_models = apps.get_models()
-        historical_data = {}
-        
-        for model in all_models:
-            model_name = model.__name__
-            if model_name.startswith("Historical"):
-                # Fetch all records for the historical model
-                records = model.objects.all().values()  # Retrieve records as dictionaries
-                # Strip "Historical" suffix from the model name and use as dictionary key
-                original_model_name = model_name.replace("Historical", "")
-                historical_data[original_model_name] = list(records)  # Convert QuerySet to list
-
-        # Return the dictionary as a JSON response (optional, for API)
-        return JsonResponse(historical_data, safe=False)
+            StreamingHttpResponse: The historical rows, written as they are read.
+        """
+
+        serializer = HistoryQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        query = dict(serializer.validated_data)
+        rows = history_rows(query.pop("model"), **query)
+        return streaming_rows_response(request, rows)
+
+
+class HistoryAsOfView(APIView):
+    permission_classes = [IsAuthenticated]
+    renderer_classes = [JSONRenderer, NDJSONRenderer]
+
+    @swagger_auto_schema(
+        query_serializer=HistoryAsOfQuerySerializer,
+        responses={
+            200: openapi.Response("Successful response, streamed"),
+            400: openapi.Response("Error response", ErrorResponseSerializer),
+            401: openapi.Response("Unauthorized"),
+        },
+    )
+    def get(self, request, *args, **kwargs):
+        """
+        Stream the state of a tracked model's objects as they were at `at`.
+
+        Each object is returned as its latest historical row up to `at`; objects that
+        did not exist then are left out. Pass `object_ids` to reconstruct only some
+        objects. Rows are ordered by object id, at most `limit` per response; pass the
+        last object id received as `after` to continue.
+
+        Args:
+            request (Request): The incoming HTTP request.
+
+        Returns:
+            StreamingHttpResponse: The historical rows, written as they are read.
+        """
+
+        serializer = HistoryAsOfQuerySerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        query = dict(serializer.validated_data)
+        rows = history_as_of(query.pop("model"), query.pop("at"), **query)
+        return streaming_rows_response(request, rows)
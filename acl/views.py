@@ -7,6 +7,7 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework import status
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
+from utils.pagination import CURSOR_PARAMETERS, KeysetCursorPagination
 from .models import Role, Permission, RolePermission
 from .serializers import RoleSerializer, PermissionSerializer, RolePermissionSerializer
 
@@ -15,13 +16,17 @@ class PermissionAPIView(APIView):
     permission_classes = [IsAuthenticated]
 
     @swagger_auto_schema(
-        operation_description="Get all permissions",
+        operation_description="Get a page of permissions, newest first",
+        manual_parameters=CURSOR_PARAMETERS,
         responses={200: PermissionSerializer(many=True)},
     )
     def get(self, request):
-        permissions = Permission.objects.all()
+        paginator = KeysetCursorPagination()
+        permissions = paginator.paginate_queryset(
+            Permission.objects.all(), request, view=self
+        )
         serializer = PermissionSerializer(permissions, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return paginator.add_links(Response(serializer.data, status=status.HTTP_200_OK))
 
     @swagger_auto_schema(
         operation_description="Create a new permission",
@@ -40,13 +45,15 @@ class RoleAPIView(APIView):
     permission_classes = [IsAuthenticated]
 
     @swagger_auto_schema(
-        operation_description="Get all roles",
+        operation_description="Get a page of roles, newest first",
+        manual_parameters=CURSOR_PARAMETERS,
         responses={200: RoleSerializer(many=True)},
     )
     def get(self, request):
-        roles = Role.objects.all()
+        paginator = KeysetCursorPagination()
+        roles = paginator.paginate_queryset(Role.objects.all(), request, view=self)
         serializer = RoleSerializer(roles, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return paginator.add_links(Response(serializer.data, status=status.HTTP_200_OK))
 
     @swagger_auto_schema(
         operation_description="Create a new role",
@@ -65,13 +72,17 @@ class RolePermissionAPIView(APIView):
     permission_classes = [IsAuthenticated]
 
     @swagger_auto_schema(
-        operation_description="Get all role permissions",
+        operation_description="Get a page of role permissions, newest first",
+        manual_parameters=CURSOR_PARAMETERS,
         responses={200: RolePermissionSerializer(many=True)},
     )
     def get(self, request):
-        role_permissions = RolePermission.objects.all()
+        paginator = KeysetCursorPagination()
+        role_permissions = paginator.paginate_queryset(
+            RolePermission.objects.all(), request, view=self
+        )
         serializer = RolePermissionSerializer(role_permissions, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return paginator.add_links(Response(serializer.data, status=status.HTTP_200_OK))
 
     @swagger_auto_schema(
         operation_description="Create a new role permission",
@@ -83,4 +94,4 @@ class RolePermissionAPIView(APIView):
         if serializer.is_valid():
             serializer.save()
             return Response(serializer.data, status=status.HTTP_201_CREATED)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
\ No newline at end of file
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -99,6 +99,10 @@ DATABASES = {
     }
 }
 
+# Cache shared by every worker, e.g. redis://host:6379/0. ETag version counters, cached
+# principals and throttle counters live here; the process-local default suits one process only.
+CACHES = {"default": env.cache("CACHE_URL", default="locmemcache://")}
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -176,6 +180,7 @@ SIMPLE_JWT = {
     "AUTH_COOKIE_HTTP_ONLY": True,
     "AUTH_COOKIE_PATH": "/",
     "AUTH_COOKIE_SAMESITE": "None",
+    "TOKEN_REFRESH_SERIALIZER": "accounts.serializers.RegularTokenRefreshSerializer",
 }
 
 REST_FRAMEWORK = {
@@ -185,15 +190,113 @@ REST_FRAMEWORK = {
     "DEFAULT_PERMISSION_CLASSES": [
         "rest_framework.permissions.AllowAny",
     ],
+    # Keyset pagination on -id; cursors are returned in the Link header
+    "DEFAULT_PAGINATION_CLASS": "utils.pagination.KeysetCursorPagination",
+    "PAGE_SIZE": env.int("API_PAGE_SIZE", default=50),
+    # Reverse proxies in front of the app. The client IP is taken from X-Forwarded-For only
+    # past that many hops, so clients cannot pick their own throttle identity.
+    "NUM_PROXIES": env.int("API_NUM_PROXIES", default=0),
+    # Per-endpoint budgets for accounts.throttling, keyed by client IP and by email
+    "DEFAULT_THROTTLE_RATES": {
+        "signup_ip": env("SIGNUP_IP_THROTTLE_RATE", default="30/hour"),
+        "signup_email": env("SIGNUP_EMAIL_THROTTLE_RATE", default="5/hour"),
+        "otp_ip": env("OTP_IP_THROTTLE_RATE", default="30/hour"),
+        "otp_email": env("OTP_EMAIL_THROTTLE_RATE", default="5/hour"),
+        "login_ip": env("LOGIN_IP_THROTTLE_RATE", default="60/min"),
+        "login_email": env("LOGIN_EMAIL_THROTTLE_RATE", default="10/min"),
+    },
 }
 
+# Largest page a client may ask for with ?page_size=
+API_MAX_PAGE_SIZE = env.int("API_MAX_PAGE_SIZE", default=200)
+# List responses longer than this many rows are serialized and streamed chunk by chunk
+API_STREAM_CHUNK_SIZE = env.int("API_STREAM_CHUNK_SIZE", default=100)
+# List endpoints serialize through the values() projection of serializers marked @compiled
+API_COMPILED_SERIALIZERS = env.bool("API_COMPILED_SERIALIZERS", default=True)
+
 EMAIL_BACKEND = "django.core.mail.backends.console.EmailBackend"
 
+# Outbound email is sent after commit by background workers that reuse SMTP connections.
+# 0 workers delivers inline in the on-commit callback instead.
+EMAIL_DISPATCHER_WORKERS = env.int("EMAIL_DISPATCHER_WORKERS", default=2)
+EMAIL_DISPATCHER_BATCH_SIZE = env.int("EMAIL_DISPATCHER_BATCH_SIZE", default=50)
+EMAIL_DISPATCHER_MAX_RETRIES = env.int("EMAIL_DISPATCHER_MAX_RETRIES", default=3)
+# Seconds before the first retry; doubles on every further attempt
+EMAIL_DISPATCHER_RETRY_BACKOFF = env.float(
+    "EMAIL_DISPATCHER_RETRY_BACKOFF", default=1.0
+)
+# Idle seconds after which a worker closes its SMTP connection
+EMAIL_DISPATCHER_IDLE_TIMEOUT = env.int("EMAIL_DISPATCHER_IDLE_TIMEOUT", default=30)
+# Seconds to wait for queued email on shutdown
+EMAIL_DISPATCHER_FLUSH_TIMEOUT = env.int("EMAIL_DISPATCHER_FLUSH_TIMEOUT", default=10)
+
+# Notification rows are bulk-written once this many are pending, or after the flush interval (seconds).
+NOTIFICATION_BUFFER_SIZE = env.int("NOTIFICATION_BUFFER_SIZE", default=100)
+NOTIFICATION_BUFFER_FLUSH_INTERVAL = env.float(
+    "NOTIFICATION_BUFFER_FLUSH_INTERVAL", default=2.0
+)
+
+# Bulk invites run in background threads, INVITE_BATCH_SIZE rows per transaction.
+# 0 workers runs the job inline after commit instead.
+INVITE_JOB_WORKERS = env.int("INVITE_JOB_WORKERS", default=2)
+INVITE_BATCH_SIZE = env.int("INVITE_BATCH_SIZE", default=500)
+INVITE_MAX_ROWS = env.int("INVITE_MAX_ROWS", default=10000)
+# Pending or running jobs not updated for this long (seconds) are failed by fail_stale_invite_jobs.
+INVITE_JOB_STALE_AFTER = env.int("INVITE_JOB_STALE_AFTER", default=3600)
+
 HASHED_ACCESS_TOKEN_KEY = env("HASHED_ACCESS_TOKEN_KEY")
+# Retired cookie keys that may still decrypt live cookies during a key rotation
+HASHED_ACCESS_TOKEN_PREVIOUS_KEYS = env.list(
+    "HASHED_ACCESS_TOKEN_PREVIOUS_KEYS", default=[]
+)
+# Number of already verified access cookies kept per process
+ACCESS_TOKEN_CODEC_CACHE_SIZE = env.int("ACCESS_TOKEN_CODEC_CACHE_SIZE", default=1024)
 
 RESEND_OTP_TIME = env("RESEND_OTP_TIME")
 
+# Upper bound (seconds) before a token revoked on another worker is rejected here
+TOKEN_REVOCATION_REFRESH_INTERVAL = env.int(
+    "TOKEN_REVOCATION_REFRESH_INTERVAL", default=5
+)
+TOKEN_REVOCATION_OVERLAP = env.int("TOKEN_REVOCATION_OVERLAP", default=1000)
+TOKEN_BLACKLIST_PRUNE_BATCH_SIZE = env.int(
+    "TOKEN_BLACKLIST_PRUNE_BATCH_SIZE", default=5000
+)
+
+# Seconds an authenticated user's principal stays cached between invalidations. Invalidations
+# reach other workers only through a shared CACHE_URL.
+AUTH_USER_CACHE_TTL = env.int("AUTH_USER_CACHE_TTL", default=300)
+# The same, while the cache is process-local: the bound on how long a deactivation or
+# session version bump on another worker goes unseen here
+AUTH_USER_LOCAL_CACHE_TTL = env.int("AUTH_USER_LOCAL_CACHE_TTL", default=5)
+# Seconds a user's compiled module permissions stay cached
+PERMISSION_CACHE_TTL = env.int("PERMISSION_CACHE_TTL", default=300)
+# Bulk role/permission assignment: items per request and owners per diff batch
+RBAC_BULK_MAX_ITEMS = env.int("RBAC_BULK_MAX_ITEMS", default=5000)
+RBAC_BULK_BATCH_SIZE = env.int("RBAC_BULK_BATCH_SIZE", default=500)
+
+# Historical rows recorded inside a transaction are bulk-written, one insert per model, when it commits.
+HISTORY_BUFFERING = env.bool("HISTORY_BUFFERING", default=True)
+# History API: rows fetched and written per chunk, and rows per page (default/maximum)
+HISTORY_STREAM_CHUNK_SIZE = env.int("HISTORY_STREAM_CHUNK_SIZE", default=2000)
+HISTORY_PAGE_SIZE = env.int("HISTORY_PAGE_SIZE", default=1000)
+HISTORY_MAX_PAGE_SIZE = env.int("HISTORY_MAX_PAGE_SIZE", default=10000)
+# `manage.py archive_history` moves history older than this into gzip NDJSON segments,
+# which history reads still include.
+HISTORY_ARCHIVE_DIR = env(
+    "HISTORY_ARCHIVE_DIR", default=str(BASE_DIR / "history_archive")
+)
+HISTORY_ARCHIVE_AFTER_DAYS = env.int("HISTORY_ARCHIVE_AFTER_DAYS", default=180)
+HISTORY_ARCHIVE_SEGMENT_ROWS = env.int("HISTORY_ARCHIVE_SEGMENT_ROWS", default=10000)
+
+# Opt-in: revoke by bumping CustomUser.session_version instead of blacklisting tokens.
+# Other workers see a bump as soon as it commits when CACHE_URL is shared, and within
+# AUTH_USER_LOCAL_CACHE_TTL seconds otherwise.
+TOKEN_SESSION_VERSIONING = env.bool("TOKEN_SESSION_VERSIONING", default=False)
+SESSION_VERSION_CLAIM = "sv"
+
 SWAGGER_SETTINGS = {
+    "DEFAULT_INFO": "backyard_boiler_plate.urls.api_info",
     "USE_SESSION_AUTH": False,
     "SECURITY_DEFINITIONS": {
         "Bearer": {
@@ -207,6 +310,10 @@ SWAGGER_SETTINGS = {
     ],
 }
 
+# OpenAPI schema written at deploy time by `manage.py generate_schema`, with .gz/.br variants
+# next to it. Without the file each process generates the schema once, on first request.
+API_SCHEMA_FILE = env("API_SCHEMA_FILE", default=str(BASE_DIR / "openapi.json"))
+
 DRF_API_LOGGER_DATABASE = True
 DRF_API_LOGGER_METHODS = ["POST", "DELETE", "PUT"]
 
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""
+Admin import of users with historical rows written one by one vs. buffered
+until the import transaction commits.
+
+Runs ``UserResource.import_data`` (what the admin's import action calls) on a
+fresh set of rows for each mode. Passwords are hashed with MD5 here so the
+timings show the write path rather than PBKDF2.
+
+    python -m benchmarks.bench_history_import --rows 10000
+"""
+import argparse
+import logging
+import time
+
+from benchmarks.harness import report, setup_django, test_database
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=10000)
+    args = parser.parse_args()
+
+    setup_django()
+
+    import tablib
+    from django.conf import settings
+    from django.db import connection
+    from accounts.admin import UserResource
+    from accounts.models import CustomUser
+
+    settings.PASSWORD_HASHERS = ["django.contrib.auth.hashers.MD5PasswordHasher"]
+    logging.disable(logging.CRITICAL)
+    history_table = CustomUser.history.model._meta.db_table
+    inserts = []
+
+    def count_history_inserts(execute, sql, params, many, context):
+        if sql.startswith(f'INSERT INTO "{history_table}"'):
+            inserts.append(sql)
+        return execute(sql, params, many, context)
+
+    with test_database():
+        rows = [("import", "history rows", "inserts", "seconds")]
+        for buffering in (False, True):
+            settings.HISTORY_BUFFERING = buffering
+            mode = "buffered" if buffering else "per row"
+            dataset = tablib.Dataset(headers=["email", "first_name", "password"])
+            for number in range(args.rows):
+                dataset.append((f"{mode[:3]}{number}@example.com", "Test", "x"))
+
+            history_before = CustomUser.history.count()
+            inserts.clear()
+            with connection.execute_wrapper(count_history_inserts):
+                started = time.perf_counter()
+                result = UserResource().import_data(dataset, raise_errors=True)
+                elapsed = time.perf_counter() - started
+            assert result.totals["new"] == args.rows
+
+            history_rows = CustomUser.history.count() - history_before
+            rows.append((mode, history_rows, len(inserts), f"{elapsed:.2f}"))
+        report(f"Admin import of {args.rows} users", rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""
+Authenticated-request latency as the token blacklist grows.
+
+Compares an indexed per-request ``BlacklistedToken`` query with the
+in-memory revocation cache used by ``CustomAuthentication``.
+
+    python -m benchmarks.bench_revocation --rows 1000 100000 1000000
+"""
+import argparse
+import uuid
+from datetime import timedelta
+
+from benchmarks.harness import measure, report, setup_django, test_database
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--number", type=int, default=200)
+    args = parser.parse_args()
+
+    setup_django()
+
+    from cryptography.fernet import Fernet
+    from django.conf import settings
+    from django.test import RequestFactory
+    from django.utils import timezone
+    from rest_framework_simplejwt.tokens import AccessToken
+    from accounts.authenticate import CustomAuthentication
+    from accounts.models import BlacklistedToken, CustomUser
+    from accounts.revocation import revocation_cache
+
+    with test_database():
+        user = CustomUser.objects.create_user(email="bench@example.com")
+        access = AccessToken.for_user(user)
+        token, jti = str(access), access["jti"]
+        expires_at = timezone.now() + timedelta(hours=6)
+        cookie = str(Fernet(settings.HASHED_ACCESS_TOKEN_KEY).encrypt(token.encode()))
+        request = RequestFactory().get("/")
+        request.COOKIES[settings.SIMPLE_JWT["AUTH_COOKIE"]] = cookie
+        authentication = CustomAuthentication()
+
+        rows = [("blacklist rows", "db lookup (us)", "cache lookup (us)", "auth (us)")]
+        inserted = 0
+        for size in sorted(args.rows):
+            BlacklistedToken.objects.bulk_create(
+                (
+                    BlacklistedToken(jti=uuid.uuid4().hex, expires_at=expires_at)
+                    for _ in range(size - inserted)
+                ),
+                batch_size=5000,
+            )
+            inserted = size
+            revocation_cache.refresh()
+
+            db_lookup = measure(
+                lambda: BlacklistedToken.objects.filter(jti=jti).exists(),
+                number=args.number,
+            )
+            cache_lookup = measure(
+                lambda: revocation_cache.is_revoked(jti), number=args.number
+            )
+            auth = measure(
+                lambda: authentication.authenticate(request), number=args.number
+            )
+            rows.append(
+                (size, f"{db_lookup:.1f}", f"{cache_lookup:.1f}", f"{auth:.1f}")
+            )
+
+        report("Revocation check cost per authenticated request", rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+"""
+List serialization through DRF's per-field ``to_representation`` vs. the
+compiled ``values()`` projection of serializers marked ``@compiled``.
+
+Both sides start from a queryset and end with rendered JSON bytes; the DRF
+side gets the ``select_related``/``prefetch_related`` calls it needs to avoid
+N+1 queries. The script fails if the two bodies differ by a single byte.
+
+    python -m benchmarks.bench_serializers --rows 2000
+"""
+import argparse
+import logging
+from decimal import Decimal
+
+from benchmarks.harness import measure, report, setup_django, test_database
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--number", type=int, default=5)
+    args = parser.parse_args()
+
+    setup_django()
+
+    from django.utils import timezone
+    from drf_api_logger.models import APILogsModel
+    from rest_framework.renderers import JSONRenderer
+    from accounts.models import CustomUser, Module, Permission, Role
+    from accounts.serializers import (
+        APILogSerializer,
+        PermissionSerializer,
+        RoleSerializer,
+        UserListSerializer,
+    )
+
+    logging.disable(logging.CRITICAL)
+    render = JSONRenderer().render
+
+    with test_database():
+        modules = Module.objects.bulk_create(
+            Module(name=f"module {number}") for number in range(20)
+        )
+        permissions = Permission.objects.bulk_create(
+            Permission(name=f"permission {number}", module=modules[number % 20])
+            for number in range(args.rows)
+        )
+        roles = Role.objects.bulk_create(
+            Role(name=f"role {number}") for number in range(args.rows)
+        )
+        Role.permissions.through.objects.bulk_create(
+            Role.permissions.through(role=role, permission=permissions[offset])
+            for number, role in enumerate(roles)
+            for offset in range(number % 10, args.rows, args.rows // 5)
+        )
+        users = CustomUser.objects.bulk_create(
+            CustomUser(email=f"user{number}@example.com", first_name="Bench")
+            for number in range(args.rows)
+        )
+        CustomUser.role.through.objects.bulk_create(
+            CustomUser.role.through(customuser=user, role=roles[number % 50])
+            for number, user in enumerate(users)
+        )
+        APILogsModel.objects.bulk_create(
+            APILogsModel(
+                api=f"/api/users/{number}/",
+                headers="{}",
+                body="",
+                method="GET",
+                client_ip_address="127.0.0.1",
+                response="{}",
+                status_code=200,
+                execution_time=Decimal("0.00123"),
+                added_on=timezone.now(),
+            )
+            for number in range(args.rows)
+        )
+
+        cases = [
+            (PermissionSerializer, Permission.objects.select_related("module")),
+            (RoleSerializer, Role.objects.prefetch_related("permissions__module")),
+            (UserListSerializer, CustomUser.objects.prefetch_related("role")),
+            (APILogSerializer, APILogsModel.objects.order_by("-id")),
+        ]
+        rows = [("serializer", "rows", "DRF ms", "compiled ms", "speedup")]
+        for serializer_class, queryset in cases:
+            compiled = serializer_class.compiled
+
+            def drf():
+                return render(serializer_class(queryset.all(), many=True).data)
+
+            def fast():
+                return render(compiled.serialize(compiled.project(queryset.all())))
+
+            assert drf() == fast(), f"{serializer_class.__name__} output differs"
+            drf_ms = measure(drf, number=args.number) / 1000
+            fast_ms = measure(fast, number=args.number) / 1000
+            rows.append(
+                (
+                    serializer_class.__name__,
+                    queryset.count(),
+                    f"{drf_ms:.1f}",
+                    f"{fast_ms:.1f}",
+                    f"{drf_ms / fast_ms:.1f}x",
+                )
+            )
+        report("List serialization, byte-identical output", rows)
+
+
+if __name__ == "__main__":
+    main()
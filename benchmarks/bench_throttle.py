@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""
+Cost of the sliding-window throttle compared with the work it keeps off the
+login endpoint.
+
+"rejected" is a request over budget (one cache ``get_many``), "allowed" one
+under budget (``get_many`` plus ``incr``). "password check" is the PBKDF2
+``check_password`` every unthrottled login attempt pays.
+
+    python -m benchmarks.bench_throttle
+"""
+import argparse
+
+from benchmarks.harness import measure, report, setup_django
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--number", type=int, default=5000)
+    args = parser.parse_args()
+
+    setup_django()
+
+    from django.contrib.auth.hashers import check_password, make_password
+    from django.core.cache import cache
+    from rest_framework.parsers import JSONParser
+    from rest_framework.request import Request
+    from rest_framework.test import APIRequestFactory
+    from accounts.throttling import LoginEmailThrottle
+
+    request = Request(
+        APIRequestFactory().post("/", {"email": "test@gmail.com"}, format="json"),
+        parsers=[JSONParser()],
+    )
+    request.data  # parsed once per request, before the throttles run
+
+    class Unlimited(LoginEmailThrottle):
+        def parse_rate(self, rate):
+            return float("inf"), 60
+
+    cache.clear()
+    exhausted = LoginEmailThrottle()
+    while exhausted.allow_request(request, None):
+        pass
+    unlimited = Unlimited()
+    encoded = make_password("Hello@123")
+
+    rows = [("path", "us / request")]
+    for name, func, number in (
+        ("rejected", lambda: exhausted.allow_request(request, None), args.number),
+        ("allowed", lambda: unlimited.allow_request(request, None), args.number),
+        ("password check", lambda: check_password("Hello@123", encoded), 5),
+    ):
+        rows.append((name, f"{measure(func, number=number):.1f}"))
+    report("Login throttle vs. password hashing", rows)
+
+
+if __name__ == "__main__":
+    main()
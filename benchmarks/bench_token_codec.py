@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+"""
+Per-request CPU cost of turning an access cookie into a validated token.
+
+"before" is the previous path: a new Fernet per request, ``ast.literal_eval``
+of the ``b'...'`` cookie, decryption and JWT validation. "codec cold" is the
+TokenCodec path on a cache miss and "codec warm" a repeat request served from
+its LRU.
+
+    python -m benchmarks.bench_token_codec
+"""
+import argparse
+import ast
+
+from benchmarks.harness import measure, report, setup_django
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--number", type=int, default=2000)
+    args = parser.parse_args()
+
+    setup_django()
+
+    from cryptography.fernet import Fernet
+    from django.conf import settings
+    from rest_framework_simplejwt.tokens import AccessToken
+    from accounts.authenticate import CustomAuthentication
+    from accounts.token_codec import token_codec
+
+    token = AccessToken()
+    token["user_id"] = 1
+    token = str(token)
+    legacy_cookie = str(
+        Fernet(settings.HASHED_ACCESS_TOKEN_KEY).encrypt(token.encode())
+    )
+    cookie = token_codec.encode(token)
+    validate = CustomAuthentication().get_validated_token
+
+    def before():
+        hashed_key = Fernet(settings.HASHED_ACCESS_TOKEN_KEY)
+        return validate(hashed_key.decrypt(ast.literal_eval(legacy_cookie)).decode())
+
+    def codec_cold():
+        token_codec.clear()
+        return token_codec.verify(cookie, validate)
+
+    def codec_warm():
+        return token_codec.verify(cookie, validate)
+
+    rows = [("path", "us / request")]
+    for name, func in (
+        ("before", before),
+        ("codec cold", codec_cold),
+        ("codec warm", codec_warm),
+    ):
+        rows.append((name, f"{measure(func, number=args.number):.1f}"))
+    report("Access cookie decode + validate", rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+import os
+import statistics
+import sys
+import timeit
+from contextlib import contextmanager
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+
+def setup_django():
+    """Configure Django from the project settings so a script can use the ORM."""
+
+    sys.path.insert(0, str(BASE_DIR))
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "backyard_boiler_plate.settings")
+
+    import django
+
+    django.setup()
+
+
+@contextmanager
+def test_database():
+    """Run the block against a throwaway test database built straight from the models."""
+
+    from django.apps import apps
+    from django.conf import settings
+    from django.db import connection
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    settings.MIGRATION_MODULES = {app.label: None for app in apps.get_app_configs()}
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+def measure(func, number=1000, repeat=5):
+    """Return the median cost of one call to ``func`` in microseconds."""
+
+    timings = timeit.repeat(func, number=number, repeat=repeat)
+    return statistics.median(timings) / number * 1_000_000
+
+
+def report(title, rows):
+    """Print ``rows`` (a list of tuples) as an aligned table under ``title``."""
+
+    print(f"\n{title}")
+    widths = [max(len(str(row[i])) for row in rows) for i in range(len(rows[0]))]
+    for row in rows:
+        print("  ".join(str(cell).rjust(width) for cell, width in zip(row, widths)))
@@ -1,7 +1,13 @@
 # -*- coding: utf-8 -*-
+import atexit
 from django.apps import AppConfig
 
 
 class NotificationsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "notifications"
+
+    def ready(self):
+        from utils.email_dispatcher import flush_on_exit
+
+        atexit.register(flush_on_exit)
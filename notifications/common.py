@@ -1,8 +1,22 @@
 # -*- coding: utf-8 -*-
+from django.db import transaction
 from notifications.models import Notification
+from notifications.writer import notification_writer
 
 
-def create_notification(email, event_type, message):
-    Notification.objects.create(
-        email=email, event_type=event_type, message=message, is_sent=True
+def create_notification(email, event_type, message, is_sent=True, api_response=None):
+    """Record a notification once the current transaction commits.
+
+    The row is buffered and bulk-written by ``notification_writer``, so the
+    returned instance has no primary key yet.
+    """
+
+    notification = Notification(
+        email=email,
+        event_type=event_type,
+        message=message,
+        is_sent=is_sent,
+        api_response=api_response,
     )
+    transaction.on_commit(lambda: notification_writer.add(notification))
+    return notification
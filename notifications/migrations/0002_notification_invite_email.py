@@ -0,0 +1,41 @@
+# Generated by Django 5.1.3 on 2026-10-17 12:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("notifications", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="historicalnotification",
+            name="message",
+            field=models.PositiveSmallIntegerField(
+                choices=[
+                    (1, "sign_up_otp_email"),
+                    (2, "login_otp_email"),
+                    (3, "resend_otp_email"),
+                    (4, "reset_password_email"),
+                    (5, "api_response"),
+                    (6, "invite_email"),
+                ]
+            ),
+        ),
+        migrations.AlterField(
+            model_name="notification",
+            name="message",
+            field=models.PositiveSmallIntegerField(
+                choices=[
+                    (1, "sign_up_otp_email"),
+                    (2, "login_otp_email"),
+                    (3, "resend_otp_email"),
+                    (4, "reset_password_email"),
+                    (5, "api_response"),
+                    (6, "invite_email"),
+                ]
+            ),
+        ),
+    ]
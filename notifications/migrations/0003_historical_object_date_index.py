@@ -0,0 +1,21 @@
+# Generated by Django 5.1.3 on 2026-10-17 12:47
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("notifications", "0002_notification_invite_email"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="historicalnotification",
+            index=models.Index(
+                fields=["id", "history_date"], name="notificatio_id_b962c5_idx"
+            ),
+        ),
+    ]
@@ -18,6 +18,7 @@ event_message_choices = (
     (Enums.RESEND_OTP_EMAIL.value, "resend_otp_email"),
     (Enums.RESET_PASSWORD_EMAIL.value, "reset_password_email"),
     (Enums.API_RESPONSE.value, "api_response"),
+    (Enums.INVITE_EMAIL.value, "invite_email"),
 )
 
 
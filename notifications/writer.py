@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+import threading
+from django.conf import settings
+from django.db import connections
+from utils.history import bulk_create_tracked
+from notifications.models import Notification
+
+
+class NotificationWriter:
+    """Buffers ``Notification`` rows and writes them with ``bulk_create``.
+
+    Rows are written together with their history rows once
+    ``NOTIFICATION_BUFFER_SIZE`` are pending, or
+    ``NOTIFICATION_BUFFER_FLUSH_INTERVAL`` seconds after the first pending
+    row, whichever comes first. Anything still pending is flushed at exit,
+    after queued email has been delivered; see
+    ``utils.email_dispatcher.flush_on_exit``.
+    """
+
+    def __init__(self):
+        self._pending = []
+        self._lock = threading.Lock()
+        self._timer = None
+
+    def add(self, notification):
+        with self._lock:
+            self._pending.append(notification)
+            full = len(self._pending) >= settings.NOTIFICATION_BUFFER_SIZE
+            if not full and self._timer is None:
+                self._timer = threading.Timer(
+                    settings.NOTIFICATION_BUFFER_FLUSH_INTERVAL, self.flush_in_thread
+                )
+                self._timer.daemon = True
+                self._timer.start()
+        if full:
+            self.flush()
+
+    def flush(self):
+        """Write every pending row. Returns the number of rows written."""
+
+        with self._lock:
+            pending, self._pending = self._pending, []
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+        if pending:
+            bulk_create_tracked(
+                pending, Notification, batch_size=settings.NOTIFICATION_BUFFER_SIZE
+            )
+        return len(pending)
+
+    def flush_in_thread(self):
+        try:
+            self.flush()
+        finally:
+            connections.close_all()
+
+    def reset(self):
+        with self._lock:
+            self._pending = []
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+
+notification_writer = NotificationWriter()
@@ -3,7 +3,42 @@ import pytest
 from accounts.models import CustomUser
 from django.urls import reverse
 from unittest.mock import patch
-from accounts.models import EmailOtp, Role
+from accounts.models import Role
+from accounts.otp import otp_store
+from accounts.revocation import revocation_cache
+from django.core.cache import cache
+from notifications.writer import notification_writer
+from utils.enums import Enums
+
+
+@pytest.fixture(autouse=True)
+def reset_auth_caches():
+    """
+    Fixture to start every test with empty revocation, principal and notification buffers.
+    """
+
+    revocation_cache.reset()
+    cache.clear()
+    notification_writer.reset()
+    yield
+    revocation_cache.reset()
+    cache.clear()
+    notification_writer.reset()
+
+
+@pytest.fixture
+def shared_cache(settings, tmp_path):
+    """
+    Fixture to back the default cache with files that every cache instance shares, as Redis would.
+    """
+
+    settings.CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+            "LOCATION": str(tmp_path / "cache"),
+        }
+    }
+    return settings.CACHES["default"]["LOCATION"]
 
 
 @pytest.fixture
@@ -12,7 +47,7 @@ def mock_send_otp_email():
     Fixture to mock the 'otp_email' function.
     """
 
-    with patch("utils.email.otp_email") as mock:
+    with patch("accounts.services.otp_email") as mock:
         yield mock
 
 
@@ -22,7 +57,7 @@ def mock_send_reset_password_email():
     Fixture to mock the 'reset_password_email' function.
     """
 
-    with patch("utils.email.reset_password_email") as mock:
+    with patch("accounts.signals.reset_password_email") as mock:
         yield mock
 
 
@@ -45,7 +80,7 @@ def user_login(client, mock_send_otp_email):
     user = CustomUser.objects.get(
         email="test@gmail.com", token=response.data["data"]["token"]
     )
-    EmailOtp.objects.create(email="test@gmail.com", otp="1234")
+    otp_store.issue("test@gmail.com", Enums.SIGN_UP.value, otp="1234")
 
     url = reverse("verify-otp")
     data = {
@@ -83,7 +118,7 @@ def user_login_with_2fa(client, mock_send_otp_email):
     )
     role = Role.objects.create(name="2fa")
     user.role.add(role)
-    EmailOtp.objects.create(email="test@gmail.com", otp="1234")
+    otp_store.issue("test@gmail.com", Enums.SIGN_UP.value, otp="1234")
 
     url = reverse("verify-otp")
     data = {
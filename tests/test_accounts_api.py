@@ -2,9 +2,50 @@
 import pytest
 from django.urls import reverse
 from rest_framework import status
-from accounts.models import CustomUser, EmailOtp, Module, Permission, Role
+from accounts.models import CustomUser, EmailOtp, InviteJob, Module, Permission, Role
+from accounts.invites import provision_users
+from accounts.otp import otp_store
+from accounts.permissions import HasModulePermission
+from accounts.principals import get_user_principal
+from accounts.rbac import (
+    compile_permission_mask,
+    has_module_permission,
+    permission_index,
+)
+from accounts.serializers import (
+    APILogSerializer,
+    PermissionSerializer,
+    ProfileSerializer,
+    RoleSerializer,
+    UserListSerializer,
+)
+from accounts.throttling import OtpEmailThrottle, SlidingWindowThrottle
+from datetime import timedelta
+from decimal import Decimal
 from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ImproperlyConfigured
+from django.core import mail
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from drf_api_logger.models import APILogsModel
 from utils.enums import Enums
+from utils.cache import check_shared_cache
+from utils.compiled_serializers import CompiledSerializer
+from utils.renderers import stream_envelope
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.test import force_authenticate
+from rest_framework.views import APIView
+from unittest.mock import patch
 
 
 @pytest.mark.django_db
@@ -130,6 +171,80 @@ class TestVerifyOtpView:
         assert response.json()["message"] == "error"
         assert response.json()["error"] == ["Token not valid"]
 
+    def test_verify_otp_rejects_non_digits(self, client):
+        """
+        Test a non-ASCII OTP is a validation error rather than a server error.
+        """
+        otp_store.issue(self.user.email, Enums.SIGN_UP.value, otp="1234")
+        url = reverse("verify-otp")
+        data = {"otp": "12é4", "email": self.user.email, "token": self.user.token}
+        response = client.post(url, data, content_type="application/json")
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert "otp" in response.json()["error"]
+
+
+@pytest.mark.django_db
+class TestOtpStore:
+    """
+    Test cases for the cache-backed OTP store.
+    """
+
+    def test_issued_otp_is_verified_from_cache(
+        self, django_assert_num_queries, django_capture_on_commit_callbacks
+    ):
+        """
+        Test an issued OTP verifies without touching the database and writes its audit row after commit.
+        """
+        with django_capture_on_commit_callbacks(execute=True):
+            otp = otp_store.issue("Test@gmail.com", Enums.LOGIN.value)
+        with django_assert_num_queries(0):
+            with django_capture_on_commit_callbacks() as callbacks:
+                otp_store.verify("test@gmail.com", Enums.LOGIN.value, otp)
+        callbacks[0]()
+        assert EmailOtp.objects.get(email="test@gmail.com", otp=otp).is_valid is True
+
+    def test_otp_can_only_be_used_once(self):
+        """
+        Test a verified OTP is invalidated and cannot be verified again.
+        """
+        otp = otp_store.issue("test@gmail.com", Enums.LOGIN.value)
+        otp_store.verify("test@gmail.com", Enums.LOGIN.value, otp)
+        with pytest.raises(ValidationError):
+            otp_store.verify("test@gmail.com", Enums.LOGIN.value, otp)
+
+    def test_otp_used_from_cache_cannot_fall_back_to_its_audit_row(
+        self, django_capture_on_commit_callbacks
+    ):
+        """
+        Test a second verify before the first one commits does not succeed from the unused audit row.
+        """
+        with django_capture_on_commit_callbacks(execute=True):
+            otp = otp_store.issue("test@gmail.com", Enums.LOGIN.value)
+        with django_capture_on_commit_callbacks():
+            otp_store.verify("test@gmail.com", Enums.LOGIN.value, otp)
+            with pytest.raises(ValidationError):
+                otp_store.verify("test@gmail.com", Enums.LOGIN.value, otp)
+        assert EmailOtp.objects.get(otp=otp).is_valid is False
+
+    def test_wrong_otp_or_stage_is_rejected(self):
+        """
+        Test the OTP only verifies for the email and stage it was issued for.
+        """
+        otp_store.issue("test@gmail.com", Enums.LOGIN.value, otp="1234")
+        with pytest.raises(ValidationError):
+            otp_store.verify("test@gmail.com", Enums.LOGIN.value, "4321")
+        with pytest.raises(ValidationError):
+            otp_store.verify("test@gmail.com", Enums.SIGN_UP.value, "1234")
+        otp_store.verify("test@gmail.com", Enums.LOGIN.value, "1234")
+
+    def test_non_ascii_otp_is_rejected(self):
+        """
+        Test a non-ASCII OTP is refused like any other wrong one.
+        """
+        otp_store.issue("test@gmail.com", Enums.LOGIN.value, otp="1234")
+        with pytest.raises(ValidationError):
+            otp_store.verify("test@gmail.com", Enums.LOGIN.value, "12é4")
+
 
 @pytest.mark.django_db
 class TestResendOTPView:
@@ -567,3 +682,873 @@ class TestUserListEndpoints:
         assert response.json()["data"][2]["email"] == "user1@example.com"
         assert response.json()["data"][1]["roles"][0]["name"] == "viewer"
         assert response.json()["data"][2]["roles"][0]["name"] == "admin"
+
+
+@pytest.mark.django_db
+class TestThrottling:
+    """
+    Test cases for the sliding-window throttles on the sign-up, OTP and login endpoints.
+    """
+
+    @pytest.fixture(autouse=True)
+    def low_rates(self, settings):
+        rates = {
+            **settings.REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"],
+            "otp_email": "2/hour",
+            "login_email": "1/min",
+        }
+        settings.REST_FRAMEWORK = {
+            **settings.REST_FRAMEWORK,
+            "DEFAULT_THROTTLE_RATES": rates,
+        }
+
+    def test_resend_otp_is_throttled_per_email(self, client, mock_send_otp_email):
+        """
+        Test resend OTP returns 429 TOO MANY REQUESTS once an email's budget is spent.
+        """
+        user = CustomUser.objects.create(email="test+1@gmail.com")
+        other = CustomUser.objects.create(email="test+2@gmail.com")
+        url = reverse("resend-otp")
+        data = {"email": user.email, "token": str(user.token)}
+        for _ in range(2):
+            response = client.post(url, data, content_type="application/json")
+            assert response.status_code == status.HTTP_200_OK
+        response = client.post(url, data, content_type="application/json")
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+
+        data = {"email": other.email, "token": str(other.token)}
+        response = client.post(url, data, content_type="application/json")
+        assert response.status_code == status.HTTP_200_OK
+
+    @pytest.mark.parametrize(
+        "num_proxies, forwarded_for",
+        [(0, "203.0.113.{}"), (1, "203.0.113.{}, 198.51.100.7")],
+    )
+    def test_forwarded_for_cannot_reset_the_ip_budget(
+        self, client, settings, num_proxies, forwarded_for
+    ):
+        """
+        Test rotating a spoofed X-Forwarded-For address does not earn a fresh IP budget.
+        """
+        settings.REST_FRAMEWORK = {
+            **settings.REST_FRAMEWORK,
+            "NUM_PROXIES": num_proxies,
+            "DEFAULT_THROTTLE_RATES": {
+                **settings.REST_FRAMEWORK["DEFAULT_THROTTLE_RATES"],
+                "login_ip": "2/min",
+            },
+        }
+        url = reverse("access_token")
+        # Pin the clock so the three requests cannot straddle a window boundary.
+        with patch.object(SlidingWindowThrottle, "timer", return_value=60 * 1000):
+            codes = [
+                client.post(
+                    url,
+                    {"email": f"user{number}@gmail.com", "password": "Hello@123"},
+                    content_type="application/json",
+                    HTTP_X_FORWARDED_FOR=forwarded_for.format(number),
+                ).status_code
+                for number in range(3)
+            ]
+        assert status.HTTP_429_TOO_MANY_REQUESTS not in codes[:2]
+        assert codes[2] == status.HTTP_429_TOO_MANY_REQUESTS
+
+    def test_rejected_login_does_no_database_work(
+        self, client, django_assert_num_queries
+    ):
+        """
+        Test a throttled login is rejected before the user lookup and password check.
+        """
+        url = reverse("access_token")
+        data = {"email": "test@gmail.com", "password": "Hello@123"}
+        client.post(url, data, content_type="application/json")
+        with django_assert_num_queries(0):
+            response = client.post(url, data, content_type="application/json")
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+
+    def test_previous_window_is_weighted(self, rf):
+        """
+        Test requests from the previous window count in proportion to its overlap.
+        """
+        throttle = OtpEmailThrottle()
+        request = Request(rf.post("/"), parsers=[JSONParser()])
+        request._full_data = {"email": "test@gmail.com"}
+        duration = throttle.duration
+        with patch.object(OtpEmailThrottle, "timer", return_value=duration * 10):
+            assert throttle.allow_request(request, None)
+            assert throttle.allow_request(request, None)
+            assert not throttle.allow_request(request, None)
+        with patch.object(OtpEmailThrottle, "timer", return_value=duration * 11):
+            assert not throttle.allow_request(request, None)
+        with patch.object(OtpEmailThrottle, "timer", return_value=duration * 11.5):
+            assert throttle.allow_request(request, None)
+            assert not throttle.allow_request(request, None)
+
+
+@pytest.mark.django_db
+class TestBulkInviteView:
+    """
+    Test cases for the bulk invite endpoints.
+    """
+
+    @pytest.fixture(autouse=True)
+    def inline_jobs(self, settings):
+        settings.INVITE_JOB_WORKERS = 0
+        settings.INVITE_BATCH_SIZE = 2
+        settings.EMAIL_DISPATCHER_WORKERS = 0
+
+    def test_invite_from_json(
+        self, client, user_login, django_capture_on_commit_callbacks
+    ):
+        """
+        Test inviting users from a JSON list creates inactive users with roles and emails them.
+        """
+        role = Role.objects.create(name="participant")
+        data = {
+            "users": [
+                {"email": "One@gmail.com", "first_name": "One"},
+                {"email": "two@gmail.com", "first_name": "Two"},
+                {"email": "one@gmail.com", "first_name": "Duplicate"},
+                {"email": "test@gmail.com"},
+                {"email": "not-an-email"},
+            ],
+            "roles": [role.id],
+        }
+        with django_capture_on_commit_callbacks(execute=True):
+            response = client.post(
+                reverse("user-invite"), data, content_type="application/json"
+            )
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        job_id = response.json()["data"]["id"]
+        assert response.json()["data"]["total"] == 5
+
+        response = client.get(reverse("user-invite-job", args=[job_id]))
+        job = response.json()["data"]
+        assert job["status"] == Enums.JOB_COMPLETED.value
+        assert (job["processed"], job["created"], job["skipped"]) == (5, 2, 2)
+        assert job["errors"] == [{"row": 5, "error": "Enter a valid email address."}]
+
+        invited = CustomUser.objects.filter(
+            email__in=["one@gmail.com", "two@gmail.com"]
+        )
+        assert invited.count() == 2
+        for user in invited:
+            assert user.is_active is False
+            assert user.has_usable_password() is False
+            assert list(user.role.all()) == [role]
+        assert sorted(message.to[0] for message in mail.outbox) == [
+            "one@gmail.com",
+            "two@gmail.com",
+        ]
+
+    def invite(self, client, capture_on_commit, email):
+        with capture_on_commit(execute=True):
+            client.post(
+                reverse("user-invite"),
+                {"users": [{"email": email, "first_name": "New"}]},
+                content_type="application/json",
+            )
+        return mail.outbox[-1].body.split(": ")[-1]
+
+    def test_invitee_can_set_password_and_log_in(
+        self, client, user_login, django_capture_on_commit_callbacks
+    ):
+        """
+        Test an invitee activated through the OTP flow can set a password with the invite token and log in.
+        """
+        token = self.invite(client, django_capture_on_commit_callbacks, "new@gmail.com")
+        otp_store.issue("new@gmail.com", Enums.SIGN_UP.value, otp="1234")
+        data = {"email": "new@gmail.com", "otp": "1234", "token": token}
+        response = client.post(
+            reverse("verify-otp"), data, content_type="application/json"
+        )
+        assert response.status_code == status.HTTP_200_OK
+
+        password = {"password": "Welcome@12", "password2": "Welcome@12"}
+        data = {"email": "new@gmail.com", "token": token, **password}
+        response = client.post(
+            reverse("accept-invite"), data, content_type="application/json"
+        )
+        assert response.status_code == status.HTTP_200_OK
+
+        data = {"email": "new@gmail.com", "password": "Welcome@12"}
+        response = client.post(
+            reverse("access_token"), data, content_type="application/json"
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert "access" in response.json()
+
+    def test_invite_can_only_be_accepted_once(
+        self, client, user_login, django_capture_on_commit_callbacks
+    ):
+        """
+        Test the invite token stops working once a password is set, and never works for signed-up users.
+        """
+        token = self.invite(client, django_capture_on_commit_callbacks, "new@gmail.com")
+        data = {
+            "email": "new@gmail.com",
+            "token": token,
+            "password": "Welcome@12",
+            "password2": "Welcome@12",
+        }
+        url = reverse("accept-invite")
+        response = client.post(url, data, content_type="application/json")
+        assert response.status_code == status.HTTP_200_OK
+        assert CustomUser.objects.get(email="new@gmail.com").is_active is True
+
+        data["password"] = data["password2"] = "Takeover@12"
+        response = client.post(url, data, content_type="application/json")
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.json()["error"] == ["Invite not valid"]
+
+        data.update(email="test@gmail.com", token=str(user_login["user"].token))
+        response = client.post(url, data, content_type="application/json")
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+    def test_invite_from_csv(
+        self, client, user_login, django_capture_on_commit_callbacks
+    ):
+        """
+        Test inviting users from an uploaded CSV file.
+        """
+        upload = SimpleUploadedFile(
+            "users.csv",
+            b"email,first_name,last_name\r\nthree@gmail.com,Three,User\r\n",
+            content_type="text/csv",
+        )
+        with django_capture_on_commit_callbacks(execute=True):
+            response = client.post(reverse("user-invite"), {"file": upload})
+        assert response.status_code == status.HTTP_202_ACCEPTED
+        user = CustomUser.objects.get(email="three@gmail.com")
+        assert (user.first_name, user.last_name) == ("Three", "User")
+
+    def test_emails_taken_during_the_batch_are_skipped(self):
+        """
+        Test an email created by another request after the existence check is skipped, not a failure.
+        """
+
+        def racing_signup(password):
+            # Runs between the existence check and the insert.
+            if not CustomUser.objects.filter(email="two@gmail.com").exists():
+                CustomUser.objects.create(email="two@gmail.com")
+            return make_password(password)
+
+        rows = [{"email": "one@gmail.com"}, {"email": "two@gmail.com"}]
+        with patch("accounts.invites.make_password", side_effect=racing_signup):
+            assert provision_users(rows, []) == (1, 1, [])
+        assert CustomUser.objects.filter(email="one@gmail.com").exists()
+
+    def test_stale_jobs_are_failed(self):
+        """
+        Test jobs left pending or running past INVITE_JOB_STALE_AFTER are marked failed.
+        """
+        stale = InviteJob.objects.create(payload=[{"email": "one@gmail.com"}])
+        fresh = InviteJob.objects.create(status=Enums.JOB_RUNNING.value)
+        long_ago = timezone.now() - timedelta(
+            seconds=settings.INVITE_JOB_STALE_AFTER + 1
+        )
+        InviteJob.objects.filter(pk=stale.pk).update(updated_at=long_ago)
+
+        call_command("fail_stale_invite_jobs")
+        stale.refresh_from_db()
+        fresh.refresh_from_db()
+        assert (stale.status, stale.payload) == (Enums.JOB_FAILED.value, [])
+        assert fresh.status == Enums.JOB_RUNNING.value
+
+    def test_invite_requires_users(self, client, user_login):
+        """
+        Test a request without users or file should return 400 BAD REQUEST.
+        """
+        response = client.post(
+            reverse("user-invite"), {"users": []}, content_type="application/json"
+        )
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert InviteJob.objects.count() == 0
+
+    def test_job_is_only_visible_to_its_creator(self, client, user_login):
+        """
+        Test another user's invite job is not returned.
+        """
+        other = CustomUser.objects.create(email="other@gmail.com")
+        job = InviteJob.objects.create(created_by=other, total=1)
+        response = client.get(reverse("user-invite-job", args=[job.id]))
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+class TestModulePermissions:
+    """
+    Test cases for the compiled module permission resolver and HasModulePermission.
+    """
+
+    def setup_method(self):
+        """
+        Set up a user holding a role that grants events/create.
+        """
+
+        module = Module.objects.create(name="Events")
+        self.create = Permission.objects.create(name="create", module=module)
+        self.delete = Permission.objects.create(name="delete", module=module)
+        self.role = Role.objects.create(name="organiser")
+        self.role.permissions.add(self.create)
+        self.user = CustomUser.objects.create(email="test+1@gmail.com")
+        self.user.role.add(self.role)
+
+    def test_role_permissions_are_resolved(self):
+        """
+        Test only permissions granted through the user's roles are allowed.
+        """
+        assert has_module_permission(self.user, "events", "create")
+        assert not has_module_permission(self.user, "events", "delete")
+        assert not has_module_permission(self.user, "events", "missing")
+
+    def test_repeat_checks_use_the_cache(self, django_assert_num_queries):
+        """
+        Test a warm check needs no queries for a principal carrying its role ids.
+        """
+        principal = get_user_principal(self.user.pk)
+        has_module_permission(principal, "events", "create")
+        with django_assert_num_queries(0):
+            assert has_module_permission(principal, "events", "create")
+
+    def test_permission_changes_invalidate_cached_sets(self):
+        """
+        Test changes from either side of the role/permission relation apply immediately.
+        """
+        assert not has_module_permission(self.user, "events", "delete")
+        self.role.permissions.add(self.delete)
+        assert has_module_permission(self.user, "events", "delete")
+        self.create.roles.remove(self.role)
+        assert not has_module_permission(self.user, "events", "create")
+        self.delete.delete()
+        assert not has_module_permission(self.user, "events", "delete")
+
+    def test_bits_are_dense_whatever_the_ids(self):
+        """
+        Test permissions get consecutive bit positions however large their ids are.
+        """
+        module = Module.objects.get(name="events")
+        late = Permission.objects.create(id=10**6, name="archive", module=module)
+        self.role.permissions.add(late)
+        index = permission_index()
+        count = Permission.objects.count()
+        assert sorted(index.positions.values()) == list(range(count))
+        assert compile_permission_mask([self.role.pk], index).bit_length() <= count
+        assert has_module_permission(self.user, "events", "archive")
+
+    def test_mask_cached_before_commit_is_not_kept(
+        self, django_capture_on_commit_callbacks
+    ):
+        """
+        Test a set compiled from the old rows before a revocation commits is not used afterwards.
+        """
+        granted = compile_permission_mask([self.role.pk], permission_index())
+        with django_capture_on_commit_callbacks(execute=True):
+            self.role.permissions.remove(self.create)
+            # A concurrent request that still sees the committed rows caches them.
+            with patch("accounts.rbac.compile_permission_mask", return_value=granted):
+                assert has_module_permission(self.user, "events", "create")
+
+        assert not has_module_permission(self.user, "events", "create")
+
+    def test_has_module_permission_class(self, rf):
+        """
+        Test HasModulePermission allows the request only with the granted permission.
+        """
+
+        class EventView(APIView):
+            permission_classes = [HasModulePermission("events", "create")]
+
+            def post(self, request):
+                return Response({})
+
+        class DeleteEventView(EventView):
+            permission_classes = [HasModulePermission("events", "delete")]
+
+        request = rf.post("/")
+        force_authenticate(request, user=get_user_principal(self.user.pk))
+        assert EventView.as_view()(request).status_code == status.HTTP_200_OK
+        request = rf.post("/")
+        force_authenticate(request, user=get_user_principal(self.user.pk))
+        response = DeleteEventView.as_view()(request)
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+@pytest.mark.django_db
+class TestBulkRoleAssignment:
+    """
+    Test cases for the bulk user-role and role-permission endpoints.
+    """
+
+    def setup_method(self):
+        """
+        Set up users, roles and permissions for testing.
+        """
+
+        module = Module.objects.create(name="Events")
+        self.permissions = [
+            Permission.objects.create(name=name, module=module)
+            for name in ("create", "update", "delete")
+        ]
+        self.roles = [Role.objects.create(name=name) for name in ("staff", "guest")]
+        self.users = [
+            CustomUser.objects.create(email=f"test+{index}@gmail.com")
+            for index in range(3)
+        ]
+        self.users[0].role.add(self.roles[0])
+
+    def test_bulk_user_roles(self, client, user_login, django_assert_max_num_queries):
+        """
+        Test roles of many users are replaced with one diff per batch.
+        """
+        staff, guest = self.roles
+        data = {
+            "assignments": [
+                {"user": self.users[0].id, "roles": [guest.id]},
+                {"user": self.users[1].id, "roles": [staff.id, guest.id]},
+                {"user": self.users[2].id, "roles": []},
+            ]
+        }
+        with django_assert_max_num_queries(12):
+            response = client.put(
+                reverse("user-role-bulk-assign"), data, content_type="application/json"
+            )
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["data"] == {"added": 3, "removed": 1}
+        assert list(self.users[0].role.all()) == [guest]
+        assert set(self.users[1].role.all()) == {staff, guest}
+        assert not self.users[2].role.exists()
+        assert get_user_principal(self.users[1].id).role_ids == {staff.id, guest.id}
+
+    def test_bulk_role_permissions(self, client, user_login):
+        """
+        Test permissions of many roles are replaced and cached permission sets refreshed.
+        """
+        staff, guest = self.roles
+        create, update, delete = self.permissions
+        staff.permissions.add(create)
+        assert has_module_permission(self.users[0], "events", "create")
+
+        data = {
+            "assignments": [
+                {"role": staff.id, "permissions": [update.id, delete.id]},
+                {"role": guest.id, "permissions": [create.id]},
+            ]
+        }
+        response = client.put(
+            reverse("role-permission-bulk-assign"),
+            data,
+            content_type="application/json",
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["data"] == {"added": 3, "removed": 1}
+        assert not has_module_permission(self.users[0], "events", "create")
+        assert has_module_permission(self.users[0], "events", "delete")
+
+    def test_bulk_assignment_rejects_unknown_ids(self, client, user_login):
+        """
+        Test unknown ids should return 400 BAD REQUEST without changing anything.
+        """
+        data = {
+            "assignments": [
+                {"user": self.users[1].id, "roles": [self.roles[0].id, 9999]},
+            ]
+        }
+        response = client.put(
+            reverse("user-role-bulk-assign"), data, content_type="application/json"
+        )
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.json()["error"]["assignments"] == ["Invalid roles: 9999."]
+        assert not self.users[1].role.exists()
+
+
+@pytest.mark.django_db
+class TestKeysetPagination:
+    """
+    Test cases for cursor pagination on the list endpoints.
+    """
+
+    @staticmethod
+    def next_url(response):
+        links = dict(
+            (rel.split('"')[1], url.strip(" <>"))
+            for url, rel in (link.split(";") for link in response["Link"].split(","))
+        )
+        return links.get("next")
+
+    def test_pages_follow_the_link_header(self, client, user_login):
+        """
+        Test pages are newest first, linked through opaque cursors and never counted.
+        """
+        for number in range(5):
+            Module.objects.create(name=f"module {number}")
+
+        response = client.get(reverse("module-list-create"), {"page_size": 2})
+        assert [item["name"] for item in response.json()] == ["module 4", "module 3"]
+
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(self.next_url(response))
+        assert [item["name"] for item in response.json()] == ["module 2", "module 1"]
+        assert not any("COUNT(" in query["sql"] for query in queries)
+        assert "cursor=" in self.next_url(response)
+
+        response = client.get(self.next_url(response))
+        assert [item["name"] for item in response.json()] == ["module 0"]
+        assert 'rel="next"' not in response["Link"]
+
+    def test_envelope_and_page_size_limit(self, client, user_login, settings):
+        """
+        Test enveloped endpoints keep their body and page sizes are capped.
+        """
+        settings.API_MAX_PAGE_SIZE = 2
+        for number in range(3):
+            CustomUser.objects.create(email=f"user{number}@example.com")
+
+        response = client.get(reverse("user-list-with-roles"), {"page_size": 50})
+        body = response.json()
+        assert body["message"] == "success"
+        assert [user["email"] for user in body["data"]] == [
+            "user2@example.com",
+            "user1@example.com",
+        ]
+        assert self.next_url(response)
+
+
+@pytest.mark.django_db
+class TestStreamingListResponses:
+    """
+    Test cases for list responses streamed chunk by chunk.
+    """
+
+    def fetch(self, client, settings, name, chunk_size):
+        settings.API_STREAM_CHUNK_SIZE = chunk_size
+        response = client.get(reverse(name))
+        if response.streaming:
+            return True, b"".join(response.streaming_content)
+        return False, response.content
+
+    @pytest.mark.parametrize(
+        "name", ["user-list-with-roles", "module-list-create", "role-list-create"]
+    )
+    def test_streamed_body_matches_rendered_body(
+        self, client, user_login, settings, name
+    ):
+        """
+        Test streaming long lists produces exactly the bytes of the one-pass response.
+        """
+        role = Role.objects.create(name="viewer")
+        for number in range(5):
+            user = CustomUser.objects.create(email=f"user{number}@example.com")
+            user.role.add(role)
+            Module.objects.create(name=f"module {number}")
+            Role.objects.create(name=f"role {number}")
+
+        streamed, body = self.fetch(client, settings, name, chunk_size=2)
+        assert streamed
+        rendered, expected = self.fetch(client, settings, name, chunk_size=100)
+        assert not rendered
+        assert body == expected
+
+    def test_envelope_stream_of_nothing(self):
+        """
+        Test an empty stream still renders the full envelope.
+        """
+        body = b"".join(stream_envelope(iter([])))
+        assert body == JSONRenderer().render(
+            {"message": "success", "error": None, "data": []}
+        )
+
+
+@pytest.mark.django_db
+class TestCompiledSerializers:
+    """
+    Test cases for serializers compiled into a values() projection.
+    """
+
+    @pytest.fixture(autouse=True)
+    def records(self):
+        module = Module.objects.create(name="reports")
+        permissions = [
+            Permission.objects.create(name=f"perm {number}", module=module)
+            for number in range(3)
+        ]
+        role = Role.objects.create(name="editor")
+        role.permissions.set(permissions[:2])
+        Role.objects.create(name="empty")
+        user = CustomUser.objects.create(email="compiled@example.com", first_name="Ünï")
+        user.role.add(role)
+        CustomUser.objects.create(email="norole@example.com")
+        APILogsModel.objects.create(
+            api="/api/\u2028",
+            headers="{}",
+            body="",
+            method="GET",
+            client_ip_address="127.0.0.1",
+            response="{}",
+            status_code=200,
+            execution_time=Decimal("0.01234"),
+            added_on=timezone.now(),
+        )
+
+    @pytest.mark.parametrize(
+        "serializer_class",
+        [PermissionSerializer, RoleSerializer, UserListSerializer, APILogSerializer],
+    )
+    def test_output_matches_serializer(self, serializer_class):
+        """
+        Test compiled rows render to exactly the bytes of the DRF serializer.
+        """
+        compiled = serializer_class.compiled
+        queryset = compiled.model.objects.all()
+        expected = JSONRenderer().render(serializer_class(queryset, many=True).data)
+        rows = compiled.serialize(compiled.project(queryset))
+        assert JSONRenderer().render(rows) == expected
+
+    def test_one_query_per_relation(self):
+        """
+        Test nested permissions are fetched with a single query for all roles.
+        """
+        compiled = RoleSerializer.compiled
+        with CaptureQueriesContext(connection) as queries:
+            compiled.serialize(compiled.project(Role.objects.all()))
+        assert len(queries) == 2
+
+    def test_unsupported_field_fails_at_compile_time(self):
+        """
+        Test a field the projection cannot express is rejected when compiling.
+        """
+
+        class MethodSerializer(serializers.ModelSerializer):
+            label = serializers.SerializerMethodField()
+
+            class Meta:
+                model = Role
+                fields = ["id", "label"]
+
+        with pytest.raises(ImproperlyConfigured, match="MethodSerializer.label"):
+            CompiledSerializer(MethodSerializer())
+
+    def test_list_endpoint_matches_uncompiled(self, client, user_login, settings):
+        """
+        Test the role list endpoint returns the same body with compiling turned off.
+        """
+        compiled = client.get(reverse("role-list-create")).content
+        settings.API_COMPILED_SERIALIZERS = False
+        assert client.get(reverse("role-list-create")).content == compiled
+
+
+@pytest.mark.django_db
+class TestSparseFieldsets:
+    """
+    Test cases for the ?fields= and ?expand= query parameters.
+    """
+
+    @pytest.fixture(autouse=True)
+    def records(self):
+        module = Module.objects.create(name="reports")
+        self.role = Role.objects.create(name="editor")
+        self.role.permissions.add(Permission.objects.create(name="view", module=module))
+
+    def rows(self, client, name, **params):
+        response = client.get(reverse(name), params)
+        assert response.status_code == status.HTTP_200_OK
+        return response.json()
+
+    def test_fields_limit_the_payload(self, client, user_login):
+        """
+        Test only the selected fields are returned, dotted names reaching into nested lists.
+        """
+        rows = self.rows(
+            client, "role-list-create", fields="name,permissions.module_name"
+        )
+        assert rows == [{"name": "editor", "permissions": [{"module_name": "reports"}]}]
+
+    def test_unselected_relations_are_not_fetched(self, client, user_login, settings):
+        """
+        Test leaving out nested permissions skips their query, compiled or not.
+        """
+        for compiled in (True, False):
+            settings.API_COMPILED_SERIALIZERS = compiled
+            with CaptureQueriesContext(connection) as full:
+                self.rows(client, "role-list-create")
+            with CaptureQueriesContext(connection) as sparse:
+                assert self.rows(client, "role-list-create", fields="id") == [
+                    {"id": self.role.id}
+                ]
+            assert len(sparse) < len(full)
+            assert "permission" not in " ".join(query["sql"] for query in sparse)
+
+    def test_expand_nests_the_full_serializer(self, client, user_login, settings):
+        """
+        Test expanded user roles carry their permissions, with or without compiling.
+        """
+        user_login["user"].role.add(self.role)
+        params = {
+            "fields": "email,roles.name,roles.permissions.name",
+            "expand": "roles",
+        }
+        rows = self.rows(client, "user-list-with-roles", **params)["data"]
+        assert rows == [
+            {
+                "email": "test@gmail.com",
+                "roles": [{"name": "editor", "permissions": [{"name": "view"}]}],
+            }
+        ]
+        settings.API_COMPILED_SERIALIZERS = False
+        assert self.rows(client, "user-list-with-roles", **params)["data"] == rows
+
+    def test_profile_fields_and_expand(self, client, user_login):
+        """
+        Test the profile loads and returns only the selected fields.
+        """
+        user = user_login["user"]
+        user.role.add(self.role)
+        url = reverse("user-profile", args=[user.id])
+        response = client.get(url, {"fields": "email,role.name", "expand": "role"})
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["data"] == {
+            "email": "test@gmail.com",
+            "role": [{"name": "editor"}],
+        }
+
+    def test_narrow_defers_unselected_columns(self):
+        """
+        Test narrowing a queryset defers columns and prefetches outside the selection.
+        """
+        CustomUser.objects.create(email="narrow@example.com")
+        serializer = ProfileSerializer(fields="email")
+        with CaptureQueriesContext(connection) as queries:
+            user = serializer.narrow(CustomUser.objects.all()).get()
+        assert len(queries) == 1
+        assert "first_name" in user.get_deferred_fields()
+
+    @pytest.mark.parametrize("params", [{"fields": "nope"}, {"expand": "name"}])
+    def test_unknown_fields_are_rejected(self, client, user_login, params):
+        """
+        Test unknown field names are a 400 response.
+        """
+        response = client.get(reverse("role-list-create"), params)
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures("shared_cache")
+class TestConditionalGet:
+    """
+    Test cases for version-counter ETags and If-None-Match.
+    """
+
+    def get(self, client, url, etag=None, **params):
+        headers = {} if etag is None else {"HTTP_IF_NONE_MATCH": etag}
+        return client.get(url, params, **headers)
+
+    def test_unchanged_list_is_not_modified(self, client, user_login):
+        """
+        Test a matching If-None-Match is answered with 304 without reading roles.
+        """
+        Role.objects.create(name="viewer")
+        url = reverse("role-list-create")
+        etag = self.get(client, url)["ETag"]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.get(client, url, etag)
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert not [query for query in queries if "accounts_role" in query["sql"]]
+
+    @pytest.mark.parametrize(
+        "change",
+        [
+            lambda role, permission: role.permissions.remove(permission),
+            lambda role, permission: permission.module.save(),
+            lambda role, permission: Role.objects.create(name="other"),
+            lambda role, permission: permission.delete(),
+        ],
+    )
+    def test_changes_make_the_role_list_stale(
+        self, client, user_login, django_capture_on_commit_callbacks, change
+    ):
+        """
+        Test saves, deletes and M2M changes of anything a role list shows change its ETag.
+        """
+        permission = Permission.objects.create(
+            name="view", module=Module.objects.create(name="reports")
+        )
+        role = Role.objects.create(name="viewer")
+        role.permissions.add(permission)
+        url = reverse("role-list-create")
+        etag = self.get(client, url)["ETag"]
+
+        with django_capture_on_commit_callbacks(execute=True):
+            change(role, permission)
+        response = self.get(client, url, etag)
+        assert response.status_code == status.HTTP_200_OK
+        assert response["ETag"] != etag
+
+    def test_etag_varies_with_the_query(self, client, user_login):
+        """
+        Test each field selection gets its own ETag.
+        """
+        url = reverse("module-list-create")
+        etag = self.get(client, url)["ETag"]
+        response = self.get(client, url, etag, fields="name")
+        assert response.status_code == status.HTTP_200_OK
+        assert response["ETag"] != etag
+
+    def test_profile_is_versioned_per_user(
+        self, client, user_login, django_capture_on_commit_callbacks
+    ):
+        """
+        Test a profile ETag survives other users' changes but not the owner's role changes.
+        """
+        user = user_login["user"]
+        url = reverse("user-profile", args=[user.id])
+        etag = self.get(client, url)["ETag"]
+
+        with django_capture_on_commit_callbacks(execute=True):
+            CustomUser.objects.create(email="other@example.com")
+        with CaptureQueriesContext(connection) as queries:
+            response = self.get(client, url, etag)
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert not queries
+
+        with django_capture_on_commit_callbacks(execute=True):
+            user.role.add(Role.objects.create(name="viewer"))
+        assert self.get(client, url, etag).status_code == status.HTTP_200_OK
+
+    def test_other_users_profile_gets_no_etag(self, client, user_login):
+        """
+        Test a forbidden profile read is still a 403, not a 304.
+        """
+        other = CustomUser.objects.create(email="other@example.com")
+        response = self.get(client, reverse("user-profile", args=[other.id]), '"x"')
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+        assert not response.has_header("ETag")
+
+    def test_bump_from_another_worker_is_seen(
+        self, client, user_login, shared_cache, django_capture_on_commit_callbacks
+    ):
+        """
+        Test a change bumped through a second cache instance is not answered with a stale 304.
+        """
+        url = reverse("role-list-create")
+        etag = self.get(client, url)["ETag"]
+
+        worker = FileBasedCache(shared_cache, {})
+        with patch("utils.versions.cache", worker):
+            with django_capture_on_commit_callbacks(execute=True):
+                Role.objects.create(name="viewer")
+        response = self.get(client, url, etag)
+        assert response.status_code == status.HTTP_200_OK
+        assert response["ETag"] != etag
+
+    def test_process_local_cache_sends_no_etag(self, client, user_login, settings):
+        """
+        Test no ETag is sent, and none is honoured, while the cache is process-local.
+        """
+        settings.CACHES = {
+            "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+        }
+        url = reverse("role-list-create")
+        response = self.get(client, url)
+        assert "ETag" not in response
+        assert self.get(client, url, "*").status_code == status.HTTP_200_OK
+        assert check_shared_cache()[0].id == "cache.E001"
@@ -1,8 +1,23 @@
 # -*- coding: utf-8 -*-
 import pytest
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.core.management import call_command
+from django.utils import timezone
 from django.urls import reverse
 from rest_framework import status
-from accounts.models import CustomUser
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+from django.test import override_settings
+from accounts.models import CustomUser, BlacklistedToken, Role, RefreshTokenRecord
+from accounts.refresh_tokens import prune_refresh_tokens
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+from accounts.principals import USER_PRINCIPAL_KEY, get_user_principal
+from accounts.token_codec import TokenCodec
+from cryptography.fernet import Fernet
+from unittest.mock import Mock
+from accounts.revocation import revocation_cache, prune_expired_tokens
 from django_rest_passwordreset.models import ResetPasswordToken
 
 
@@ -24,6 +39,383 @@ class TestGetTokenDetailsView:
         assert response.json()["data"]["token_type"] == "access"
 
 
+@pytest.mark.django_db
+class TestLoginView:
+    """
+    Test cases for the RegularTokenObtainPairView login endpoint.
+    """
+
+    def setup_method(self):
+        """
+        Set up method to create an active user for login tests.
+        """
+
+        self.user = CustomUser.objects.create_user(
+            email="login@example.com", password="Hello@123", first_name="Login"
+        )
+        self.data = {"email": "login@example.com", "password": "Hello@123"}
+
+    def test_login_query_count(self, client, django_assert_num_queries):
+        """
+        Test a login should run 3 queries (user + roles, outstanding token, token rotation)
+        plus the savepoint pair from transaction.atomic.
+        """
+
+        url = reverse("access_token")
+        with django_assert_num_queries(5):
+            response = client.post(url, self.data, content_type="application/json")
+
+        assert response.status_code == status.HTTP_200_OK
+        assert settings.SIMPLE_JWT["AUTH_COOKIE"] in response.cookies
+
+    def test_login_rotates_token_without_history(self, client):
+        """
+        Test a login should rotate CustomUser.token without writing a history row.
+        """
+
+        history_count = self.user.history.count()
+        old_token = self.user.token
+        client.post(reverse("access_token"), self.data, content_type="application/json")
+
+        self.user.refresh_from_db()
+        assert self.user.token != old_token
+        assert self.user.history.count() == history_count
+
+    def test_login_with_2fa_role(self, client, mock_send_otp_email):
+        """
+        Test a login by a 2FA user should return the rotated token and no cookie.
+        """
+
+        self.user.role.add(Role.objects.create(name="2fa"))
+        url = reverse("access_token")
+        response = client.post(url, self.data, content_type="application/json")
+
+        self.user.refresh_from_db()
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["data"]["token"] == str(self.user.token)
+        assert settings.SIMPLE_JWT["AUTH_COOKIE"] not in response.cookies
+
+    def test_login_invalid_credentials(self, client):
+        """
+        Test a login with a wrong password should return 401 Unauthorized.
+        """
+
+        data = {"email": "login@example.com", "password": "Wrong@123"}
+        response = client.post(
+            reverse("access_token"), data, content_type="application/json"
+        )
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+
+@pytest.mark.django_db
+class TestRefreshTokenRotation:
+    """
+    Test cases for refresh token rotation backed by RefreshTokenRecord.
+    """
+
+    def setup_method(self):
+        """
+        Set up method to create an active user for refresh tests.
+        """
+
+        self.user = CustomUser.objects.create_user(
+            email="refresh@example.com", password="Hello@123"
+        )
+        self.data = {"email": "refresh@example.com", "password": "Hello@123"}
+
+    def login(self, client):
+        url = reverse("access_token")
+        return client.post(url, self.data, content_type="application/json").json()
+
+    def refresh(self, client, refresh):
+        url = reverse("refresh_token")
+        data = {"refresh": refresh}
+        return client.post(url, data, content_type="application/json")
+
+    def test_login_records_refresh_token(self, client):
+        """
+        Test a login should record its refresh token without touching token_blacklist.
+        """
+
+        self.login(client)
+        record = RefreshTokenRecord.objects.get()
+        assert record.user_id == self.user.id
+        assert record.expires_day == record.expires_at.date()
+        assert not OutstandingToken.objects.exists()
+
+    def test_rotated_refresh_token_cannot_be_reused(self, client):
+        """
+        Test a refresh token should be exchangeable exactly once.
+        """
+
+        refresh = self.login(client)["refresh"]
+        response = self.refresh(client, refresh)
+        assert response.status_code == status.HTTP_200_OK
+        rotated = response.json()["refresh"]
+
+        response = self.refresh(client, refresh)
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        assert self.refresh(client, rotated).status_code == status.HTTP_200_OK
+        assert RefreshTokenRecord.objects.filter(revoked_at__isnull=False).count() == 2
+
+    def test_prune_removes_past_expiry_days(self):
+        """
+        Test pruning should delete records from past expiry days only.
+        """
+
+        now = timezone.now()
+        for jti, expires_at in (("old", now - timedelta(days=2)), ("live", now)):
+            RefreshTokenRecord.objects.create(
+                jti=jti, expires_at=expires_at, expires_day=expires_at.date()
+            )
+
+        assert prune_refresh_tokens(batch_size=1) == 1
+        assert list(RefreshTokenRecord.objects.values_list("jti", flat=True)) == [
+            "live"
+        ]
+
+
+class TestTokenCodec:
+    """
+    Test cases for the access cookie TokenCodec.
+    """
+
+    def setup_method(self):
+        """
+        Set up method to create a codec with a fresh key.
+        """
+
+        self.key = Fernet.generate_key()
+        self.codec = TokenCodec([self.key], cache_size=2)
+
+    def test_round_trip_is_url_safe(self):
+        """
+        Test an encoded cookie should be plain URL-safe text that decodes back.
+        """
+
+        value = self.codec.encode("header.payload.signature")
+        assert not value.startswith("b'")
+        assert self.codec.decode(value) == "header.payload.signature"
+
+    def test_legacy_bytes_repr_cookie(self):
+        """
+        Test cookies written in the old b'...' form should still decode.
+        """
+
+        value = self.codec.encode("header.payload.signature")
+        assert self.codec.decode(f"b'{value}'") == "header.payload.signature"
+
+    def test_previous_key_still_decrypts(self):
+        """
+        Test a cookie encrypted with a rotated-out key should decode with the new codec.
+        """
+
+        value = self.codec.encode("header.payload.signature")
+        rotated = TokenCodec([Fernet.generate_key(), self.key], cache_size=2)
+        assert rotated.decode(value) == "header.payload.signature"
+
+    def test_verified_tokens_are_reused(self):
+        """
+        Test verifying the same cookie twice should validate it only once.
+        """
+
+        validate = Mock(return_value={"exp": time.time() + 60})
+        value = self.codec.encode("header.payload.signature")
+
+        first = self.codec.verify(value, validate)
+        assert self.codec.verify(value, validate) is first
+        validate.assert_called_once_with("header.payload.signature")
+
+    def test_expired_and_evicted_tokens_are_revalidated(self):
+        """
+        Test expired entries and entries beyond the LRU bound should be validated again.
+        """
+
+        validate = Mock(side_effect=lambda token: {"exp": time.time() - 1})
+        value = self.codec.encode("expired")
+        self.codec.verify(value, validate)
+        self.codec.verify(value, validate)
+        assert validate.call_count == 2
+
+        validate = Mock(side_effect=lambda token: {"exp": time.time() + 60})
+        values = [self.codec.encode(f"token-{i}") for i in range(3)]
+        for value in values:
+            self.codec.verify(value, validate)
+        self.codec.verify(values[0], validate)
+        assert validate.call_count == 4
+
+
+@pytest.mark.django_db
+class TestCachedUserPrincipal:
+    """
+    Test cases for the cached user principal used by CustomAuthentication.
+    """
+
+    def test_repeat_request_does_not_query_user(
+        self, client, user_login, django_assert_num_queries
+    ):
+        """
+        Test an authenticated request with a warm cache should not run any query.
+        """
+
+        url = reverse("get_token_details")
+        client.get(url)
+
+        with django_assert_num_queries(0):
+            response = client.get(url)
+        assert response.status_code == status.HTTP_200_OK
+
+    def test_role_change_invalidates_principal(self, user_login):
+        """
+        Test assigning or removing a role should be reflected in the principal.
+        """
+
+        user = user_login.get("user")
+        role = Role.objects.create(name="Editor")
+        assert get_user_principal(user.id).role_ids == frozenset()
+
+        user.role.add(role)
+        assert get_user_principal(user.id).role_ids == frozenset([role.id])
+
+        role.users.remove(user)
+        assert get_user_principal(user.id).role_ids == frozenset()
+
+    def test_deactivated_user_is_rejected(self, client, user_login):
+        """
+        Test a user deactivated after login should get 401 Unauthorized.
+        """
+
+        url = reverse("get_token_details")
+        client.get(url)
+        user = CustomUser.objects.get(id=user_login.get("user").id)
+        user.is_active = False
+        user.save()
+
+        response = client.get(url)
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        assert response.json()["detail"] == "User is inactive"
+
+    def test_principal_cached_before_commit_is_dropped(
+        self, user_login, django_capture_on_commit_callbacks
+    ):
+        """
+        Test a principal re-cached from the old row before the commit should not outlive it.
+        """
+
+        user = CustomUser.objects.get(id=user_login.get("user").id)
+        stale = get_user_principal(user.id)
+        with django_capture_on_commit_callbacks(execute=True):
+            user.is_active = False
+            user.save()
+            # A concurrent request that still sees the committed row caches it again.
+            cache.set(USER_PRINCIPAL_KEY.format(user.id), stale)
+
+        assert get_user_principal(user.id).is_active is False
+
+
+@pytest.mark.django_db
+class TestSessionVersioning:
+    """
+    Test cases for revoking tokens through CustomUser.session_version.
+    """
+
+    @pytest.fixture(autouse=True)
+    def enable_session_versioning(self, settings):
+        """
+        Fixture to turn session versioning on for every test in this class.
+        """
+
+        settings.TOKEN_SESSION_VERSIONING = True
+
+    def test_logout_all_revokes_existing_tokens(self, client, user_login):
+        """
+        Test reusing a cookie after logging out everywhere should return 401 Unauthorized.
+        """
+
+        url = reverse("get_token_details")
+        assert client.get(url).json()["data"][settings.SESSION_VERSION_CLAIM] == 0
+        access_cookie = client.cookies[settings.SIMPLE_JWT["AUTH_COOKIE"]].value
+
+        response = client.get(reverse("logout_all"))
+        assert response.status_code == status.HTTP_200_OK
+
+        client.cookies[settings.SIMPLE_JWT["AUTH_COOKIE"]] = access_cookie
+        response = client.get(url)
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        assert response.json()["detail"] == "Session has been revoked"
+        assert not BlacklistedToken.objects.exists()
+
+    def test_role_change_revokes_existing_tokens(self, client, user_login):
+        """
+        Test changing a user's roles should end their existing sessions.
+        """
+
+        url = reverse("get_token_details")
+        assert client.get(url).status_code == status.HTTP_200_OK
+
+        user_login.get("user").role.add(Role.objects.create(name="Editor"))
+
+        assert client.get(url).status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_role_change_revokes_once_committed(
+        self, client, user_login, shared_cache, django_capture_on_commit_callbacks
+    ):
+        """
+        Test a principal cached before the role change commits should not keep the session alive.
+        """
+
+        url = reverse("get_token_details")
+        assert client.get(url).status_code == status.HTTP_200_OK
+        user = user_login.get("user")
+        stale = get_user_principal(user.id)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            user.role.add(Role.objects.create(name="Editor"))
+            cache.set(USER_PRINCIPAL_KEY.format(user.id), stale)
+
+        assert client.get(url).status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_bump_on_another_worker_is_seen_within_the_local_ttl(
+        self, client, user_login, settings
+    ):
+        """
+        Test a bump this process's cache never hears about should be enforced once the local TTL ends.
+        """
+
+        settings.AUTH_USER_LOCAL_CACHE_TTL = 0
+        url = reverse("get_token_details")
+        assert client.get(url).status_code == status.HTTP_200_OK
+
+        CustomUser.objects.filter(id=user_login.get("user").id).update(
+            session_version=F("session_version") + 1
+        )
+
+        assert client.get(url).status_code == status.HTTP_401_UNAUTHORIZED
+
+    def test_new_login_after_bump_is_accepted(self, client, user_login):
+        """
+        Test a token issued after the version bump should be accepted.
+        """
+
+        client.get(reverse("logout_all"))
+        data = {"email": "test@gmail.com", "password": "Hello@123"}
+        client.post(reverse("access_token"), data, content_type="application/json")
+
+        response = client.get(reverse("get_token_details"))
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["data"][settings.SESSION_VERSION_CLAIM] == 1
+
+    def test_logout_all_requires_session_versioning(self, client, user_login):
+        """
+        Test logging out everywhere without session versioning should return 400 Bad Request.
+        """
+
+        with override_settings(TOKEN_SESSION_VERSIONING=False):
+            response = client.get(reverse("logout_all"))
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.json()["error"] == ["Session versioning is not enabled"]
+
+
 @pytest.mark.django_db
 class TestLogoutView:
     """
@@ -42,6 +434,97 @@ class TestLogoutView:
         assert response.json()["message"] == "success"
         assert response.json()["data"][0] == "You have been Successfully logged out"
 
+    def test_logged_out_token_is_rejected(self, client, user_login):
+        """
+        Test reusing an access cookie after logout should return 401 Unauthorized.
+        """
+
+        access_cookie = client.cookies[settings.SIMPLE_JWT["AUTH_COOKIE"]].value
+        client.get(reverse("logout"))
+        client.cookies[settings.SIMPLE_JWT["AUTH_COOKIE"]] = access_cookie
+
+        response = client.get(reverse("get_token_details"))
+
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        assert response.json()["detail"] == "Token is blacklisted"
+
+    @override_settings(TOKEN_REVOCATION_REFRESH_INTERVAL=0)
+    def test_token_revoked_by_another_worker_is_rejected(self, client, user_login):
+        """
+        Test a token blacklisted outside this process is rejected once the cache refreshes.
+        """
+
+        url = reverse("get_token_details")
+        assert client.get(url).status_code == status.HTTP_200_OK
+
+        payload = client.get(url).json()["data"]
+        BlacklistedToken.objects.create(
+            jti=payload["jti"],
+            expires_at=datetime.fromtimestamp(payload["exp"], tz=dt_timezone.utc),
+        )
+
+        response = client.get(url)
+        assert response.status_code == status.HTTP_401_UNAUTHORIZED
+        assert response.json()["detail"] == "Token is blacklisted"
+
+    @override_settings(TOKEN_REVOCATION_REFRESH_INTERVAL=60)
+    def test_unrevoked_token_skips_blacklist_query(
+        self, client, user_login, django_assert_max_num_queries
+    ):
+        """
+        Test authenticating a valid token should not query the blacklist table once cached.
+        """
+
+        url = reverse("get_token_details")
+        client.get(url)
+
+        with django_assert_max_num_queries(0):
+            revocation_cache.is_revoked("not-a-revoked-token")
+
+
+@pytest.mark.django_db
+class TestBlacklistPruning:
+    """
+    Test cases for pruning expired blacklisted tokens.
+    """
+
+    def setup_method(self):
+        """
+        Set up method to create expired and live blacklist entries.
+        """
+
+        now = timezone.now()
+        BlacklistedToken.objects.bulk_create(
+            BlacklistedToken(jti=f"expired-{i}", expires_at=now - timedelta(hours=1))
+            for i in range(5)
+        )
+        BlacklistedToken.objects.create(jti="live", expires_at=now + timedelta(hours=1))
+
+    def test_prune_deletes_only_expired_tokens(self):
+        """
+        Test pruning in small batches should delete every expired entry and keep live ones.
+        """
+
+        assert prune_expired_tokens(batch_size=2) == 5
+        assert list(BlacklistedToken.objects.values_list("jti", flat=True)) == ["live"]
+
+    def test_prune_command(self):
+        """
+        Test the management command should prune expired entries.
+        """
+
+        call_command("prune_blacklisted_tokens", batch_size=3)
+        assert BlacklistedToken.objects.count() == 1
+
+    def test_expired_entries_are_not_cached(self):
+        """
+        Test the revocation cache should only hold tokens that are still valid.
+        """
+
+        revocation_cache.refresh()
+        assert revocation_cache.is_revoked("live")
+        assert not revocation_cache.is_revoked("expired-0")
+
 
 @pytest.mark.django_db
 class TestPasswordResetEndpoints:
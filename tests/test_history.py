@@ -0,0 +1,427 @@
+# -*- coding: utf-8 -*-
+import json
+import uuid
+from datetime import timedelta
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+from django.db import DatabaseError, connection, transaction
+from django.db.models import QuerySet
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from accounts.models import CustomUser, EmailOtp, Module, Role
+from django.core.management import call_command
+from unittest.mock import patch
+from utils.history import history_as_of, history_disabled, history_rows
+from utils.history_archive import archive_history, segment_indexes, write_segment
+
+
+@pytest.mark.django_db
+class TestTrackedHistory:
+    """
+    Test cases for history tracking that skips no-op and volatile saves.
+    """
+
+    @pytest.fixture(autouse=True)
+    def write_history_immediately(self, settings):
+        settings.HISTORY_BUFFERING = False
+
+    def test_unchanged_save_writes_no_history(self):
+        """
+        Test saving a model whose tracked fields did not change adds no historical row.
+        """
+        module = Module.objects.create(name="events")
+        module.save()
+        Module.objects.get(pk=module.pk).save()
+        assert module.history.count() == 1
+
+        module = Module.objects.get(pk=module.pk)
+        module.name = "tickets"
+        module.save()
+        assert module.history.count() == 2
+        assert module.history.first().name == "tickets"
+
+    def test_excluded_fields_are_not_tracked(self):
+        """
+        Test token and password changes on a user write no historical row.
+        """
+        user = CustomUser.objects.create(email="test@gmail.com", first_name="Test")
+        user = CustomUser.objects.get(pk=user.pk)
+        user.token = uuid.uuid4()
+        user.set_password("Hello@123")
+        user.save()
+        assert user.history.count() == 1
+        assert not hasattr(user.history.first(), "token")
+
+        user.first_name = "Changed"
+        user.save()
+        assert user.history.count() == 2
+
+    def test_history_can_be_turned_off(self):
+        """
+        Test history is skipped for models with track_history off and inside history_disabled().
+        """
+        otp = EmailOtp.objects.create(email="test@gmail.com", otp="1234")
+        otp.is_valid = True
+        otp.save()
+        assert EmailOtp.history.count() == 0
+
+        with history_disabled():
+            module = Module.objects.create(name="events")
+            module.delete()
+        assert Module.history.count() == 0
+
+
+@pytest.mark.django_db
+class TestHistoryBuffer:
+    """
+    Test cases for historical rows buffered until the transaction commits.
+    """
+
+    def test_rows_are_bulk_written_on_commit(self, django_capture_on_commit_callbacks):
+        """
+        Test history is written after commit with one insert per historical model.
+        """
+        with django_capture_on_commit_callbacks() as callbacks:
+            with transaction.atomic():
+                for name in ("events", "tickets", "venues"):
+                    Module.objects.create(name=name)
+                Role.objects.create(name="admin")
+                Role.objects.create(name="staff")
+        assert Module.history.count() == 0
+
+        with CaptureQueriesContext(connection) as queries:
+            for callback in callbacks:
+                callback()
+        inserts = [q for q in queries if q["sql"].startswith("INSERT")]
+        assert len(inserts) == 2
+        assert Module.history.count() == 3
+        assert Role.history.count() == 2
+
+    def test_user_and_date_are_kept(self, django_capture_on_commit_callbacks):
+        """
+        Test buffered rows keep the user and time of the change, not of the flush.
+        """
+        user = CustomUser.objects.create(email="test@gmail.com", first_name="Test")
+        with django_capture_on_commit_callbacks() as callbacks:
+            with transaction.atomic():
+                module = Module(name="events")
+                module._history_user = user
+                module.save()
+        changed_before = timezone.now()
+        for callback in callbacks:
+            callback()
+
+        record = module.history.get()
+        assert record.history_user == user
+        assert record.history_date < changed_before
+
+    def test_rolled_back_savepoint_is_not_written(
+        self, django_capture_on_commit_callbacks
+    ):
+        """
+        Test rows recorded in a rolled back savepoint are dropped while the rest are written.
+        """
+        with django_capture_on_commit_callbacks(execute=True):
+            with transaction.atomic():
+                Module.objects.create(name="events")
+                try:
+                    with transaction.atomic():
+                        Module.objects.create(name="tickets")
+                        raise ValueError
+                except ValueError:
+                    pass
+                Module.objects.create(name="venues")
+
+        assert sorted(Module.history.values_list("name", flat=True)) == [
+            "events",
+            "venues",
+        ]
+
+    def test_failed_flush_is_raised(self, django_capture_on_commit_callbacks):
+        """
+        Test a history write that fails after commit raises instead of only being logged.
+        """
+        with patch.object(QuerySet, "bulk_create", side_effect=DatabaseError):
+            with pytest.raises(DatabaseError):
+                with django_capture_on_commit_callbacks(execute=True):
+                    with transaction.atomic():
+                        Module.objects.create(name="events")
+
+    def test_commit_hook_shape_is_pinned(self):
+        """
+        Test Django still queues on-commit hooks as (savepoint ids, func, robust) and drops them by savepoint.
+        """
+
+        def kept():
+            pass
+
+        def dropped():
+            pass
+
+        with transaction.atomic():
+            with transaction.atomic():
+                transaction.on_commit(kept)
+                assert connection.run_on_commit[-1] == (
+                    set(connection.savepoint_ids),
+                    kept,
+                    False,
+                )
+            try:
+                with transaction.atomic():
+                    transaction.on_commit(dropped)
+                    raise ValueError
+            except ValueError:
+                pass
+            assert [hook[1] for hook in connection.run_on_commit] == [kept]
+
+    def test_unexpected_hook_shape_fails_loudly(self):
+        """
+        Test buffering refuses to guess when on-commit hooks are not shaped as expected.
+        """
+
+        def on_commit(func, robust=False):
+            connection.run_on_commit.append((func, robust))
+
+        with transaction.atomic():
+            with patch.object(connection, "on_commit", on_commit):
+                with pytest.raises(ImproperlyConfigured):
+                    Module.objects.create(name="events")
+            connection.run_on_commit[:] = [
+                hook for hook in connection.run_on_commit if len(hook) == 3
+            ]
+
+
+@pytest.mark.django_db
+class TestHistoryDataListView:
+    """
+    Test cases for the streamed history endpoint.
+    """
+
+    @pytest.fixture(autouse=True)
+    def write_history_immediately(self, settings):
+        settings.HISTORY_BUFFERING = False
+
+    def fetch(self, client, accept="application/json", **params):
+        response = client.get(reverse("history-data-list"), params, HTTP_ACCEPT=accept)
+        return response, b"".join(response.streaming_content)
+
+    def test_pages_with_history_id_cursor(self, client, user_login):
+        """
+        Test rows are streamed in history_id order, limited and resumable with after.
+        """
+        for name in ("admin", "staff", "guest"):
+            Role.objects.create(name=name)
+
+        response, body = self.fetch(client, model="Role", limit=2)
+        assert response.status_code == 200
+        rows = json.loads(body)
+        assert [row["name"] for row in rows] == ["admin", "staff"]
+
+        _, body = self.fetch(client, model="role", after=rows[-1]["history_id"])
+        assert [row["name"] for row in json.loads(body)] == ["guest"]
+
+        _, body = self.fetch(client, model="role", after=rows[-1]["history_id"] + 5)
+        assert json.loads(body) == []
+
+    def test_filters_and_ndjson(self, client, user_login):
+        """
+        Test object and time filters, and newline-delimited output on request.
+        """
+        role = Role.objects.create(name="admin")
+        role.name = "owner"
+        role.save()
+        Role.objects.create(name="staff")
+
+        response, body = self.fetch(
+            client, accept="application/x-ndjson", model="role", object_id=role.pk
+        )
+        assert response["Content-Type"] == "application/x-ndjson"
+        rows = [json.loads(line) for line in body.decode().splitlines()]
+        assert [(row["name"], row["history_type"]) for row in rows] == [
+            ("admin", "+"),
+            ("owner", "~"),
+        ]
+
+        _, body = self.fetch(
+            client, model="role", since=(timezone.now() + timedelta(minutes=1))
+        )
+        assert json.loads(body) == []
+
+    def test_invalid_requests(self, client, user_login):
+        """
+        Test unknown models and malformed ids are rejected and anonymous clients are refused.
+        """
+        response = client.get(reverse("history-data-list"), {"model": "nothing"})
+        assert response.status_code == 400
+
+        response = client.get(
+            reverse("history-data-list"), {"model": "role", "object_id": "abc"}
+        )
+        assert response.status_code == 400
+        assert "object_id" in response.json()
+
+        client.cookies.clear()
+        response = client.get(reverse("history-data-list"), {"model": "role"})
+        assert response.status_code in (401, 403)
+
+
+@pytest.mark.django_db
+class TestHistoryAsOf:
+    """
+    Test cases for reconstructing tracked objects as of a moment.
+    """
+
+    @pytest.fixture(autouse=True)
+    def role_history(self, settings):
+        """
+        Set up roles changed, created and deleted at known times.
+        """
+        settings.HISTORY_BUFFERING = False
+        self.start = timezone.now() - timedelta(days=3)
+
+        def at(instance, days):
+            instance._history_date = self.start + timedelta(days=days)
+            return instance
+
+        self.admin = at(Role(name="admin"), 0)
+        self.admin.save()
+        at(self.admin, 2).name = "owner"
+        self.admin.save()
+        self.staff = at(Role(name="staff"), 1)
+        self.staff.save()
+        self.staff_id = self.staff.pk
+        at(self.staff, 2).delete()
+
+    def names_at(self, days, **kwargs):
+        when = self.start + timedelta(days=days, hours=1)
+        rows = history_as_of(Role.history.model, when, **kwargs)
+        return [row["name"] for row in rows]
+
+    def test_latest_row_per_object(self, django_assert_num_queries):
+        """
+        Test each object is returned as its last state up to the moment, in one query.
+        """
+        with django_assert_num_queries(1):
+            assert self.names_at(-1) == []
+        assert self.names_at(0) == ["admin"]
+        assert self.names_at(1) == ["admin", "staff"]
+        assert self.names_at(2) == ["owner"]
+        assert self.names_at(1, object_ids=[self.staff_id]) == ["staff"]
+        assert self.names_at(1, after=self.admin.pk) == ["staff"]
+
+    def test_as_of_endpoint(self, client, user_login):
+        """
+        Test the endpoint streams the reconstructed objects.
+        """
+        response = client.get(
+            reverse("history-as-of"),
+            {"model": "role", "at": self.start + timedelta(days=1, hours=1)},
+        )
+        assert response.status_code == 200
+        rows = json.loads(b"".join(response.streaming_content))
+        assert [(row["id"], row["name"]) for row in rows] == [
+            (self.admin.pk, "admin"),
+            (self.staff_id, "staff"),
+        ]
+
+        response = client.get(reverse("history-as-of"), {"model": "role"})
+        assert response.status_code == 400
+
+        response = client.get(
+            reverse("history-as-of"),
+            {"model": "role", "at": self.start, "object_ids": ["1", "abc"]},
+        )
+        assert response.status_code == 400
+        assert "object_ids" in response.json()
+
+
+@pytest.mark.django_db
+class TestHistoryArchive:
+    """
+    Test cases for archiving cold history into segment files.
+    """
+
+    @pytest.fixture(autouse=True)
+    def role_history(self, settings, tmp_path):
+        """
+        Set up role history spread over the last ten days.
+        """
+        settings.HISTORY_BUFFERING = False
+        settings.HISTORY_ARCHIVE_DIR = str(tmp_path)
+        self.start = timezone.now() - timedelta(days=10)
+        self.role = Role(name="v0")
+        for day in range(10):
+            self.role._history_date = self.start + timedelta(days=day)
+            self.role.name = f"v{day}"
+            self.role.save()
+
+    def test_archive_and_read_back(self, tmp_path):
+        """
+        Test old rows move into segments with sidecars and reads still return them.
+        """
+        call_command(
+            "archive_history", model=["role"], older_than_days=5, segment_rows=2
+        )
+
+        segments = sorted(
+            path.name for path in tmp_path.glob("accounts/historicalrole/*")
+        )
+        assert len([name for name in segments if name.endswith(".ndjson.gz")]) == 3
+        assert len([name for name in segments if name.endswith(".index.json")]) == 3
+        assert Role.history.count() == 4
+
+        rows = list(history_rows(Role.history.model))
+        assert [row["name"] for row in rows] == [f"v{day}" for day in range(10)]
+        rows = list(
+            history_rows(Role.history.model, after=rows[1]["history_id"], limit=3)
+        )
+        assert [row["name"] for row in rows] == ["v2", "v3", "v4"]
+        rows = history_rows(Role.history.model, until=self.start + timedelta(days=2))
+        assert [row["name"] for row in rows] == ["v0", "v1"]
+
+    def test_zero_days_archives_everything(self):
+        """
+        Test an explicit zero age archives every row instead of falling back to the default.
+        """
+        assert archive_history(Role.history.model, older_than=timedelta(0)) == 10
+        assert Role.history.count() == 0
+
+    def test_indexes_are_parsed_again_only_when_segments_change(self):
+        """
+        Test repeated reads reuse the parsed sidecars until a new segment is written.
+        """
+        history_model = Role.history.model
+        archive_history(history_model, older_than=timedelta(days=5))
+        assert len(segment_indexes(history_model)) == 1
+
+        with patch("utils.history_archive.json.load") as load:
+            segment_indexes(history_model)
+        load.assert_not_called()
+
+        archive_history(history_model, older_than=timedelta(0))
+        assert len(segment_indexes(history_model)) == 2
+
+    def test_as_of_reads_segments(self):
+        """
+        Test point-in-time reads use archived rows when the table no longer has them.
+        """
+        archive_history(Role.history.model, older_than=timedelta(days=5))
+        history_model = Role.history.model
+
+        rows = history_as_of(history_model, self.start + timedelta(days=2, hours=1))
+        assert [row["name"] for row in rows] == ["v2"]
+        rows = history_as_of(history_model, timezone.now())
+        assert [row["name"] for row in rows] == ["v9"]
+        rows = history_as_of(history_model, self.start, after=self.role.pk)
+        assert list(rows) == []
+
+    def test_rows_in_table_and_segment_are_not_repeated(self):
+        """
+        Test a row left in the table after its segment was written is returned once.
+        """
+        rows = list(Role.history.model.objects.order_by("history_id").values()[:3])
+        write_segment(Role.history.model, rows)
+
+        names = [row["name"] for row in history_rows(Role.history.model)]
+        assert names == [f"v{day}" for day in range(10)]
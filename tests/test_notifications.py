@@ -0,0 +1,226 @@
+# -*- coding: utf-8 -*-
+import pytest
+import smtplib
+from unittest.mock import MagicMock, patch
+from django.core import mail
+from django.core.mail import EmailMessage
+from django.urls import reverse
+from notifications.common import create_notification
+from notifications.models import Notification
+from notifications.writer import notification_writer
+from utils.email_dispatcher import EmailDispatcher, flush_on_exit
+from utils.enums import Enums
+
+
+SIGNUP_DATA = {
+    "email": "test_dispatch@gmail.com",
+    "password": "Hello@123",
+    "password2": "Hello@123",
+    "first_name": "Test",
+    "last_name": "User",
+    "gender": 1,
+}
+
+
+@pytest.mark.django_db
+class TestEmailDispatcher:
+    """
+    Test cases for the background email dispatcher.
+    """
+
+    @pytest.fixture(autouse=True)
+    def inline_dispatch(self, settings):
+        settings.EMAIL_DISPATCHER_WORKERS = 0
+        settings.EMAIL_DISPATCHER_MAX_RETRIES = 2
+        settings.EMAIL_DISPATCHER_RETRY_BACKOFF = 0
+        settings.NOTIFICATION_BUFFER_FLUSH_INTERVAL = 60
+
+    def test_otp_email_is_sent_after_commit(
+        self, client, django_capture_on_commit_callbacks
+    ):
+        """
+        Test the OTP email goes out once the request commits and marks its notification sent.
+        """
+        with django_capture_on_commit_callbacks(execute=True):
+            response = client.post(
+                reverse("signup"), SIGNUP_DATA, content_type="application/json"
+            )
+        assert response.status_code == 200
+        assert len(mail.outbox) == 1
+        assert mail.outbox[0].to == [SIGNUP_DATA["email"]]
+        assert notification_writer.flush() == 1
+        notification = Notification.objects.get(email=SIGNUP_DATA["email"])
+        assert notification.message == Enums.SIGN_UP_OTP_EMAIL.value
+        assert notification.is_sent is True
+
+    def test_email_is_not_sent_before_commit(
+        self, client, django_capture_on_commit_callbacks
+    ):
+        """
+        Test nothing is sent or recorded while the transaction is still open.
+        """
+        with django_capture_on_commit_callbacks() as callbacks:
+            client.post(reverse("signup"), SIGNUP_DATA, content_type="application/json")
+        assert callbacks
+        assert mail.outbox == []
+        assert notification_writer.flush() == 0
+
+    def test_failed_delivery_is_retried_and_recorded(
+        self, client, django_capture_on_commit_callbacks
+    ):
+        """
+        Test SMTP errors are retried, then stored on the notification instead of failing the request.
+        """
+        connection = MagicMock()
+        connection.send_messages.side_effect = OSError("connection refused")
+        with patch("utils.email_dispatcher.get_connection", return_value=connection):
+            with django_capture_on_commit_callbacks(execute=True):
+                response = client.post(
+                    reverse("signup"), SIGNUP_DATA, content_type="application/json"
+                )
+        assert response.status_code == 200
+        assert connection.send_messages.call_count == 3
+        notification_writer.flush()
+        notification = Notification.objects.get(email=SIGNUP_DATA["email"])
+        assert notification.is_sent is False
+        assert notification.api_response == "Email delivery failed: connection refused"
+
+    def test_failing_message_does_not_resend_or_block_its_batch(
+        self, django_capture_on_commit_callbacks
+    ):
+        """
+        Test only the failing middle message of a batch is retried, and each outcome is recorded on its own.
+        """
+
+        def send_messages(messages):
+            if messages[0].subject == "1":
+                raise OSError("mailbox unavailable")
+            return len(messages)
+
+        connection = MagicMock()
+        connection.send_messages.side_effect = send_messages
+        batch = [
+            (
+                EmailMessage(subject=str(index), to=[f"user{index}@b.com"]),
+                Enums.SIGN_UP_OTP_EMAIL.value,
+            )
+            for index in range(3)
+        ]
+        with patch("utils.email_dispatcher.get_connection", return_value=connection):
+            with django_capture_on_commit_callbacks(execute=True):
+                EmailDispatcher().deliver(batch)
+
+        sent = [
+            message.subject
+            for call in connection.send_messages.call_args_list
+            for message in call.args[0]
+        ]
+        assert sent == ["0", "1", "1", "1", "2"]
+        notification_writer.flush()
+        outcomes = dict(Notification.objects.values_list("email", "is_sent"))
+        assert outcomes == {
+            "user0@b.com": True,
+            "user1@b.com": False,
+            "user2@b.com": True,
+        }
+
+    def test_refused_recipient_is_not_retried(self):
+        """
+        Test a message whose recipient the server refuses fails at once.
+        """
+        connection = MagicMock()
+        connection.send_messages.side_effect = smtplib.SMTPRecipientsRefused(
+            {"user@b.com": (550, b"no such user")}
+        )
+        message = EmailMessage(subject="refused", to=["user@b.com"])
+        with patch("utils.email_dispatcher.get_connection", return_value=connection):
+            assert EmailDispatcher().deliver([(message, None)]) is None
+        assert connection.send_messages.call_count == 1
+
+    def test_workers_reuse_one_connection(self, settings):
+        """
+        Test a worker thread sends queued messages in batches over a single connection.
+        """
+        settings.EMAIL_DISPATCHER_WORKERS = 1
+        connection = MagicMock()
+        dispatcher = EmailDispatcher()
+        with patch("utils.email_dispatcher.get_connection", return_value=connection):
+            for index in range(5):
+                dispatcher.submit(EmailMessage(subject=str(index), to=["a@b.com"]))
+            assert dispatcher.flush(timeout=5)
+        assert connection.open.call_count == 1
+        sent = [
+            message.subject
+            for call in connection.send_messages.call_args_list
+            for message in call.args[0]
+        ]
+        assert sent == ["0", "1", "2", "3", "4"]
+
+    def test_exit_hook_records_email_still_queued(self, settings):
+        """
+        Test the shutdown hook delivers queued email before writing the notifications it records.
+        """
+        settings.EMAIL_DISPATCHER_WORKERS = 1
+        dispatcher = EmailDispatcher()
+        with patch("utils.email_dispatcher.email_dispatcher", dispatcher):
+            dispatcher.submit(
+                EmailMessage(subject="otp", to=["late@b.com"]),
+                Enums.SIGN_UP_OTP_EMAIL.value,
+            )
+            flush_on_exit()
+        assert Notification.objects.filter(email="late@b.com", is_sent=True).exists()
+
+
+@pytest.mark.django_db
+class TestNotificationWriter:
+    """
+    Test cases for the buffered notification writer.
+    """
+
+    @pytest.fixture(autouse=True)
+    def buffer_settings(self, settings):
+        settings.NOTIFICATION_BUFFER_SIZE = 3
+        settings.NOTIFICATION_BUFFER_FLUSH_INTERVAL = 60
+
+    def record(self, django_capture_on_commit_callbacks, count):
+        with django_capture_on_commit_callbacks(execute=True):
+            for index in range(count):
+                create_notification(
+                    f"user{index}@gmail.com",
+                    Enums.EMAIL.value,
+                    Enums.LOGIN_OTP_EMAIL.value,
+                )
+
+    def test_rows_are_buffered_until_flush(self, django_capture_on_commit_callbacks):
+        """
+        Test committed notifications are held back until the buffer is flushed.
+        """
+        self.record(django_capture_on_commit_callbacks, 2)
+        assert Notification.objects.count() == 0
+        assert notification_writer.flush() == 2
+        assert Notification.objects.count() == 2
+        assert Notification.history.count() == 2
+
+    def test_full_buffer_is_written_in_one_batch(
+        self, django_capture_on_commit_callbacks, django_assert_max_num_queries
+    ):
+        """
+        Test reaching the size threshold writes the rows and their history in bulk.
+        """
+        with django_assert_max_num_queries(4):
+            self.record(django_capture_on_commit_callbacks, 3)
+        assert Notification.objects.count() == 3
+        assert notification_writer.flush() == 0
+
+    def test_rolled_back_notifications_are_dropped(
+        self, django_capture_on_commit_callbacks
+    ):
+        """
+        Test notifications created in a transaction that never commits are not written.
+        """
+        with django_capture_on_commit_callbacks(execute=False):
+            create_notification(
+                "user@gmail.com", Enums.EMAIL.value, Enums.LOGIN_OTP_EMAIL.value
+            )
+        assert notification_writer.flush() == 0
+        assert Notification.objects.count() == 0
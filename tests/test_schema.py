@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+import brotli
+import gzip
+import json
+import pytest
+from unittest.mock import patch
+from django.core.management import CommandError, call_command
+from utils import schema
+from utils.schema import PrecomputedSchema, check_schema, generate_schema
+
+
+@pytest.mark.django_db
+class TestPrecomputedSchema:
+    """
+    Test cases for serving the OpenAPI schema from a precomputed copy.
+    """
+
+    @pytest.fixture(autouse=True)
+    def schema_file(self, settings, tmp_path):
+        settings.API_SCHEMA_FILE = str(tmp_path / "openapi.json")
+        schema.reset_schema()
+        yield tmp_path / "openapi.json"
+        schema.reset_schema()
+
+    def fetch(self, client, **headers):
+        return client.get("/api/swagger/", {"format": "openapi"}, **headers)
+
+    def test_schema_is_generated_once(self, client):
+        """
+        Test repeated schema requests walk the views only for the first one.
+        """
+        with patch("utils.schema.generate_schema", wraps=generate_schema) as generate:
+            first = self.fetch(client)
+            second = self.fetch(client)
+        assert generate.call_count == 1
+        assert first.content == second.content
+        assert json.loads(first.content)["info"]["title"] == "APIs"
+
+    def test_written_schema_is_served_without_introspection(self, client, schema_file):
+        """
+        Test a schema written by the management command is served as is.
+        """
+        call_command("generate_schema")
+        assert schema_file.with_name("openapi.json.gz").is_file()
+        with patch("utils.schema.generate_schema") as generate:
+            response = self.fetch(client)
+        generate.assert_not_called()
+        assert response.content == schema_file.read_bytes()
+
+    def test_gzip_variant_and_not_modified(self, client):
+        """
+        Test gzip clients get the precomputed variant and a matching ETag gets 304.
+        """
+        response = self.fetch(client, HTTP_ACCEPT_ENCODING="gzip, deflate")
+        assert response["Content-Encoding"] == "gzip"
+        assert "Accept-Encoding" in response["Vary"]
+        assert gzip.decompress(response.content) == self.fetch(client).content
+
+        response = self.fetch(
+            client, HTTP_ACCEPT_ENCODING="gzip", HTTP_IF_NONE_MATCH=response["ETag"]
+        )
+        assert response.status_code == 304
+
+    def test_brotli_variant_is_preferred(self, client):
+        """
+        Test brotli clients get the precomputed br variant with its own ETag.
+        """
+        response = self.fetch(client, HTTP_ACCEPT_ENCODING="gzip, br")
+        assert response["Content-Encoding"] == "br"
+        assert brotli.decompress(response.content) == self.fetch(client).content
+        assert response["ETag"].endswith('-br"')
+
+    def test_each_encoding_has_its_own_etag(self, client):
+        """
+        Test the plain and gzip bodies carry different ETags and one never validates the other.
+        """
+        plain = self.fetch(client)
+        gzipped = self.fetch(client, HTTP_ACCEPT_ENCODING="gzip")
+        assert plain["ETag"] != gzipped["ETag"]
+
+        response = self.fetch(client, HTTP_IF_NONE_MATCH=gzipped["ETag"])
+        assert response.status_code == 200
+        assert response.content == plain.content
+
+    def test_refused_encoding_is_not_used(self, client):
+        """
+        Test an encoding the client gives q=0 is not sent.
+        """
+        response = self.fetch(client, HTTP_ACCEPT_ENCODING="gzip;q=0, identity")
+        assert not response.has_header("Content-Encoding")
+
+    def test_stale_schema_fails_the_check(self, schema_file):
+        """
+        Test the command and the deploy check reject a schema that no longer matches the views.
+        """
+        assert check_schema()[0].id == "api_schema.W001"
+        call_command("generate_schema")
+        call_command("generate_schema", "--check")
+        assert check_schema() == []
+
+        PrecomputedSchema(schema_file.read_bytes() + b" ").write(schema_file)
+        with pytest.raises(CommandError, match="stale"):
+            call_command("generate_schema", "--check")
+        assert check_schema()[0].id == "api_schema.E001"
@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+from django.core import checks
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+# Backends whose entries each worker process keeps to itself.
+PROCESS_LOCAL_BACKENDS = (LocMemCache, DummyCache)
+
+
+def is_shared(alias="default"):
+    """Whether every worker process reads and writes the same entries in cache ``alias``."""
+
+    return not isinstance(caches[alias], PROCESS_LOCAL_BACKENDS)
+
+
+def check_shared_cache(app_configs=None, **kwargs):
+    """Deploy check: the default cache must be shared by every worker.
+
+    ETag version counters, cached principals and throttle counters all live
+    there; in a process-local cache a change made on one worker goes unseen
+    on the others.
+    """
+
+    if is_shared():
+        return []
+    return [
+        checks.Error(
+            f"The default cache ({type(caches['default']).__name__}) is process-local.",
+            hint="Set CACHE_URL to a Redis or Memcached server every worker can reach.",
+            id="cache.E001",
+        )
+    ]
@@ -0,0 +1,224 @@
+# -*- coding: utf-8 -*-
+from collections import defaultdict
+from functools import lru_cache
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+from django.db import models
+from rest_framework import serializers
+
+# Serializer fields whose ``to_representation`` returns database values unchanged.
+PASSTHROUGH_FIELDS = (
+    serializers.BooleanField,
+    serializers.CharField,
+    serializers.EmailField,
+    serializers.IntegerField,
+    serializers.ReadOnlyField,
+)
+
+
+class CompiledSerializer:
+    """The read path of a ``ModelSerializer``, compiled into a ``values()`` projection.
+
+    Every readable field becomes a column of the projection, an entry of one
+    generated row-to-dict function and, unless the field returns database
+    values as they are, a call to that field's ``to_representation``. Nested
+    ``many=True`` serializers over a forward many-to-many field are fetched
+    with one query on the through table per batch of rows. The output matches
+    ``serializer_class(instances, many=True).data`` exactly.
+
+    Fields that cannot be compiled this way raise ``ImproperlyConfigured`` when
+    the serializer is compiled.
+    """
+
+    def __init__(self, serializer):
+        self.serializer_class = type(serializer)
+        self.model = serializer.Meta.model
+        self.pk_column = self.model._meta.pk.attname
+        self.columns = [self.pk_column]
+        self.converters = []
+        self.relations = []
+        self.entries = []
+        self.functions = {}
+        for field in serializer._readable_fields:
+            if isinstance(field, serializers.ListSerializer):
+                self.compile_relation(field)
+            else:
+                self.compile_field(field)
+        self.ordering = self.model._meta.ordering
+        if not all(isinstance(name, str) for name in self.ordering):
+            self.fail(None, "its model is ordered by an expression")
+        self.row_function("")
+
+    def fail(self, field, reason):
+        name = self.serializer_class.__name__
+        if field is not None:
+            name = f"{name}.{field.field_name}"
+        raise ImproperlyConfigured(f"Cannot compile {name}: {reason}.")
+
+    def model_field(self, field, model, name):
+        try:
+            return model._meta.get_field(name)
+        except FieldDoesNotExist:
+            self.fail(field, f"'{name}' is not a field of {model.__name__}")
+
+    def compile_field(self, field):
+        if not field.source_attrs:
+            self.fail(field, "source='*' is not supported")
+
+        model = self.model
+        *hops, name = field.source_attrs
+        for hop in hops:
+            model_field = self.model_field(field, model, hop)
+            if not model_field.many_to_one or model_field.null:
+                self.fail(field, f"'{hop}' is not a required foreign key")
+            model = model_field.related_model
+
+        model_field = self.model_field(field, model, name)
+        if model_field.is_relation:
+            if not (
+                type(field) is serializers.PrimaryKeyRelatedField
+                and field.pk_field is None
+                and model_field.many_to_one
+            ):
+                self.fail(field, "only primary keys of foreign keys are supported")
+            converter = None
+        elif type(field) in PASSTHROUGH_FIELDS:
+            converter = None
+        elif isinstance(field, serializers.Field) and not isinstance(
+            field, (serializers.RelatedField, serializers.ManyRelatedField)
+        ):
+            converter = len(self.converters)
+            self.converters.append(field.to_representation)
+        else:
+            self.fail(field, f"{type(field).__name__} is not supported")
+
+        column = "__".join([*hops, name])
+        if column not in self.columns:
+            self.columns.append(column)
+        self.entries.append((field.field_name, column, converter))
+
+    def compile_relation(self, field):
+        if len(field.source_attrs) != 1:
+            self.fail(field, "nested serializers need a plain source")
+        model_field = self.model_field(field, self.model, field.source_attrs[0])
+        if not isinstance(model_field, models.ManyToManyField):
+            self.fail(field, "nested serializers must be over a many-to-many field")
+
+        child = CompiledSerializer(field.child)
+        if child.model is not model_field.related_model:
+            self.fail(
+                field, f"{type(field.child).__name__} is not for the related model"
+            )
+        through = model_field.remote_field.through
+        owner = through._meta.get_field(model_field.m2m_field_name()).attname
+        prefix = model_field.m2m_reverse_field_name() + "__"
+        child.row_function(prefix)
+        self.relations.append((through, owner, prefix, child))
+        self.entries.append((field.field_name, None, len(self.relations) - 1))
+
+    def row_function(self, prefix):
+        """Return ``to_dict(row, related)`` for rows whose columns are named ``prefix + column``."""
+
+        function = self.functions.get(prefix)
+        if function is not None:
+            return function
+
+        pk = repr(prefix + self.pk_column)
+        items = []
+        for key, column, index in self.entries:
+            if column is None:
+                value = f"related[{index}].get(row[{pk}], [])"
+            elif index is None:
+                value = f"row[{prefix + column!r}]"
+            else:
+                value = (
+                    f"None if (value := row[{prefix + column!r}]) is None"
+                    f" else convert_{index}(value)"
+                )
+            items.append(f"{key!r}: {value}")
+        source = "def to_dict(row, related):\n    return {%s}\n" % ", ".join(items)
+        namespace = {f"convert_{index}": c for index, c in enumerate(self.converters)}
+        exec(source, namespace)
+        function = self.functions[prefix] = namespace["to_dict"]
+        return function
+
+    def project(self, queryset):
+        """Return ``queryset`` as the ``values()`` rows that ``serialize`` expects."""
+
+        return queryset.prefetch_related(None).values(*self.columns)
+
+    def serialize(self, rows, prefix=""):
+        """Return the representation of each row of ``project``, in order.
+
+        Nested lists are fetched with one query per relation for all ``rows``.
+        """
+
+        rows = list(rows)
+        pks = [row[prefix + self.pk_column] for row in rows]
+        related = [self.fetch(pks, *relation) for relation in self.relations]
+        to_dict = self.row_function(prefix)
+        return [to_dict(row, related) for row in rows]
+
+    def fetch(self, pks, through, owner, prefix, child):
+        if not pks:
+            return {}
+        ordering = [
+            ("-" if name.startswith("-") else "")
+            + prefix
+            + (child.pk_column if name.lstrip("-") == "pk" else name.lstrip("-"))
+            for name in child.ordering
+        ]
+        rows = list(
+            through.objects.filter(**{f"{owner}__in": pks})
+            .values(owner, *(prefix + column for column in child.columns))
+            .order_by(*ordering)
+        )
+        grouped = defaultdict(list)
+        for row, item in zip(rows, child.serialize(rows, prefix)):
+            grouped[row[owner]].append(item)
+        return grouped
+
+
+def compiled(serializer_class):
+    """Class decorator compiling the read path of ``serializer_class`` at import time.
+
+    Subclasses are not compiled unless decorated themselves.
+    """
+
+    serializer_class.compiled = CompiledSerializer(serializer_class())
+    return serializer_class
+
+
+@lru_cache(maxsize=256)
+def compile_selection(serializer_class, fields=None, expand=None):
+    return CompiledSerializer(serializer_class(fields=fields, expand=expand))
+
+
+def compiled_serializer(serializer_class, **options):
+    """Return the ``CompiledSerializer`` of ``serializer_class``, or ``None`` if it has none.
+
+    ``options`` are the ``fields``/``expand`` strings of a sparse fieldset;
+    each combination is compiled once and cached.
+    """
+
+    if not settings.API_COMPILED_SERIALIZERS:
+        return None
+    compiled = vars(serializer_class).get("compiled")
+    if compiled is None or not options:
+        return compiled
+    return compile_selection(serializer_class, **options)
+
+
+def project(queryset, serializer_class, **options):
+    """Return ``queryset`` narrowed to what ``serializer_class`` will read from it.
+
+    That is the ``values()`` projection of its compiled read path if it has
+    one, else whatever its ``narrow`` method keeps.
+    """
+
+    compiled = compiled_serializer(serializer_class, **options)
+    if compiled is not None:
+        return compiled.project(queryset)
+    if hasattr(serializer_class, "narrow"):
+        return serializer_class(**options).narrow(queryset)
+    return queryset
@@ -1,43 +1,46 @@
 # -*- coding: utf-8 -*-
 from django.conf import settings
-from django.core.mail import send_mail
-from rest_framework.exceptions import ValidationError
-from rest_framework import status
-
-
-def otp_email(first_name, email, otp):
-    try:
-        subject = "OTP Verification"
-
-        plain_message = f"{first_name}: {email}: {otp}"
-        from_email = settings.EMAIL_HOST_USER
-        to = email
-        send_mail(
-            subject=subject,
-            message=plain_message,
-            from_email=from_email,
-            recipient_list=[to],
-        )
-    except Exception as e:
-        raise ValidationError(
-            detail=f"Error in sending email {e}", code=status.HTTP_400_BAD_REQUEST
-        )
-
-
-def reset_password_email(first_name, email, url):
-    try:
-        subject = "Reset Password"
-
-        plain_message = f"{first_name}: {email}: {url}"
-        from_email = settings.EMAIL_HOST_USER
-        to = email
-        send_mail(
-            subject=subject,
-            message=plain_message,
-            from_email=from_email,
-            recipient_list=[to],
-        )
-    except Exception as e:
-        raise ValidationError(
-            detail=f"Error in sending email {e}", code=status.HTTP_400_BAD_REQUEST
-        )
+from django.core.mail import EmailMessage
+from utils.email_dispatcher import email_dispatcher
+
+
+def otp_email(first_name, email, otp, event=None):
+    subject = "OTP Verification"
+
+    plain_message = f"{first_name}: {email}: {otp}"
+    from_email = settings.EMAIL_HOST_USER
+    to = email
+    email_dispatcher.enqueue(
+        EmailMessage(
+            subject=subject, body=plain_message, from_email=from_email, to=[to]
+        ),
+        event=event,
+    )
+
+
+def reset_password_email(first_name, email, url, event=None):
+    subject = "Reset Password"
+
+    plain_message = f"{first_name}: {email}: {url}"
+    from_email = settings.EMAIL_HOST_USER
+    to = email
+    email_dispatcher.enqueue(
+        EmailMessage(
+            subject=subject, body=plain_message, from_email=from_email, to=[to]
+        ),
+        event=event,
+    )
+
+
+def invite_email(first_name, email, token, event=None):
+    subject = "Invitation"
+
+    plain_message = f"{first_name}: {email}: {token}"
+    from_email = settings.EMAIL_HOST_USER
+    to = email
+    email_dispatcher.enqueue(
+        EmailMessage(
+            subject=subject, body=plain_message, from_email=from_email, to=[to]
+        ),
+        event=event,
+    )
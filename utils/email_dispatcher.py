@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+import logging
+import queue
+import smtplib
+import threading
+import time
+from django.conf import settings
+from django.core.mail import get_connection
+from django.db import transaction
+from notifications.common import create_notification
+from notifications.writer import notification_writer
+from utils.enums import Enums
+
+logger = logging.getLogger("django")
+
+# Errors that resending the same message cannot fix.
+PERMANENT_ERRORS = (smtplib.SMTPRecipientsRefused,)
+
+
+class EmailDispatcher:
+    """Delivers outbound email off the request path.
+
+    Messages are queued once the surrounding transaction commits and sent by
+    ``EMAIL_DISPATCHER_WORKERS`` daemon threads. Each worker keeps its own SMTP
+    connection open between batches (closing it after
+    ``EMAIL_DISPATCHER_IDLE_TIMEOUT`` idle seconds) and takes up to
+    ``EMAIL_DISPATCHER_BATCH_SIZE`` queued messages at a time. Messages are
+    sent and retried one by one, with exponential backoff, so a failure never
+    resends or holds back the rest of its batch. The outcome of each message
+    is recorded as a ``Notification`` for its event instead of being raised.
+
+    With ``EMAIL_DISPATCHER_WORKERS = 0`` messages are delivered inline in the
+    on-commit callback, which keeps tests and local runs deterministic.
+    """
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._workers = []
+        self._lock = threading.Lock()
+
+    def enqueue(self, message, event=None):
+        transaction.on_commit(lambda: self.submit(message, event))
+
+    def submit(self, message, event=None):
+        if settings.EMAIL_DISPATCHER_WORKERS == 0:
+            connection = self.deliver([(message, event)])
+            if connection is not None:
+                self.close(connection)
+            return
+
+        self.start()
+        self._queue.put((message, event))
+
+    def start(self):
+        with self._lock:
+            if self._workers:
+                return
+            for index in range(settings.EMAIL_DISPATCHER_WORKERS):
+                worker = threading.Thread(
+                    target=self.run, name=f"email-dispatcher-{index}", daemon=True
+                )
+                worker.start()
+                self._workers.append(worker)
+
+    def run(self):
+        connection = None
+        while True:
+            try:
+                item = self._queue.get(timeout=settings.EMAIL_DISPATCHER_IDLE_TIMEOUT)
+            except queue.Empty:
+                if connection is not None:
+                    self.close(connection)
+                    connection = None
+                continue
+
+            batch = [item]
+            while len(batch) < settings.EMAIL_DISPATCHER_BATCH_SIZE:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            try:
+                connection = self.deliver(batch, connection)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    def deliver(self, batch, connection=None):
+        """Send each message of ``batch`` over ``connection``.
+
+        Returns the connection to reuse for the next batch, or ``None`` if it
+        had to be dropped.
+        """
+
+        for message, event in batch:
+            connection = self.send(message, event, connection)
+        return connection
+
+    def send(self, message, event, connection):
+        """Send ``message``, retrying it on a fresh connection after a failure.
+
+        Returns the connection that sent it, or ``None`` once it has failed
+        for good.
+        """
+
+        retries = settings.EMAIL_DISPATCHER_MAX_RETRIES
+        for attempt in range(retries + 1):
+            try:
+                if connection is None:
+                    connection = get_connection(fail_silently=False)
+                    connection.open()
+                connection.send_messages([message])
+            except Exception as error:
+                logger.warning(f"Email delivery attempt {attempt + 1} failed: {error}")
+                if connection is not None:
+                    self.close(connection)
+                connection = None
+                if attempt == retries or isinstance(error, PERMANENT_ERRORS):
+                    self.record(
+                        [(message, event)],
+                        is_sent=False,
+                        api_response=f"Email delivery failed: {error}",
+                    )
+                    return None
+                time.sleep(settings.EMAIL_DISPATCHER_RETRY_BACKOFF * 2**attempt)
+            else:
+                self.record([(message, event)], is_sent=True)
+                return connection
+
+    def record(self, batch, **outcome):
+        for message, event in batch:
+            if event is not None:
+                create_notification(message.to[0], Enums.EMAIL.value, event, **outcome)
+
+    def close(self, connection):
+        try:
+            connection.close()
+        except Exception as error:
+            logger.warning(f"Closing email connection failed: {error}")
+
+    def flush(self, timeout=None):
+        """Wait until every queued message has been handled, or ``timeout`` passes."""
+
+        timeout = (
+            settings.EMAIL_DISPATCHER_FLUSH_TIMEOUT if timeout is None else timeout
+        )
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+        return not self._queue.unfinished_tasks
+
+
+email_dispatcher = EmailDispatcher()
+
+
+def flush_on_exit():
+    """Shutdown hook: deliver queued email, then write every pending notification.
+
+    One hook does both, in this order, because delivering email records
+    notifications that the writer must still flush.
+    """
+
+    email_dispatcher.flush()
+    notification_writer.flush()
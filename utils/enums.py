@@ -24,3 +24,10 @@ class Enums(Enum):
     RESEND_OTP_EMAIL = 3
     RESET_PASSWORD_EMAIL = 4
     API_RESPONSE = 5
+    INVITE_EMAIL = 6
+
+    # Invite Job Status Choices
+    JOB_PENDING = 1
+    JOB_RUNNING = 2
+    JOB_COMPLETED = 3
+    JOB_FAILED = 4
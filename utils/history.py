@@ -0,0 +1,384 @@
+# -*- coding: utf-8 -*-
+import copy
+import inspect
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from itertools import chain, islice
+from django.apps import apps
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import models, transaction
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+from simple_history.models import HistoricalRecords
+from utils.history_archive import archived_rows, merge_by_history_id
+from simple_history.signals import (
+    post_create_historical_record,
+    pre_create_historical_record,
+)
+from simple_history.utils import bulk_create_with_history
+
+_history_disabled = ContextVar("history_disabled", default=False)
+
+
+@contextmanager
+def history_disabled():
+    """Write no historical records for saves and deletes made inside the block."""
+
+    token = _history_disabled.set(True)
+    try:
+        yield
+    finally:
+        _history_disabled.reset(token)
+
+
+def is_history_tracked(model):
+    return (
+        getattr(settings, "SIMPLE_HISTORY_ENABLED", True)
+        and getattr(model, "track_history", True)
+        and not _history_disabled.get()
+    )
+
+
+def remember_loaded_values(instance, field_names, values):
+    """Keep the values an instance was loaded with, for ``TrackedHistoricalRecords``."""
+
+    instance._history_snapshot = {
+        name: copy.deepcopy(value) if isinstance(value, (dict, list)) else value
+        for name, value in zip(field_names, values)
+    }
+
+
+class SavepointMarker:
+    """On-commit callback that only runs if none of its savepoints was rolled back."""
+
+    def __init__(self):
+        self.committed = False
+
+    def __call__(self):
+        self.committed = True
+
+
+class HistoryBuffer:
+    """Historical rows recorded in the current transaction of one connection.
+
+    Every row is tagged with a ``SavepointMarker`` registered through
+    ``on_commit`` under the savepoints open when the row was recorded, so
+    Django discards the marker if one of them is rolled back. Each new marker
+    is followed by a flush registered the same way; a flush writes the rows
+    whose marker already ran and that no earlier flush wrote, with one
+    ``bulk_create`` per historical model. Flushes are not robust, so a failed
+    write raises out of the commit instead of only being logged.
+
+    Telling a rolled back transaction from a rolled back savepoint needs the
+    connection's ``run_on_commit`` list of ``(savepoint_ids, func, robust)``
+    entries, which is not public API. ``check_hook`` verifies that shape on
+    every marker, so a Django release that changes it fails loudly instead of
+    silently dropping or duplicating history.
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.commit_hooks = connection.run_on_commit
+        self.markers = {}
+        self.rows = []
+        self.latest_flush = None
+
+    @classmethod
+    def for_connection(cls, connection):
+        buffer = getattr(connection, "history_buffer", None)
+        if buffer is None or not buffer.is_current():
+            buffer = connection.history_buffer = cls(connection)
+        return buffer
+
+    def is_current(self):
+        hooks = self.connection.run_on_commit
+        if hooks is not self.commit_hooks:
+            # Something was rolled back. Only a savepoint if our flush survived it.
+            if not any(hook[1] is self.latest_flush for hook in hooks):
+                return False
+            self.commit_hooks = hooks
+        return True
+
+    def check_hook(self, func):
+        """Fail unless ``on_commit`` just queued ``func`` as ``(savepoint_ids, func, robust)``."""
+
+        hooks = self.connection.run_on_commit
+        hook = hooks[-1] if hooks else None
+        if not (
+            isinstance(hook, tuple)
+            and len(hook) == 3
+            and hook[0] == set(self.connection.savepoint_ids)
+            and hook[1] is func
+            and isinstance(hook[2], bool)
+        ):
+            raise ImproperlyConfigured(
+                "HistoryBuffer does not understand this Django version's on-commit "
+                f"hooks ({hook!r}); set HISTORY_BUFFERING = False."
+            )
+
+    def add(self, history_instance, signal_kwargs):
+        key = tuple(self.connection.savepoint_ids)
+        marker = self.markers.get(key)
+        if marker is None:
+            marker = self.markers[key] = SavepointMarker()
+            transaction.on_commit(marker, using=self.connection.alias)
+            self.check_hook(marker)
+            # Keep the bound method so is_current() can find it among the hooks.
+            self.latest_flush = self.flush
+            transaction.on_commit(self.latest_flush, using=self.connection.alias)
+        self.rows.append((marker, history_instance, signal_kwargs))
+
+    def flush(self):
+        if getattr(self.connection, "history_buffer", None) is self:
+            self.connection.history_buffer = None
+
+        batches = defaultdict(list)
+        pending = []
+        for row in self.rows:
+            marker, history_instance, signal_kwargs = row
+            if marker.committed:
+                batches[type(history_instance)].append(
+                    (history_instance, signal_kwargs)
+                )
+            else:
+                pending.append(row)
+        self.rows = pending
+        alias = self.connection.alias
+        with transaction.atomic(using=alias):
+            for model, rows in batches.items():
+                model.objects.using(alias).bulk_create([row for row, _ in rows])
+        for model, rows in batches.items():
+            for history_instance, signal_kwargs in rows:
+                post_create_historical_record.send(
+                    sender=model, history_instance=history_instance, **signal_kwargs
+                )
+
+
+class TrackedHistoricalRecords(HistoricalRecords):
+    """``HistoricalRecords`` that only writes a row when something worth keeping changed.
+
+    * Saves that leave every tracked field as it was loaded write no row.
+      ``auto_now`` fields are ignored when comparing.
+    * Fields listed in the model's ``history_excluded_fields`` are neither
+      stored nor compared.
+    * ``track_history = False`` on a model, ``history_disabled()`` around a
+      write path, or ``SIMPLE_HISTORY_ENABLED = False`` turn recording off.
+    * With ``HISTORY_BUFFERING`` on, rows recorded inside a transaction are
+      kept in a ``HistoryBuffer`` and written after it commits, keeping the
+      date and user of the original change. Outside a transaction, and for
+      models with history-tracked many-to-many fields, rows are written
+      immediately.
+
+    The model must call ``remember_loaded_values`` from ``from_db``; instances
+    without a snapshot always get a row.
+    """
+
+    def get_meta_options(self, model):
+        meta_fields = super().get_meta_options(model)
+        # Serves "latest row per object up to a date" lookups, see history_as_of().
+        meta_fields["indexes"] = (
+            *meta_fields.get("indexes", ()),
+            models.Index(fields=(model._meta.pk.attname, "history_date")),
+        )
+        return meta_fields
+
+    def fields_included(self, model):
+        excluded = getattr(model, "history_excluded_fields", ())
+        return [
+            field
+            for field in super().fields_included(model)
+            if field.name not in excluded
+        ]
+
+    def compared_values(self, instance):
+        return {
+            field.attname: instance.__dict__[field.attname]
+            for field in self.fields_included(type(instance))
+            if not getattr(field, "auto_now", False)
+            and field.attname in instance.__dict__
+        }
+
+    def has_changes(self, instance):
+        snapshot = getattr(instance, "_history_snapshot", None)
+        if snapshot is None:
+            return True
+        return any(
+            name not in snapshot or snapshot[name] != value
+            for name, value in self.compared_values(instance).items()
+        )
+
+    def post_save(self, instance, created, using=None, **kwargs):
+        if is_history_tracked(type(instance)) and (
+            created or self.has_changes(instance)
+        ):
+            super().post_save(instance, created, using=using, **kwargs)
+        values = self.compared_values(instance)
+        remember_loaded_values(instance, values.keys(), values.values())
+
+    def post_delete(self, instance, using=None, **kwargs):
+        if is_history_tracked(type(instance)):
+            super().post_delete(instance, using=using, **kwargs)
+
+    def create_historical_record(self, instance, history_type, using=None):
+        connection = transaction.get_connection(using)
+        if (
+            not settings.HISTORY_BUFFERING
+            or not connection.in_atomic_block
+            or self.get_m2m_fields_from_model(type(instance))
+        ):
+            return super().create_historical_record(instance, history_type, using)
+
+        history_date = getattr(instance, "_history_date", timezone.now())
+        history_user = self.get_history_user(instance)
+        history_change_reason = self.get_change_reason_for_object(
+            instance, history_type, using
+        )
+        # Reading the manager off the instance builds a new manager class each time.
+        history_model = inspect.getattr_static(type(instance), self.manager_name).model
+        attrs = {
+            field.attname: getattr(instance, field.attname)
+            for field in self.fields_included(instance)
+        }
+        if getattr(history_model, "history_relation", None) is not None:
+            attrs["history_relation"] = instance
+        history_instance = history_model(
+            history_date=history_date,
+            history_type=history_type,
+            history_user=history_user,
+            history_change_reason=history_change_reason,
+            **attrs,
+        )
+        signal_kwargs = {
+            "instance": instance,
+            "history_date": history_date,
+            "history_user": history_user,
+            "history_change_reason": history_change_reason,
+            "using": using if self.use_base_model_db else None,
+        }
+        pre_create_historical_record.send(
+            sender=history_model, history_instance=history_instance, **signal_kwargs
+        )
+        HistoryBuffer.for_connection(connection).add(history_instance, signal_kwargs)
+
+
+def bulk_create_tracked(objs, model, batch_size=None):
+    """``bulk_create`` that also writes history rows while ``model`` is tracked."""
+
+    if is_history_tracked(model):
+        return bulk_create_with_history(objs, model, batch_size=batch_size)
+    return model.objects.bulk_create(objs, batch_size=batch_size)
+
+
+def historical_models():
+    """Map lower-cased model names to their historical models."""
+
+    return {
+        model.instance_type.__name__.lower(): model
+        for model in apps.get_models()
+        if model.__name__.startswith("Historical")
+    }
+
+
+def history_rows(
+    history_model, since=None, until=None, after=None, object_id=None, limit=None
+):
+    """Iterate over historical rows as dicts in ``history_id`` order.
+
+    ``since``/``until`` bound ``history_date`` (inclusive/exclusive), ``after``
+    is a keyset cursor on ``history_id`` and ``object_id`` narrows to one
+    tracked object. Rows are fetched ``HISTORY_STREAM_CHUNK_SIZE`` at a time
+    and merged with any archived segments that can match.
+    """
+
+    queryset = history_model.objects.order_by("history_id")
+    if since is not None:
+        queryset = queryset.filter(history_date__gte=since)
+    if until is not None:
+        queryset = queryset.filter(history_date__lt=until)
+    if after is not None:
+        queryset = queryset.filter(history_id__gt=after)
+    if object_id is not None:
+        pk_name = history_model.instance_type._meta.pk.attname
+        queryset = queryset.filter(**{pk_name: object_id})
+    queryset = queryset.values()
+    if limit is not None:
+        queryset = queryset[:limit]
+    rows = queryset.iterator(chunk_size=settings.HISTORY_STREAM_CHUNK_SIZE)
+
+    archived = archived_rows(
+        history_model, since=since, until=until, after=after, object_id=object_id
+    )
+    if archived is None:
+        return rows
+    return islice(merge_by_history_id(archived, rows), limit)
+
+
+def history_as_of(history_model, when, object_ids=None, after=None, limit=None):
+    """Iterate over the state of tracked objects at ``when``, as historical rows.
+
+    For each object, the row picked is its latest one with ``history_date``
+    up to ``when``, found through the ``(pk, history_date)`` index. Objects
+    deleted by then, or not yet created, are left out. ``object_ids`` narrows
+    the set and ``after`` is a keyset cursor on the object pk. Rows come in pk
+    order.
+
+    If archived segments reach back to ``when``, their latest row per object
+    is kept in memory and compared with the table's.
+    """
+
+    pk_name = history_model.instance_type._meta.pk.attname
+    history = history_model.objects.filter(history_date__lte=when)
+    latest = (
+        history.filter(**{pk_name: OuterRef(pk_name)})
+        .order_by("-history_date", "-history_id")
+        .values("history_id")[:1]
+    )
+    objects = history
+    if object_ids is not None:
+        objects = objects.filter(**{f"{pk_name}__in": object_ids})
+    if after is not None:
+        objects = objects.filter(**{f"{pk_name}__gt": after})
+    latest_ids = (
+        objects.order_by()
+        .values(pk_name)
+        .distinct()
+        .annotate(latest_id=Subquery(latest))
+        .values("latest_id")
+    )
+    queryset = (
+        history_model.objects.filter(history_id__in=latest_ids)
+        .order_by(pk_name)
+        .values()
+    )
+
+    archived = archived_rows(history_model, upto=when)
+    if archived is None:
+        queryset = queryset.exclude(history_type="-")
+        if limit is not None:
+            queryset = queryset[:limit]
+        return queryset.iterator(chunk_size=settings.HISTORY_STREAM_CHUNK_SIZE)
+
+    wanted = None if object_ids is None else {str(pk) for pk in object_ids}
+    states = {}
+    for row in chain(
+        archived, queryset.iterator(chunk_size=settings.HISTORY_STREAM_CHUNK_SIZE)
+    ):
+        object_id = row[pk_name]
+        if (wanted is not None and str(object_id) not in wanted) or (
+            after is not None and object_id <= after
+        ):
+            continue
+        state = states.get(object_id)
+        if state is None or (state["history_date"], state["history_id"]) < (
+            row["history_date"],
+            row["history_id"],
+        ):
+            states[object_id] = row
+    rows = (
+        states[object_id]
+        for object_id in sorted(states)
+        if states[object_id]["history_type"] != "-"
+    )
+    return islice(rows, limit)
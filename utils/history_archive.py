@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+import gzip
+import heapq
+import json
+import os
+from datetime import timedelta
+from operator import itemgetter
+from pathlib import Path
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from utils.renderers import encode
+
+SEGMENT_SUFFIX = ".ndjson.gz"
+INDEX_SUFFIX = ".index.json"
+
+# Parsed sidecar indexes per segment directory, with the directory mtime they were read at.
+_indexes = {}
+
+
+def archive_dir(history_model):
+    meta = history_model._meta
+    return Path(settings.HISTORY_ARCHIVE_DIR) / meta.app_label / meta.model_name
+
+
+def write_atomically(path, write, opener=open):
+    temporary = path.with_name(path.name + ".tmp")
+    with opener(temporary, "wt", encoding="utf-8") as file:
+        write(file)
+    with open(temporary, "rb") as file:
+        os.fsync(file.fileno())
+    os.replace(temporary, path)
+
+
+def write_segment(history_model, rows):
+    """Write ``rows`` (sorted by ``history_id``) as a gzip NDJSON segment with its sidecar index.
+
+    The sidecar is written last, so a segment only becomes visible to readers
+    once it is complete.
+    """
+
+    pk_name = history_model.instance_type._meta.pk.attname
+    first, last = rows[0]["history_id"], rows[-1]["history_id"]
+    directory = archive_dir(history_model)
+    directory.mkdir(parents=True, exist_ok=True)
+    stem = f"{first:012d}-{last:012d}"
+
+    def write_rows(file):
+        for row in rows:
+            file.write(encode(row) + "\n")
+
+    write_atomically(directory / (stem + SEGMENT_SUFFIX), write_rows, gzip.open)
+    dates = [row["history_date"] for row in rows]
+    object_ids = [row[pk_name] for row in rows]
+    index = {
+        "segment": stem + SEGMENT_SUFFIX,
+        "rows": len(rows),
+        "history_id": [first, last],
+        "history_date": [min(dates).isoformat(), max(dates).isoformat()],
+        "object_id": [min(object_ids), max(object_ids)],
+    }
+    write_atomically(
+        directory / (stem + INDEX_SUFFIX), lambda file: json.dump(index, file)
+    )
+    return index
+
+
+def archive_history(history_model, older_than=None, segment_rows=None):
+    """Move rows older than ``older_than`` out of ``history_model`` into segment files.
+
+    Rows are archived in ``history_id`` order, ``segment_rows`` per segment,
+    and deleted from the table once their segment is on disk. Returns the
+    number of rows archived.
+    """
+
+    if older_than is None:
+        older_than = timedelta(days=settings.HISTORY_ARCHIVE_AFTER_DAYS)
+    segment_rows = segment_rows or settings.HISTORY_ARCHIVE_SEGMENT_ROWS
+    cutoff = timezone.now() - older_than
+    cold = history_model.objects.filter(history_date__lt=cutoff).order_by("history_id")
+
+    archived = 0
+    last_id = None
+    while True:
+        batch = cold if last_id is None else cold.filter(history_id__gt=last_id)
+        rows = list(batch.values()[:segment_rows])
+        if not rows:
+            return archived
+        write_segment(history_model, rows)
+        last_id = rows[-1]["history_id"]
+        with transaction.atomic():
+            history_model.objects.filter(
+                history_id__in=[row["history_id"] for row in rows]
+            ).delete()
+        archived += len(rows)
+
+
+def segment_indexes(history_model):
+    """Return the sidecar indexes of ``history_model``'s segments, oldest first.
+
+    The parsed list is kept until the directory's mtime changes, which every
+    segment written, replaced or removed there does.
+    """
+
+    directory = archive_dir(history_model)
+    try:
+        mtime = directory.stat().st_mtime_ns
+    except FileNotFoundError:
+        return []
+    cached = _indexes.get(directory)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+
+    indexes = []
+    for path in directory.glob("*" + INDEX_SUFFIX):
+        with open(path, encoding="utf-8") as file:
+            index = json.load(file)
+        index["path"] = directory / index["segment"]
+        index["history_date"] = [
+            parse_datetime(value) for value in index["history_date"]
+        ]
+        indexes.append(index)
+    indexes.sort(key=lambda index: index["history_id"])
+    _indexes[directory] = (mtime, indexes)
+    return indexes
+
+
+def read_segment(index):
+    with gzip.open(index["path"], "rt", encoding="utf-8") as file:
+        for line in file:
+            row = json.loads(line)
+            row["history_date"] = parse_datetime(row["history_date"])
+            yield row
+
+
+def object_id_in_range(object_id, bounds):
+    low, high = bounds
+    if isinstance(low, int):
+        try:
+            object_id = int(object_id)
+        except ValueError:
+            return False
+    return low <= object_id <= high
+
+
+def archived_rows(
+    history_model, since=None, until=None, after=None, object_id=None, upto=None
+):
+    """Iterate over archived rows matching the filters, merged in ``history_id`` order.
+
+    Only segments whose sidecar ranges can match are opened. ``upto`` keeps
+    rows with ``history_date`` at or before it. Returns ``None`` when no
+    segment can match, so callers can skip the merge entirely.
+    """
+
+    pk_name = history_model.instance_type._meta.pk.attname
+    if object_id is not None:
+        object_id = str(object_id)
+    indexes = [
+        index
+        for index in segment_indexes(history_model)
+        if (since is None or index["history_date"][1] >= since)
+        and (until is None or index["history_date"][0] < until)
+        and (upto is None or index["history_date"][0] <= upto)
+        and (after is None or index["history_id"][1] > after)
+        and (object_id is None or object_id_in_range(object_id, index["object_id"]))
+    ]
+    if not indexes:
+        return None
+
+    def matches(row):
+        date = row["history_date"]
+        return (
+            (since is None or date >= since)
+            and (until is None or date < until)
+            and (upto is None or date <= upto)
+            and (after is None or row["history_id"] > after)
+            and (object_id is None or str(row[pk_name]) == object_id)
+        )
+
+    return (
+        row
+        for row in heapq.merge(
+            *(read_segment(index) for index in indexes), key=itemgetter("history_id")
+        )
+        if matches(row)
+    )
+
+
+def merge_by_history_id(*sources):
+    """Merge row iterators sorted by ``history_id``, dropping repeated ids.
+
+    A row can be in both the table and a segment if archiving stopped
+    between writing a segment and deleting its rows.
+    """
+
+    last_id = None
+    for row in heapq.merge(*sources, key=itemgetter("history_id")):
+        if row["history_id"] != last_id:
+            last_id = row["history_id"]
+            yield row
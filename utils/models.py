@@ -1,13 +1,19 @@
 # -*- coding: utf-8 -*-
 from django.db import models
-from simple_history.models import HistoricalRecords
+from utils.history import TrackedHistoricalRecords, remember_loaded_values
 
 
 class BaseModel(models.Model):
     created_at = models.DateTimeField(auto_now_add=True, null=True, blank=True)
     updated_at = models.DateTimeField(auto_now=True, null=True, blank=True)
     is_active = models.BooleanField(default=True)
-    history = HistoricalRecords(inherit=True)
+    history = TrackedHistoricalRecords(inherit=True)
 
     class Meta:
         abstract = True
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        remember_loaded_values(instance, field_names, values)
+        return instance
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+from django.conf import settings
+from drf_yasg import openapi
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+CURSOR_PARAMETERS = [
+    openapi.Parameter(
+        "cursor",
+        openapi.IN_QUERY,
+        description="Opaque cursor from the `Link` header of the previous page.",
+        type=openapi.TYPE_STRING,
+    ),
+    openapi.Parameter(
+        "page_size",
+        openapi.IN_QUERY,
+        description="Items per page, at most `API_MAX_PAGE_SIZE`.",
+        type=openapi.TYPE_INTEGER,
+    ),
+]
+
+FIELD_PARAMETERS = [
+    openapi.Parameter(
+        "fields",
+        openapi.IN_QUERY,
+        description="Comma-separated fields to return, e.g. `id,name,permissions.name`.",
+        type=openapi.TYPE_STRING,
+    ),
+    openapi.Parameter(
+        "expand",
+        openapi.IN_QUERY,
+        description="Comma-separated fields to return as nested objects instead of ids.",
+        type=openapi.TYPE_STRING,
+    ),
+]
+
+
+class KeysetCursorPagination(CursorPagination):
+    """Cursor pagination over the ``-id`` ordering the models declare.
+
+    Every page is one ``WHERE id < <last id> ORDER BY id DESC LIMIT n + 1``
+    query, with no ``OFFSET`` and no ``COUNT(*)``. Response bodies keep their
+    existing shape; the opaque next/previous page URLs are sent in a ``Link``
+    header.
+    """
+
+    ordering = "-id"
+    page_size_query_param = "page_size"
+
+    def __init__(self):
+        self.page_size = api_settings.PAGE_SIZE
+        self.max_page_size = settings.API_MAX_PAGE_SIZE
+
+    def get_paginated_response(self, data):
+        return self.add_links(Response(data))
+
+    def add_links(self, response):
+        links = [
+            f'<{url}>; rel="{rel}"'
+            for rel, url in (
+                ("next", self.get_next_link()),
+                ("prev", self.get_previous_link()),
+            )
+            if url
+        ]
+        if links:
+            response["Link"] = ", ".join(links)
+        return response
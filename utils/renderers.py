@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+import json
+from itertools import islice
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from rest_framework.renderers import BaseRenderer
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+from utils.compiled_serializers import compiled_serializer, project
+from utils.serializers import requested_fields
+from utils.util import response_data_formating
+
+
+def encode(obj):
+    """Encode ``obj`` the way DRF's ``JSONRenderer`` does with its default settings."""
+
+    text = json.dumps(obj, cls=JSONEncoder, ensure_ascii=False, separators=(",", ":"))
+    return text.replace("\u2028", "\\u2028").replace("\u2029", "\\u2029")
+
+
+def chunked(rows, size):
+    rows = iter(rows)
+    while chunk := list(islice(rows, size)):
+        yield chunk
+
+
+def stream_ndjson(rows, chunk_size=None):
+    """Yield ``rows`` as newline-delimited JSON, one chunk of rows per write."""
+
+    for chunk in chunked(rows, chunk_size or settings.HISTORY_STREAM_CHUNK_SIZE):
+        yield "".join(encode(row) + "\n" for row in chunk).encode()
+
+
+def stream_json_array(rows, chunk_size=None):
+    """Yield ``rows`` as a single JSON array, one chunk of rows per write."""
+
+    separator = "["
+    for chunk in chunked(rows, chunk_size or settings.HISTORY_STREAM_CHUNK_SIZE):
+        yield (separator + ",".join(encode(row) for row in chunk)).encode()
+        separator = ","
+    yield b"[]" if separator == "[" else b"]"
+
+
+def stream_envelope(rows, message="success", chunk_size=None):
+    """Yield the ``response_data_formating`` envelope with ``rows`` as its ``data`` list.
+
+    The bytes match rendering the whole envelope with ``JSONRenderer``.
+    """
+
+    head = encode(response_data_formating(generalMessage=message, data=None))
+    yield head[: -len("null}")].encode()
+    yield from stream_json_array(rows, chunk_size)
+    yield b"}"
+
+
+def streaming_rows_response(request, rows):
+    """Stream ``rows`` as NDJSON if that is what the request accepted, else as a JSON array."""
+
+    if request.accepted_renderer.format == NDJSONRenderer.format:
+        return StreamingHttpResponse(
+            stream_ndjson(rows), content_type=NDJSONRenderer.media_type
+        )
+    return StreamingHttpResponse(
+        stream_json_array(rows), content_type="application/json"
+    )
+
+
+def list_response(rows, serializer_class, context=None, envelope=True, **options):
+    """Serialize ``rows`` into a list response, enveloped unless ``envelope`` is false.
+
+    ``options`` are passed on to the serializer. Serializers with a compiled
+    read path expect ``rows`` from ``project`` with the same ``options``.
+    Up to ``API_STREAM_CHUNK_SIZE`` rows are rendered as a normal ``Response``.
+    Anything longer, or a queryset, is serialized and written one chunk at a
+    time through a ``StreamingHttpResponse``, so neither the full ``data``
+    list nor the full JSON body is held in memory.
+    """
+
+    compiled = compiled_serializer(serializer_class, **options)
+
+    def serialize(chunk):
+        if compiled is not None:
+            return compiled.serialize(chunk)
+        return serializer_class(chunk, many=True, context=context, **options).data
+
+    chunk_size = settings.API_STREAM_CHUNK_SIZE
+    if isinstance(rows, list) and len(rows) <= chunk_size:
+        data = serialize(rows)
+        if envelope:
+            data = response_data_formating(generalMessage="success", data=data)
+        return Response(data)
+
+    if not isinstance(rows, list):
+        rows = rows.iterator(chunk_size=chunk_size)
+    items = (item for chunk in chunked(rows, chunk_size) for item in serialize(chunk))
+    stream = stream_envelope if envelope else stream_json_array
+    return StreamingHttpResponse(
+        stream(items, chunk_size=chunk_size), content_type="application/json"
+    )
+
+
+class StreamingListMixin:
+    """``ListModelMixin.list`` that answers through ``list_response``."""
+
+    def list(self, request, *args, **kwargs):
+        serializer_class = self.get_serializer_class()
+        options = requested_fields(request, serializer_class)
+        queryset = self.filter_queryset(self.get_queryset())
+        queryset = project(queryset, serializer_class, **options)
+        page = self.paginate_queryset(queryset)
+        response = list_response(
+            queryset if page is None else page,
+            serializer_class,
+            context=self.get_serializer_context(),
+            envelope=False,
+            **options,
+        )
+        if page is not None:
+            response = self.paginator.add_links(response)
+        return response
+
+
+class NDJSONRenderer(BaseRenderer):
+    """Render a list as newline-delimited JSON; anything else as a single line."""
+
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        rows = data if isinstance(data, list) else [data]
+        return b"".join(stream_ndjson(rows))
@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+import gzip
+import hashlib
+import os
+import re
+import threading
+from pathlib import Path
+from django.conf import settings
+from django.core import checks
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags
+from drf_yasg.app_settings import swagger_settings
+from drf_yasg.renderers import OpenAPIRenderer, SwaggerJSONRenderer
+
+try:
+    import brotli
+except ImportError:  # Brotli is optional; gzip is always available.
+    brotli = None
+
+ENCODINGS = {"br": ".br", "gzip": ".gz"}
+
+
+def generate_schema():
+    """Walk every view and return the OpenAPI document as JSON bytes.
+
+    The schema is generated without a request, so it carries no ``host``
+    and Swagger UI targets whichever host served it.
+    """
+
+    generator = swagger_settings.DEFAULT_GENERATOR_CLASS(swagger_settings.DEFAULT_INFO)
+    return OpenAPIRenderer().render(generator.get_schema(request=None, public=True))
+
+
+def compress(body, encoding):
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=9, mtime=0)
+    return brotli.compress(body, quality=11)
+
+
+def decompress(variant, encoding):
+    if encoding == "gzip":
+        return gzip.decompress(variant)
+    return brotli.decompress(variant)
+
+
+class PrecomputedSchema:
+    """The schema body with its compressed variants, each with its own strong ETag."""
+
+    def __init__(self, body, variants=None):
+        self.body = body
+        self.digest = hashlib.sha256(body).hexdigest()
+        if variants is None:
+            variants = {
+                encoding: compress(body, encoding)
+                for encoding in ENCODINGS
+                if encoding != "br" or brotli is not None
+            }
+        self.variants = variants
+
+    @classmethod
+    def load(cls, path):
+        """Read the schema at ``path`` and its variants, or return ``None`` if it is missing."""
+
+        path = Path(path)
+        if not path.is_file():
+            return None
+        variants = {}
+        for encoding, suffix in ENCODINGS.items():
+            variant = path.with_name(path.name + suffix)
+            if variant.is_file():
+                variants[encoding] = variant.read_bytes()
+        return cls(path.read_bytes(), variants)
+
+    def is_current(self, body):
+        """Whether this schema and every variant that can be decoded here equal ``body``."""
+
+        return self.body == body and all(
+            decompress(variant, encoding) == body
+            for encoding, variant in self.variants.items()
+            if encoding != "br" or brotli is not None
+        )
+
+    def write(self, path):
+        """Write the body to ``path`` and each variant next to it, each file atomically."""
+
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        files = {path: self.body}
+        for encoding, variant in self.variants.items():
+            files[path.with_name(path.name + ENCODINGS[encoding])] = variant
+        for target, content in files.items():
+            temporary = target.with_name(target.name + ".tmp")
+            temporary.write_bytes(content)
+            os.replace(temporary, target)
+
+    def etag(self, encoding=None):
+        """Return the ETag of the body sent with ``encoding``, or of the plain body for ``None``."""
+
+        if encoding is None:
+            return '"%s"' % self.digest
+        return '"%s-%s"' % (self.digest, encoding)
+
+    def response(self, request, content_type):
+        """Answer ``request`` with the best variant it accepts, or 304 if that variant's ETag matches."""
+
+        accepted = request.META.get("HTTP_ACCEPT_ENCODING", "")
+        encoding = next(
+            (
+                encoding
+                for encoding in self.variants
+                if re.search(rf"\b{encoding}\b(?!\s*;\s*q=0(\.0*)?(?![\d.]))", accepted)
+            ),
+            None,
+        )
+        etag = self.etag(encoding)
+        if etag in parse_etags(request.META.get("HTTP_IF_NONE_MATCH", "")):
+            response = HttpResponseNotModified()
+        else:
+            body = self.body if encoding is None else self.variants[encoding]
+            response = HttpResponse(body, content_type=content_type)
+            if encoding is not None:
+                response.headers["Content-Encoding"] = encoding
+        response.headers["ETag"] = etag
+        patch_vary_headers(response, ("Accept-Encoding",))
+        return response
+
+
+_schema = None
+_lock = threading.Lock()
+
+
+def get_schema():
+    """Return this process's ``PrecomputedSchema``.
+
+    It is read from ``API_SCHEMA_FILE``, as written at deploy time by
+    ``manage.py generate_schema``. Without that file the schema is generated
+    once, on first use, and kept in memory.
+    """
+
+    global _schema
+    if _schema is None:
+        with _lock:
+            if _schema is None:
+                _schema = PrecomputedSchema.load(settings.API_SCHEMA_FILE)
+                if _schema is None:
+                    _schema = PrecomputedSchema(generate_schema())
+    return _schema
+
+
+def reset_schema():
+    global _schema
+    _schema = None
+
+
+def check_schema(app_configs=None, **kwargs):
+    """Deploy check: ``API_SCHEMA_FILE`` must exist and match the schema the views produce now."""
+
+    schema = PrecomputedSchema.load(settings.API_SCHEMA_FILE)
+    hint = "Run `manage.py generate_schema` as part of the deploy."
+    if schema is None:
+        return [
+            checks.Warning(
+                f"No precomputed API schema at {settings.API_SCHEMA_FILE}; "
+                "each process will generate it on first request.",
+                hint=hint,
+                id="api_schema.W001",
+            )
+        ]
+    if not schema.is_current(generate_schema()):
+        return [
+            checks.Error(
+                f"The API schema at {settings.API_SCHEMA_FILE} is stale.",
+                hint=hint,
+                id="api_schema.E001",
+            )
+        ]
+    return []
+
+
+class PrecomputedSchemaMixin:
+    """Serve JSON schema requests of a ``get_schema_view`` class from ``get_schema``.
+
+    Swagger UI and ReDoc pages and YAML requests are still answered by
+    drf-yasg; the UI pages are rendered without walking the views.
+    """
+
+    def get(self, request, version="", format=None):
+        renderer = request.accepted_renderer
+        if isinstance(renderer, (OpenAPIRenderer, SwaggerJSONRenderer)):
+            return get_schema().response(request, renderer.media_type)
+        return super().get(request, version, format)
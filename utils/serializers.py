@@ -1,8 +1,151 @@
 # -*- coding: utf-8 -*-
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from django.utils.module_loading import import_string
 from rest_framework import serializers
 
 
+def parse_field_paths(value):
+    """Parse ``"id,permissions.name"`` into ``{"id": None, "permissions": {"name": None}}``.
+
+    ``None`` stands for the whole field.
+    """
+
+    tree = {}
+    for path in value.split(","):
+        names = [name.strip() for name in path.split(".")]
+        if not all(names):
+            continue
+        node = tree
+        for name in names[:-1]:
+            if name in node and node[name] is None:
+                break
+            node = node.setdefault(name, {})
+        else:
+            node[names[-1]] = None
+    return tree
+
+
+def requested_fields(request, serializer_class):
+    """Return the ``fields``/``expand`` options asked for in the query string.
+
+    Only the ``CustomBaseModelSerializer`` family understands them; any other
+    serializer gets no options.
+    """
+
+    if not issubclass(serializer_class, CustomBaseModelSerializer):
+        return {}
+    return {
+        name: request.query_params[name]
+        for name in ("fields", "expand")
+        if request.query_params.get(name)
+    }
+
+
 class CustomBaseModelSerializer(serializers.ModelSerializer):
+    """``ModelSerializer`` that rejects unknown input keys and supports sparse fieldsets.
+
+    ``fields="id,permissions.name"`` keeps only the listed fields, with dotted
+    names selecting inside nested serializers. ``expand="role"`` swaps a field
+    for the serializer ``Meta.expandable_fields`` maps it to, given as a class
+    or a dotted path. Unknown names raise a ``ValidationError`` as soon as the
+    fields are built.
+    """
+
+    def __init__(self, *args, fields=None, expand=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if isinstance(fields, str):
+            fields = parse_field_paths(fields)
+        if isinstance(expand, str):
+            expand = parse_field_paths(expand)
+        self.selected_fields = fields
+        self.expanded_fields = expand or {}
+
+    def get_fields(self):
+        fields = super().get_fields()
+        expandable = getattr(self.Meta, "expandable_fields", {})
+        self.check_names("expand", self.expanded_fields, expandable)
+        for name, expand in self.expanded_fields.items():
+            field = fields[name]
+            options = {"read_only": True, "expand": expand}
+            if isinstance(
+                field, (serializers.ListSerializer, serializers.ManyRelatedField)
+            ):
+                options["many"] = True
+            if field.source not in (None, name):
+                options["source"] = field.source
+            serializer_class = expandable[name]
+            if isinstance(serializer_class, str):
+                serializer_class = import_string(serializer_class)
+            fields[name] = serializer_class(**options)
+
+        if self.selected_fields is None:
+            return fields
+        self.check_names("fields", self.selected_fields, fields)
+        for name, selected in self.selected_fields.items():
+            if selected is None:
+                continue
+            nested = fields[name]
+            if isinstance(nested, serializers.ListSerializer):
+                nested = nested.child
+            if not isinstance(nested, CustomBaseModelSerializer):
+                raise serializers.ValidationError(
+                    {"fields": f"'{name}' has no fields to select"}
+                )
+            nested.selected_fields = selected
+        return {
+            name: field
+            for name, field in fields.items()
+            if name in self.selected_fields
+        }
+
+    def check_names(self, option, names, allowed):
+        unknown = set(names) - set(allowed)
+        if unknown:
+            raise serializers.ValidationError(
+                {option: f"Unknown fields: {', '.join(sorted(unknown))}"}
+            )
+
+    def narrow(self, queryset):
+        """Return ``queryset`` loading only what the readable fields use.
+
+        Columns are limited with ``only()``, foreign keys crossed by a dotted
+        ``source`` are joined with ``select_related()`` and many-to-many fields
+        are prefetched with a queryset the nested serializer narrows in turn.
+        Relations outside the selected fields are not fetched at all.
+        """
+
+        model = queryset.model
+        only, select, prefetch = [model._meta.pk.name], [], []
+        for field in self._readable_fields:
+            nested = field
+            if isinstance(field, serializers.ListSerializer):
+                nested = field.child
+            try:
+                model_field = model._meta.get_field(field.source_attrs[0])
+            except (IndexError, FieldDoesNotExist):
+                return queryset
+
+            if model_field.many_to_many:
+                related = model_field.related_model._default_manager.all()
+                if isinstance(nested, CustomBaseModelSerializer):
+                    related = nested.narrow(related)
+                elif isinstance(field, serializers.ManyRelatedField):
+                    related = related.only(related.model._meta.pk.name)
+                prefetch.append(Prefetch(model_field.name, queryset=related))
+            elif model_field.one_to_many:
+                prefetch.append(model_field.name)
+            elif isinstance(nested, serializers.BaseSerializer):
+                return queryset
+            else:
+                *hops, name = field.source_attrs
+                for end in range(1, len(hops) + 1):
+                    only.append("__".join(hops[:end]))
+                if hops:
+                    select.append("__".join(hops))
+                only.append("__".join([*hops, name]))
+        return queryset.only(*only).select_related(*select).prefetch_related(*prefetch)
+
     def to_internal_value(self, data):
         # Check for unexpected keys
         allowed_keys = set(self.fields.keys())
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+import time
+from django.core.cache import cache
+from django.db import transaction
+
+VERSION_KEY = "versions:{}"
+
+
+def model_scope(model, pk=None):
+    """Name the version counter of ``model``, or of its row ``pk`` if given."""
+
+    scope = model._meta.label_lower
+    return scope if pk is None else f"{scope}:{pk}"
+
+
+def bump_versions(scopes):
+    """Move the counters of ``scopes`` on once the current transaction commits.
+
+    Bumping after the commit means no reader can pair the new version with
+    data from before the change.
+    """
+
+    keys = [VERSION_KEY.format(scope) for scope in scopes]
+    transaction.on_commit(lambda: increment(keys))
+
+
+def increment(keys):
+    # A counter that is missing (never set, evicted or flushed) restarts from
+    # the clock rather than from 1, so it cannot repeat a version handed out before.
+    for key in keys:
+        if not cache.add(key, time.time_ns(), timeout=None):
+            try:
+                cache.incr(key)
+            except ValueError:
+                cache.set(key, time.time_ns(), timeout=None)
+
+
+def get_versions(scopes):
+    """Return the current counters of ``scopes``, in order, starting any that are missing."""
+
+    keys = [VERSION_KEY.format(scope) for scope in scopes]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, time.time_ns(), timeout=None)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]